@@ -3,7 +3,15 @@ from sanic.response import text
 from sanic_mongodb_ext import MongoDbExtension
 from sanic_amqp_ext import AmqpExtension
 
-from app.workers import GetServerWorker, RegisterServerWorker, UpdateServerWorker
+from app.game_servers.coalescer import AllocationCoalescer
+from app.game_servers.scheduler import HIGH_PRIORITY, LOW_PRIORITY, WeightedScheduler
+from app.game_servers.storage import StorageExtension
+from app.workers import (
+    AllocateMatchWorker, GetServerWorker, PoolEventsWorker, RegisterServerWorker,
+    ReportServerWorker, UnregisterServerWorker, UpdateServerWorker
+)
+from app.workers.shutdown import drain_workers
+from app.workers.startup import start_services
 
 
 app = Sanic('microservice-game-servers-pool')
@@ -13,16 +21,70 @@ app.config.from_envvar('APP_CONFIG_PATH')
 # Extensions
 AmqpExtension(app)
 MongoDbExtension(app)
+StorageExtension(app)
+
+# Batching of concurrent allocations
+if app.config["ALLOCATION_BATCHING_ENABLED"]:
+    app.allocation_coalescer = AllocationCoalescer(
+        app.storage,
+        window=app.config["ALLOCATION_BATCH_WINDOW_MS"] / 1000.0,
+        max_batch_size=app.config["ALLOCATION_BATCH_MAX_SIZE"]
+    )
+else:
+    app.allocation_coalescer = None
+
+# Prioritization of requests consumed by the workers
+app.request_scheduler = WeightedScheduler(
+    {
+        HIGH_PRIORITY: app.config["SCHEDULER_HIGH_PRIORITY_WEIGHT"],
+        LOW_PRIORITY: app.config["SCHEDULER_LOW_PRIORITY_WEIGHT"],
+    },
+    concurrency=app.config["SCHEDULER_CONCURRENCY"],
+    flow_weights=app.config["SCHEDULER_GAME_MODE_WEIGHTS"]
+)
 
 # RabbitMQ workers
-app.amqp.register_worker(GetServerWorker(app))
+app.pool_events = PoolEventsWorker(app)
+app.amqp.register_worker(app.pool_events)
+get_server_worker = GetServerWorker(app)
+app.amqp.register_worker(get_server_worker)
+app.amqp.register_worker(AllocateMatchWorker(app))
 app.amqp.register_worker(RegisterServerWorker(app))
 app.amqp.register_worker(UpdateServerWorker(app))
+app.amqp.register_worker(UnregisterServerWorker(app))
+app.amqp.register_worker(ReportServerWorker(app))
+
+
+# Startup and graceful shutdown of the workers
+@app.listener('before_server_start')
+async def start_app_services(app_inner, loop):
+    await start_services(app_inner, loop)
+
+
+@app.listener('before_server_stop')
+async def drain_amqp_workers(app_inner, _loop):
+    await drain_workers(app_inner, app_inner.config["SHUTDOWN_DRAIN_TIMEOUT"])
+
 
 # Public API
+from app.game_servers.views import (  # NOQA
+    allocation_stats, export_pool, pool_snapshot, pool_summary, RetrieveServerView
+)
+
+
 async def health_check(request):
     return text('OK')
 
 
 app.add_route(health_check, '/game-servers-pool/api/health-check',
               methods=['GET', ], name='health-check')
+app.add_route(pool_snapshot, '/game-servers-pool/api/snapshot',
+              methods=['GET', ], name='snapshot')
+app.add_route(pool_summary, '/game-servers-pool/api/summary',
+              methods=['GET', ], name='summary')
+app.add_route(allocation_stats, '/game-servers-pool/api/stats',
+              methods=['GET', ], name='stats')
+app.add_route(export_pool, '/game-servers-pool/api/admin/export',
+              methods=['GET', ], name='export')
+app.add_route(RetrieveServerView.as_view(get_server_worker),
+              '/game-servers-pool/api/servers/retrieve', name='retrieve-server')
@@ -0,0 +1,51 @@
+import os
+from functools import partial
+
+from sanic_script import Command, Option
+
+from app import app
+from app.workers.supervisor import (
+    ConsumerSupervisor, get_process_plan, run_consumer, select_workers
+)
+
+
+class ConsumeCommand(Command):
+    """
+    Run the AMQP workers in a supervised pool of processes, without the HTTP server.
+    """
+    app = app
+
+    option_list = (
+        Option('--queues', '-q', dest='queues'),
+        Option('--processes', '-n', dest='processes', type=int),
+        Option('--pin-cpus', dest='pin_cpus', action='store_true', default=False),
+        Option('--max-pool-size', dest='max_pool_size', type=int),
+    )
+
+    def get_groups(self, queues=None, processes=None):
+        # Queues given in the command line take precedence over the configured groups
+        if queues or processes or not self.app.config["CONSUMER_GROUPS"]:
+            queue_names = [name.strip() for name in (queues or '').split(',') if name.strip()]
+            return [(queue_names, processes or self.app.config["CONSUMER_PROCESSES"])]
+        return self.app.config["CONSUMER_GROUPS"]
+
+    def run(self, *args, **kwargs):
+        groups = self.get_groups(kwargs.get('queues', None), kwargs.get('processes', None))
+        # Unknown queue names are reported before any process is started
+        for queue_names, _processes in groups:
+            select_workers(self.app.amqp.workers, queue_names)
+
+        cpus = None
+        pin_cpus = kwargs.get('pin_cpus', False) or self.app.config["CONSUMER_PIN_CPUS"]
+        if pin_cpus and hasattr(os, 'sched_getaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))
+        max_pool_size = kwargs.get('max_pool_size', None)
+        max_pool_size = max_pool_size or self.app.config["CONSUMER_MONGODB_MAX_POOL_SIZE"]
+
+        supervisor = ConsumerSupervisor(
+            partial(run_consumer, self.app, max_pool_size=max_pool_size),
+            get_process_plan(groups, cpus),
+            restart_delay=self.app.config["CONSUMER_RESTART_DELAY"],
+            max_restart_delay=self.app.config["CONSUMER_MAX_RESTART_DELAY"]
+        )
+        supervisor.run()
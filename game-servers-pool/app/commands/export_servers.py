@@ -0,0 +1,53 @@
+import asyncio
+import sys
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from sanic_script import Command, Option
+
+from app import app
+from app.game_servers.documents import GameServer
+from app.game_servers.export import export_game_servers
+from app.game_servers.storage import MongoGameServerStorage
+
+
+class ExportServersCommand(Command):
+    """
+    Export game servers from MongoDB as NDJSON.
+    """
+    app = app
+
+    option_list = (
+        Option('--game-mode', '-g', dest='game_mode'),
+        Option('--min-slots', dest='min_slots', type=int),
+        Option('--max-slots', dest='max_slots', type=int),
+        Option('--output', '-o', dest='output'),
+    )
+
+    async def export(self, filters, output):
+        client = AsyncIOMotorClient(self.app.config["MONGODB_URI"])
+        self.app.config["LAZY_UMONGO"].init(client[self.app.config["MONGODB_DATABASE"]])
+
+        storage = MongoGameServerStorage(GameServer)
+        batch_size = self.app.config["EXPORT_BATCH_SIZE"]
+        try:
+            async for line in export_game_servers(storage, filters, batch_size):
+                output.write(line)
+        finally:
+            client.close()
+
+    def run(self, *args, **kwargs):
+        filters = {
+            'game_mode': kwargs.get('game_mode', None),
+            'min_slots': kwargs.get('min_slots', None),
+            'max_slots': kwargs.get('max_slots', None),
+        }
+        path = kwargs.get('output', None)
+        output = open(path, 'w') if path else sys.stdout
+
+        loop = asyncio.get_event_loop()
+        try:
+            loop.run_until_complete(self.export(filters, output))
+        finally:
+            if path:
+                output.close()
+            loop.close()
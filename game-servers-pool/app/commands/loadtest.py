@@ -0,0 +1,48 @@
+import asyncio
+import json
+import random
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from sanic_script import Command, Option
+
+from app import app
+from app.game_servers.documents import GameServer
+
+
+class LoadTestCommand(Command):
+    """
+    Replay matchmaking traffic against a running instance and report latencies.
+    """
+    app = app
+
+    option_list = (
+        Option('--rate', '-r', dest='rate', type=float, default=100.0),
+        Option('--duration', '-d', dest='duration', type=float, default=30.0),
+        Option('--mix', '-m', dest='mix', default='1:8:4'),
+        Option('--servers', dest='servers', type=int, default=10),
+        Option('--slots', dest='slots', type=int, default=100),
+        Option('--max-required-slots', dest='max_required_slots', type=int, default=4),
+        Option('--timeout', dest='timeout', type=float, default=5.0),
+        Option('--seed', dest='seed', type=int, default=None),
+    )
+
+    async def loadtest(self, **options):
+        from benchmarks.loadtest import LoadTest
+
+        client = AsyncIOMotorClient(self.app.config["MONGODB_URI"])
+        self.app.config["LAZY_UMONGO"].init(client[self.app.config["MONGODB_DATABASE"]])
+        try:
+            return await LoadTest(self.app, GameServer, **options).run()
+        finally:
+            client.close()
+
+    def run(self, *args, **kwargs):
+        random.seed(kwargs.pop('seed', None))
+        options = {key: value for key, value in kwargs.items() if value is not None}
+
+        loop = asyncio.get_event_loop()
+        try:
+            report = loop.run_until_complete(self.loadtest(**options))
+        finally:
+            loop.close()
+        print(json.dumps(report, indent=2))
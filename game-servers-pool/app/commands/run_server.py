@@ -1,8 +1,7 @@
-import asyncio
 from sanic_script import Command, Option
 
 from app import app
-from app.workers.microservice_register import MicroserviceRegisterWorker
+from app.workers.startup import create_primary_flag
 
 
 class RunServerCommand(Command):
@@ -16,15 +15,17 @@ class RunServerCommand(Command):
         Option('--port', '-p', dest='port'),
     )
 
-    def register_microservice(self):
-        loop = asyncio.get_event_loop()
-        worker = MicroserviceRegisterWorker(self.app)
-        loop.run_until_complete(worker.run(loop=loop))
-        loop.stop()
-        loop.close()
-
     def run(self, *args, **kwargs):
-        self.register_microservice()
+        if not self.app.config["APP_CONSUMERS_ENABLED"]:
+            # Requests are consumed by the processes of the `consume` command, while
+            # workers without a queue, like the publisher of pool events, are kept.
+            # The capacity of the pool is tracked by the primary consumer process
+            self.app.amqp.workers[:] = [
+                worker for worker in self.app.amqp.workers if not hasattr(worker, 'QUEUE_NAME')
+            ]
+            self.app.pool_events.tracks_capacity = False
+        if self.app.config["APP_WORKERS"] > 1:
+            self.app.primary_flag = create_primary_flag()
         self.app.run(
             host=kwargs.get('host', None) or self.app.config["APP_HOST"],
             port=kwargs.get('port', None) or self.app.config["APP_PORT"],
@@ -1,6 +1,5 @@
 import os
 
-import pytest
 from sanic_script import Command, Option
 
 from app import app
@@ -23,6 +22,10 @@ class RunTestsCommand(Command):
         os.environ.setdefault('COV_CORE_DATAFILE', '.coverage.eager')
 
     def run(self, *args, **kwargs):
+        # Development dependencies are imported only by the commands using them,
+        # so that the other commands start faster and work without them
+        import pytest
+
         app = kwargs.get('application')
         self.setup_environ_for_pytest_cov()
         pytest.main(args=["-q", "-v", "--cov", app, "--cov-report",
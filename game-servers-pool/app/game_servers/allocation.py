@@ -0,0 +1,55 @@
+import hashlib
+import hmac
+
+from app.game_servers.regions import get_regions_order
+
+
+def get_allocation_attempts(constraints, region_fallbacks=None, region_fallback_to_any=True):
+    regions = get_regions_order(
+        constraints.get('regions', None),
+        constraints.get('ping', None),
+        region_fallbacks,
+        region_fallback_to_any
+    )
+
+    # Servers with all of the preferred tags are tried first in each region
+    required_tags = constraints.get('required-tags', [])
+    preferred_tags = [
+        tag for tag in constraints.get('preferred-tags', []) if tag not in required_tags
+    ]
+    tag_sets = [required_tags + preferred_tags, required_tags]
+    return [
+        (region, tags)
+        for region in regions
+        for tags in (tag_sets if preferred_tags else tag_sets[1:])
+    ]
+
+
+async def allocate_server(storage, required_slots, constraints, region_fallbacks=None,
+                          region_fallback_to_any=True):
+    attempts = get_allocation_attempts(constraints, region_fallbacks, region_fallback_to_any)
+    for region, tags in attempts:
+        document = await storage.allocate(
+            constraints['game-mode'], required_slots, region=region, tags=tags
+        )
+        if document:
+            return document
+    return None
+
+
+def get_party_key(secret, server_id):
+    """
+    Derives the key of the game server from the secret of the pool, which
+    is given to the server when it registers.
+    """
+    message = str(server_id).encode('utf-8')
+    return hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def get_party_token(key, match_id, index, slots):
+    """
+    Signs the party slots with the key of the game server, so that the
+    game server can check the token by computing it once again.
+    """
+    message = '{}:{}:{}'.format(match_id, index, slots).encode('utf-8')
+    return hmac.new(key.encode('utf-8'), message, hashlib.sha256).hexdigest()
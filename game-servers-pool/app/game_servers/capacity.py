@@ -0,0 +1,90 @@
+from app.game_servers.pool_store import PoolStore
+
+
+CAPACITY_LOW = 'capacity-low'
+CAPACITY_HIGH = 'capacity-high'
+
+
+class CapacityTracker(object):
+    """
+    Incrementally maintained amount of free slots per game mode.
+
+    Events are emitted only when the free slots cross a watermark that
+    wasn't crossed before: after the "capacity low" event the next one
+    can be only "capacity high", and vice versa.
+    """
+
+    def __init__(self, watermarks=None):
+        self.watermarks = watermarks or {}
+        self.servers = PoolStore()
+        self.free_slots = {}
+        self.states = {}
+
+    def load(self, documents):
+        self.servers.clear()
+        self.free_slots.clear()
+        for document in documents:
+            self._add(str(document['id']), document['game_mode'], document['available_slots'])
+        return self._check_all(set(self.free_slots.keys()) | set(self.watermarks.keys()))
+
+    def load_store(self, store):
+        # Used to start from a snapshot of the pool, which is caught up later
+        self.servers = store
+        self.free_slots = {
+            game_mode: sum(store.slots[row] for row in store.game_mode_rows[game_mode_id])
+            for game_mode_id, game_mode in enumerate(store.game_modes.values)
+            if game_mode_id < len(store.game_mode_rows) and store.game_mode_rows[game_mode_id]
+        }
+        return self._check_all(set(self.free_slots.keys()) | set(self.watermarks.keys()))
+
+    def update_server(self, server_id, game_mode, available_slots):
+        game_modes = {game_mode, }
+        previous = self._remove(server_id)
+        if previous:
+            game_modes.add(previous[0])
+        self._add(server_id, game_mode, available_slots)
+        return self._check_all(game_modes)
+
+    def remove_server(self, server_id):
+        previous = self._remove(server_id)
+        return self._check_all({previous[0], }) if previous else []
+
+    def _add(self, server_id, game_mode, available_slots):
+        self.servers.add(server_id, game_mode, available_slots)
+        self.free_slots[game_mode] = self.free_slots.get(game_mode, 0) + available_slots
+
+    def _remove(self, server_id):
+        previous = self.servers.remove(server_id)
+        if previous:
+            game_mode, available_slots = previous
+            self.free_slots[game_mode] -= available_slots
+            if not self.free_slots[game_mode] and game_mode not in self.watermarks:
+                del self.free_slots[game_mode]
+        return previous
+
+    def _check_all(self, game_modes):
+        events = [self.check(game_mode) for game_mode in sorted(game_modes)]
+        return [event for event in events if event]
+
+    def check(self, game_mode):
+        if game_mode not in self.watermarks:
+            return None
+
+        low, high = self.watermarks[game_mode]
+        free_slots = self.free_slots.get(game_mode, 0)
+        state = self.states.get(game_mode, None)
+        if free_slots <= low and state != CAPACITY_LOW:
+            state = CAPACITY_LOW
+        elif free_slots >= high and state != CAPACITY_HIGH:
+            state = CAPACITY_HIGH
+        else:
+            return None
+
+        self.states[game_mode] = state
+        return {
+            'type': state,
+            'game-mode': game_mode,
+            'free-slots': free_slots,
+            'low-watermark': low,
+            'high-watermark': high,
+        }
@@ -0,0 +1,52 @@
+import time
+
+
+class ResumeTokenStore(object):
+    """
+    Keeps the resume token of the pool changes stream.
+
+    Tokens are always kept in memory, so that the stream can be reopened
+    after a failure without reloading the pool. When a MongoDB collection
+    is set, the token is also written there no more often than once per
+    `save_interval` seconds, so that a restarted process continues from it.
+    Changes carry absolute values, so replaying a few of them after
+    a restart is harmless.
+    """
+
+    def __init__(self, key, collection=None, save_interval=1, clock=time.monotonic):
+        self.key = key
+        self.collection = collection
+        self.save_interval = save_interval
+        self.clock = clock
+        self.token = None
+        self.saved_token = None
+        self.saved_at = None
+
+    async def load(self):
+        if self.collection is not None:
+            document = await self.collection.find_one({'_id': self.key})
+            self.token = self.saved_token = document['token'] if document else None
+        return self.token
+
+    async def save(self, token):
+        self.token = token
+        if self.collection is None:
+            return
+
+        now = self.clock()
+        if self.saved_at is not None and now - self.saved_at < (self.save_interval or 0):
+            return
+
+        self.saved_at = now
+        await self.write(token)
+
+    async def write(self, token):
+        self.saved_token = token
+        await self.collection.replace_one(
+            {'_id': self.key}, {'_id': self.key, 'token': token}, upsert=True
+        )
+
+    async def flush(self):
+        # Writes the latest token that was skipped due to the save interval
+        if self.collection is not None and self.token != self.saved_token:
+            await self.write(self.token)
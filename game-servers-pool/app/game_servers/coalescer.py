@@ -0,0 +1,75 @@
+import asyncio
+from collections import Counter
+
+
+class AllocationCoalescer(object):
+    """
+    Gathers allocation requests with the same constraints that arrive
+    within `window` seconds and places them with a single call of the
+    storage. A batch is sent earlier when it reaches `max_batch_size`.
+
+    Exposes the same `allocate` method as storages, so it can be used
+    in place of them.
+    """
+
+    def __init__(self, storage, window=0.002, max_batch_size=32):
+        self.storage = storage
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.batches = {}
+        self.batch_sizes = Counter()
+
+    async def allocate(self, game_mode, required_slots, region=None, tags=None):
+        loop = asyncio.get_event_loop()
+        key = (game_mode, region, tuple(tags or ()))
+        future = loop.create_future()
+
+        batch = self.batches.get(key, None)
+        if batch is None:
+            batch = self.batches[key] = []
+            loop.call_later(self.window, self.flush, key, batch)
+        batch.append((required_slots, future))
+
+        if len(batch) >= self.max_batch_size:
+            self.flush(key, batch)
+        return await future
+
+    def flush(self, key, batch):
+        # The timer of a batch that was sent due to its size is ignored
+        if self.batches.get(key, None) is not batch:
+            return
+
+        del self.batches[key]
+        self.batch_sizes[len(batch)] += 1
+        asyncio.ensure_future(self.allocate_batch(key, batch))
+
+    def flush_all(self):
+        for key, batch in list(self.batches.items()):
+            self.flush(key, batch)
+
+    async def allocate_batch(self, key, batch):
+        game_mode, region, tags = key
+        try:
+            documents = await self.storage.allocate_many(
+                game_mode, [slots for slots, _future in batch], region=region, tags=list(tags)
+            )
+        except Exception as exc:
+            for _slots, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_slots, future), document in zip(batch, documents):
+            if not future.done():
+                future.set_result(document)
+
+    def get_stats(self):
+        return {
+            'window-ms': self.window * 1000.0,
+            'max-batch-size': self.max_batch_size,
+            'batches': sum(self.batch_sizes.values()),
+            'requests': sum(size * count for size, count in self.batch_sizes.items()),
+            'batch-sizes': {
+                str(size): count for size, count in sorted(self.batch_sizes.items())
+            },
+        }
@@ -1,5 +1,5 @@
 from umongo import Document
-from umongo.fields import StringField, IntegerField, DictField
+from umongo.fields import StringField, IntegerField, DictField, ListField, DateTimeField
 
 from app import app
 
@@ -14,3 +14,21 @@ class GameServer(Document):
     available_slots = IntegerField(allow_none=False, required=True)
     credentials = DictField(allow_none=False, required=False, default={})
     game_mode = StringField(allow_none=False, required=True)
+    region = StringField(allow_none=False, required=False)
+    tags = ListField(StringField(), allow_none=False, required=False)
+    # Averaged utilization reported by the server, see `LoadEstimator`
+    telemetry = DictField(allow_none=False, required=False)
+    # Ids of the latest batched allocations applied to the server, kept by the storage
+    allocation_batches = ListField(StringField(), allow_none=False, required=False)
+    # Set by the storage on each change of slots, so that caches can catch up
+    last_modified = DateTimeField(allow_none=False, required=False)
+    # Incremented by the storage on each change of the server, so that consumers
+    # of the changes can drop the ones older than the state they already have
+    version = IntegerField(allow_none=False, required=False)
+
+    class Meta:
+        indexes = [
+            ('game_mode', 'region', 'available_slots'),
+            ('game_mode', 'tags', 'available_slots'),
+            'last_modified',
+        ]
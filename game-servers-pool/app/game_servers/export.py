@@ -0,0 +1,13 @@
+import json
+
+
+async def export_game_servers(storage, filters, batch_size=1000):
+    """
+    Yields game servers as NDJSON lines without credentials.
+
+    Documents are fetched lazily in batches, so that only one batch
+    is kept in memory and the consumer controls the pace of reading.
+    """
+    async for document in storage.servers(filters, batch_size=batch_size):
+        document['id'] = str(document['id'])
+        yield json.dumps(document, default=str) + '\n'
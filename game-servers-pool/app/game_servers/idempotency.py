@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from pymongo.errors import PyMongoError
+
+
+def get_idempotency_key(envelope, properties):
+    """
+    Returns the idempotency key of a request delivered by RabbitMQ and
+    whether the response saved for it can be replayed, or `(None, False)`
+    when the request can't be told apart from others.
+    """
+    if properties.message_id:
+        return properties.message_id, True
+    elif properties.reply_to and properties.correlation_id:
+        # Clients may reuse the same reply queue and correlation id for
+        # different requests, so this pair is replayed only for messages
+        # that were redelivered by RabbitMQ
+        idempotency_key = '{}:{}'.format(properties.reply_to, properties.correlation_id)
+        return idempotency_key, envelope.is_redeliver
+    return None, False
+
+
+class IdempotencyCache(object):
+    """
+    Bounded LRU cache of responses with a time-to-live.
+
+    When a MongoDB collection is set, responses are also written there,
+    so that they survive restarts of the process and are shared between
+    instances of the microservice. Reads and writes of the collection are
+    limited by `timeout_ms`, and when they fail the local cache is used alone.
+    """
+
+    def __init__(self, max_size=10000, ttl=300, collection=None, clock=time.monotonic,
+                 timeout_ms=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.collection = collection
+        self.clock = clock
+        self.timeout_ms = timeout_ms
+        self.entries = OrderedDict()
+        self.pending = {}
+
+    async def init_collection(self, collection):
+        self.collection = collection
+        await self.collection.create_index('created_at', expireAfterSeconds=self.ttl)
+
+    async def with_timeout(self, awaitable):
+        if not self.timeout_ms:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, self.timeout_ms / 1000.0)
+
+    def get_local(self, key):
+        entry = self.entries.get(key, None)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    def set_local(self, key, value):
+        self.entries[key] = (self.clock() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def get(self, key):
+        value = self.get_local(key)
+        if value is None and self.collection is not None:
+            # TTL indexes are cleaned up by MongoDB once per minute,
+            # so expired documents must be filtered out explicitly
+            try:
+                document = await self.with_timeout(self.collection.find_one(
+                    {
+                        '_id': key,
+                        'created_at': {'$gt': datetime.utcnow() - timedelta(seconds=self.ttl)}
+                    },
+                    max_time_ms=self.timeout_ms
+                ))
+            except (PyMongoError, asyncio.TimeoutError) as exc:
+                print("Can't read the idempotency cache: {!r}".format(exc))
+                document = None
+            if document:
+                value = document['value']
+                self.set_local(key, value)
+        return value
+
+    async def set(self, key, value):
+        self.set_local(key, value)
+        if self.collection is not None:
+            try:
+                await self.with_timeout(self.collection.replace_one(
+                    {'_id': key},
+                    {'_id': key, 'value': value, 'created_at': datetime.utcnow()},
+                    upsert=True
+                ))
+            except (PyMongoError, asyncio.TimeoutError) as exc:
+                print("Can't write the idempotency cache: {!r}".format(exc))
+
+    async def get_or_create(self, key, factory):
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        # Duplicates that arrive while the original is still in progress
+        # wait for its result instead of calling the factory once more
+        pending = self.pending.get(key, None)
+        if pending is not None:
+            value = await asyncio.shield(pending)
+            return value if value is not None else await self.get_or_create(key, factory)
+
+        future = asyncio.get_event_loop().create_future()
+        self.pending[key] = future
+        try:
+            value = await factory()
+            await self.set(key, value)
+        finally:
+            del self.pending[key]
+            future.set_result(value)
+        return value
@@ -0,0 +1,198 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from uuid import uuid4
+
+from bson import json_util
+
+from app.game_servers.pool_store import PoolStore
+
+
+SNAPSHOT_MAGIC = b'GSPS'
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct('<4sII')
+KEY_SIZE = 12
+EMPTY_KEY = bytes(KEY_SIZE)
+COLUMNS = (
+    'host_ids', 'ports', 'slots', 'game_mode_ids', 'region_ids', 'tag_masks',
+    'headrooms', 'headrooms_expire_at', 'positions'
+)
+INTERNERS = ('hosts', 'game_modes', 'regions', 'tags')
+ROWS_TYPECODE = 'I'
+
+
+def dump_snapshot(store, state=None):
+    """
+    Serializes the pool store into the snapshot format: a header, the JSON
+    metadata with interned values and offsets, then raw bytes of the columns.
+
+    Object ids are packed into a single column of 12 bytes per row, other
+    ids and free rows are listed in the metadata.
+    """
+    other_keys, free_rows = {}, []
+    for row, key in enumerate(store.keys):
+        if key is None:
+            free_rows.append(row)
+        elif not isinstance(key, bytes):
+            other_keys[row] = key
+    keys = b''.join(key if isinstance(key, bytes) else EMPTY_KEY for key in store.keys)
+
+    blocks = [('keys', keys)]
+    blocks.extend((name, getattr(store, name).tobytes()) for name in COLUMNS)
+    blocks.append(('game_mode_rows', b''.join(rows.tobytes() for rows in store.game_mode_rows)))
+
+    offset, offsets = 0, {}
+    for name, content in blocks:
+        offsets[name] = [offset, len(content)]
+        offset += len(content)
+
+    metadata = {
+        'byteorder': sys.byteorder,
+        'rows': len(store.keys),
+        'offsets': offsets,
+        'typecodes': {
+            name: [getattr(store, name).typecode, getattr(store, name).itemsize]
+            for name in COLUMNS
+        },
+        'other_keys': other_keys,
+        'free_rows': free_rows,
+        'game_mode_sizes': [len(rows) for rows in store.game_mode_rows],
+        'interned': {name: getattr(store, name).values for name in INTERNERS},
+        'state': state or {},
+    }
+    metadata = json_util.dumps(metadata).encode('utf-8')
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(metadata))
+    return b''.join([header, metadata] + [content for _name, content in blocks])
+
+
+def write_snapshot(path, content):
+    # The temporary file is unique to the writer and is flushed to disk before
+    # it replaces the previous snapshot, which stays complete until then
+    temporary_path = '{}.{}.{}.tmp'.format(path, os.getpid(), uuid4().hex)
+    try:
+        with open(temporary_path, 'wb') as snapshot:
+            snapshot.write(content)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def is_valid_metadata(metadata, size):
+    """
+    Checks that all blocks listed in the metadata are within the `size`
+    bytes following it and match the amount of rows.
+    """
+    rows = metadata['rows']
+    if not isinstance(rows, int) or rows < 0:
+        return False
+
+    offsets = metadata['offsets']
+    for name in ('keys', 'game_mode_rows') + COLUMNS:
+        offset, length = offsets[name]
+        if not isinstance(offset, int) or not isinstance(length, int):
+            return False
+        if offset < 0 or length < 0 or offset + length > size:
+            return False
+
+    if offsets['keys'][1] != rows * KEY_SIZE:
+        return False
+    for name in COLUMNS:
+        if offsets[name][1] != rows * metadata['typecodes'][name][1]:
+            return False
+
+    game_mode_sizes = metadata['game_mode_sizes']
+    if len(game_mode_sizes) > len(metadata['interned']['game_modes']):
+        return False
+    if any(not isinstance(item, int) or item < 0 for item in game_mode_sizes):
+        return False
+    if offsets['game_mode_rows'][1] != sum(game_mode_sizes) * array(ROWS_TYPECODE).itemsize:
+        return False
+
+    listed_rows = list(metadata['free_rows']) + [int(row) for row in metadata['other_keys']]
+    return all(0 <= row < rows for row in listed_rows)
+
+
+def load_columns(store, content, metadata):
+    offsets = metadata['offsets']
+
+    def get_block(name):
+        offset, length = offsets[name]
+        return content[offset:offset + length]
+
+    for name in COLUMNS:
+        getattr(store, name).frombytes(get_block(name))
+
+    keys = get_block('keys')
+    store.keys = [
+        bytes(keys[row * KEY_SIZE:(row + 1) * KEY_SIZE]) for row in range(metadata['rows'])
+    ]
+    for row, key in metadata['other_keys'].items():
+        store.keys[int(row)] = key
+    for row in metadata['free_rows']:
+        store.keys[row] = None
+    store.free_rows = list(metadata['free_rows'])
+    store.rows = {key: row for row, key in enumerate(store.keys) if key is not None}
+
+    rows = array(ROWS_TYPECODE)
+    rows.frombytes(get_block('game_mode_rows'))
+    start = 0
+    for size in metadata['game_mode_sizes']:
+        store.game_mode_rows.append(rows[start:start + size])
+        start += size
+
+
+def read_snapshot(path):
+    """
+    Maps the snapshot file and returns the pool store with the state saved
+    along with it, or `(None, None)` when the snapshot is missing, doesn't
+    fit the file or can't be read on this platform.
+    """
+    if not os.path.exists(path):
+        return None, None
+
+    with open(path, 'rb') as snapshot:
+        if os.fstat(snapshot.fileno()).st_size < HEADER.size:
+            return None, None
+
+        with mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, metadata_size = HEADER.unpack_from(mapped, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None, None
+            if HEADER.size + metadata_size > len(mapped):
+                return None, None
+
+            metadata = json_util.loads(
+                mapped[HEADER.size:HEADER.size + metadata_size].decode('utf-8')
+            )
+            store = PoolStore()
+            typecodes = {
+                name: [getattr(store, name).typecode, getattr(store, name).itemsize]
+                for name in COLUMNS
+            }
+            if metadata['byteorder'] != sys.byteorder or metadata['typecodes'] != typecodes:
+                return None, None
+            if not is_valid_metadata(metadata, len(mapped) - HEADER.size - metadata_size):
+                return None, None
+
+            for name in INTERNERS:
+                for value in metadata['interned'][name]:
+                    getattr(store, name).get_id(value)
+
+            # Columns are copied out of the mapped file, the memory view
+            # is released before the file is unmapped
+            content = memoryview(mapped)[HEADER.size + metadata_size:]
+            try:
+                load_columns(store, content, metadata)
+            finally:
+                content.release()
+
+    # Rows listed per game mode must be rows of the store
+    if any(rows and max(rows) >= metadata['rows'] for rows in store.game_mode_rows):
+        return None, None
+    return store, metadata['state']
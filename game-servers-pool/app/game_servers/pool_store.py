@@ -0,0 +1,207 @@
+from array import array
+
+from bson import ObjectId
+
+
+def get_key(server_id):
+    # Object ids are kept as their 12 bytes instead of ObjectId instances
+    # or 24-character strings
+    if isinstance(server_id, ObjectId):
+        return server_id.binary
+    if isinstance(server_id, str) and ObjectId.is_valid(server_id):
+        return ObjectId(server_id).binary
+    return server_id
+
+
+def get_server_id(key):
+    return str(ObjectId(key)) if isinstance(key, bytes) else key
+
+
+def get_object_id(key):
+    return ObjectId(key) if isinstance(key, bytes) else key
+
+
+class Interner(object):
+    """
+    Maps repeated values, like hosts and game modes, to small integers.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def get_id(self, value):
+        value_id = self.ids.get(value, None)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def find_id(self, value):
+        return self.ids.get(value, None)
+
+    def clear(self):
+        self.values.clear()
+        self.ids.clear()
+
+
+class PoolStore(object):
+    """
+    Memory-compact representation of the pool for in-process caches.
+
+    Instead of a document per server, fields are kept in typed arrays
+    indexed by rows: hosts and game modes are interned into small integers,
+    ports and slots are machine integers. Rows of removed servers are
+    reused. Each game mode keeps an array of its rows, so candidates of
+    a mode are scanned without touching servers of other modes.
+
+    Tags are kept as a bit mask, where only the first 64 distinct tags
+    get a bit. Ids are returned as strings.
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self.keys = []
+        self.free_rows = []
+        self.hosts = Interner()
+        self.game_modes = Interner()
+        self.regions = Interner()
+        self.tags = Interner()
+        self.host_ids = array('I')
+        self.ports = array('I')
+        self.slots = array('q')
+        self.game_mode_ids = array('I')
+        self.region_ids = array('I')
+        self.tag_masks = array('Q')
+        # Headrooms estimated from the telemetry and the time until they're valid
+        self.headrooms = array('d')
+        self.headrooms_expire_at = array('d')
+        # Rows of each game mode and the position of each row there,
+        # so that a row is removed from its game mode in O(1)
+        self.game_mode_rows = []
+        self.positions = array('I')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, server_id):
+        return get_key(server_id) in self.rows
+
+    def clear(self):
+        self.__init__()
+
+    def get_tag_mask(self, tags):
+        mask = 0
+        for tag in tags:
+            tag_id = self.tags.get_id(tag)
+            if tag_id < 64:
+                mask |= 1 << tag_id
+        return mask
+
+    def add(self, server_id, game_mode, available_slots, host=None, port=0, region=None,
+            tags=()):
+        key = get_key(server_id)
+        row = self.rows.get(key, None)
+        if row is not None:
+            self._unlink(row)
+        elif self.free_rows:
+            row = self.free_rows.pop()
+            self.keys[row] = key
+        else:
+            row = len(self.keys)
+            self.keys.append(key)
+            self.host_ids.append(0)
+            self.ports.append(0)
+            self.slots.append(0)
+            self.game_mode_ids.append(0)
+            self.region_ids.append(0)
+            self.tag_masks.append(0)
+            self.headrooms.append(0)
+            self.headrooms_expire_at.append(0)
+            self.positions.append(0)
+        self.rows[key] = row
+
+        self.host_ids[row] = self.hosts.get_id(host)
+        self.ports[row] = port
+        self.slots[row] = available_slots
+        self.region_ids[row] = self.regions.get_id(region)
+        self.tag_masks[row] = self.get_tag_mask(tags)
+        self.headrooms[row] = 0
+        self.headrooms_expire_at[row] = 0
+        self._link(row, self.game_modes.get_id(game_mode))
+
+    def remove(self, server_id):
+        row = self.rows.pop(get_key(server_id), None)
+        if row is None:
+            return None
+
+        previous = (self.game_modes.values[self.game_mode_ids[row]], self.slots[row])
+        self._unlink(row)
+        self.keys[row] = None
+        self.free_rows.append(row)
+        return previous
+
+    def get(self, server_id):
+        row = self.rows.get(get_key(server_id), None)
+        if row is None:
+            return None
+        return {
+            'id': get_server_id(self.keys[row]),
+            'host': self.hosts.values[self.host_ids[row]],
+            'port': self.ports[row],
+            'game_mode': self.game_modes.values[self.game_mode_ids[row]],
+            'region': self.regions.values[self.region_ids[row]],
+            'available_slots': self.slots[row],
+        }
+
+    def get_object_id(self, row):
+        return get_object_id(self.keys[row])
+
+    def get_row(self, server_id):
+        return self.rows.get(get_key(server_id), None)
+
+    def get_game_mode(self, server_id):
+        return self.game_modes.values[self.game_mode_ids[self.rows[get_key(server_id)]]]
+
+    def get_slots(self, server_id):
+        return self.slots[self.rows[get_key(server_id)]]
+
+    def add_slots(self, server_id, delta):
+        row = self.rows[get_key(server_id)]
+        self.slots[row] += delta
+        return self.slots[row]
+
+    def set_headroom(self, server_id, headroom, expire_at):
+        row = self.rows[get_key(server_id)]
+        self.headrooms[row] = headroom
+        self.headrooms_expire_at[row] = expire_at
+
+    def candidates(self, game_mode, required_slots):
+        game_mode_id = self.game_modes.find_id(game_mode)
+        if game_mode_id is None:
+            return
+
+        slots, keys = self.slots, self.keys
+        for row in self.game_mode_rows[game_mode_id]:
+            if slots[row] >= required_slots:
+                yield get_server_id(keys[row])
+
+    def _link(self, row, game_mode_id):
+        while len(self.game_mode_rows) <= game_mode_id:
+            self.game_mode_rows.append(array('I'))
+        rows = self.game_mode_rows[game_mode_id]
+        self.game_mode_ids[row] = game_mode_id
+        self.positions[row] = len(rows)
+        rows.append(row)
+
+    def _unlink(self, row):
+        # The last row of the game mode takes the place of the removed one
+        rows = self.game_mode_rows[self.game_mode_ids[row]]
+        position = self.positions[row]
+        last = rows.pop()
+        if last != row:
+            rows[position] = last
+            self.positions[last] = position
@@ -0,0 +1,28 @@
+ANY_REGION = None
+
+
+def get_regions_order(regions=None, ping=None, fallbacks=None, fallback_to_any=True):
+    """
+    Returns regions in the order in which they are tried for an allocation.
+
+    Regions with ping hints go first, from the lowest latency, then the
+    rest of the player regions, then their fallbacks. `ANY_REGION` stands
+    for a server in any region and is always tried when there are no hints.
+    """
+    ping = ping or {}
+    fallbacks = fallbacks or {}
+
+    primary = []
+    for region in sorted(ping.keys(), key=lambda name: (ping[name], name)) + list(regions or []):
+        if region not in primary:
+            primary.append(region)
+
+    order = list(primary)
+    for region in primary:
+        for fallback in fallbacks.get(region, []):
+            if fallback not in order:
+                order.append(fallback)
+
+    if fallback_to_any or not order:
+        order.append(ANY_REGION)
+    return order
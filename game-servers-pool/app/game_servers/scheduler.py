@@ -0,0 +1,209 @@
+import asyncio
+import json
+import time
+from collections import Counter, deque
+
+
+HIGH_PRIORITY = 'high'
+LOW_PRIORITY = 'low'
+DEFAULT_FLOW = 'default'
+
+
+def get_game_mode(raw_data):
+    try:
+        data = json.loads(raw_data)
+    except (ValueError, TypeError):
+        return DEFAULT_FLOW
+
+    game_mode = data.get('game-mode', None) if isinstance(data, dict) else None
+    return game_mode if game_mode and isinstance(game_mode, str) else DEFAULT_FLOW
+
+
+class FairQueue(object):
+    """
+    Waiting requests of one lane, split into flows that are served with
+    the deficit round-robin. On its turn a flow may start as many requests
+    as its weight (1 by default), then the next flow goes.
+    """
+
+    def __init__(self, weights=None):
+        self.weights = dict(weights or {})
+        self.flows = {}
+        self.active = deque()
+        self.deficits = {}
+        self.current = None
+
+    def append(self, flow, waiter, enqueued_at):
+        waiters = self.flows.get(flow, None)
+        if waiters is None:
+            waiters = self.flows[flow] = deque()
+            self.active.append(flow)
+            self.deficits[flow] = 0
+        waiters.append((waiter, enqueued_at))
+
+    def get_waiters(self, flow):
+        waiters = self.flows[flow]
+        # Requests cancelled while waiting are dropped
+        while waiters and waiters[0][0].done():
+            waiters.popleft()
+        return waiters
+
+    def pop(self):
+        while self.active:
+            flow = self.active[0]
+            waiters = self.get_waiters(flow)
+            if not waiters:
+                self.active.popleft()
+                del self.flows[flow]
+                del self.deficits[flow]
+                self.current = None
+                continue
+
+            if self.current != flow:
+                self.current = flow
+                self.deficits[flow] += self.weights.get(flow, 1)
+            if self.deficits[flow] >= 1:
+                self.deficits[flow] -= 1
+                waiter, enqueued_at = waiters.popleft()
+                return flow, waiter, enqueued_at
+
+            self.active.rotate(-1)
+            self.current = None
+        return None
+
+    def is_empty(self):
+        return not any(self.get_waiters(flow) for flow in list(self.flows))
+
+    def get_waiting(self, now):
+        waiting = {}
+        for flow in self.flows:
+            waiters = [item for item in self.flows[flow] if not item[0].done()]
+            if waiters:
+                waiting[flow] = (len(waiters), now - waiters[0][1])
+        return waiting
+
+
+class WeightedScheduler(object):
+    """
+    Limits the amount of requests handled at once and decides which of
+    the waiting requests is started next.
+
+    Requests wait in lanes. Whenever a slot is freed, the next request is
+    taken from a lane picked with the smooth weighted round-robin, so under
+    load each lane gets a share of the slots proportional to its weight:
+    the high priority lane goes first, while the low priority one still
+    makes progress. Within a lane, flows such as game modes are served
+    fairly according to `flow_weights`, see `FairQueue`.
+    """
+
+    def __init__(self, weights, concurrency=32, flow_weights=None, clock=time.monotonic):
+        self.weights = dict(weights)
+        self.concurrency = concurrency
+        self.clock = clock
+        self.running = 0
+        self.lanes = {lane: FairQueue(flow_weights) for lane in self.weights}
+        self.credits = {lane: 0 for lane in self.weights}
+        self.dispatched = Counter()
+        self.waited = Counter()
+        self.pending = 0
+        self.drained = None
+
+    async def submit(self, lane, func, *args, flow=DEFAULT_FLOW):
+        self.pending += 1
+        try:
+            await self.acquire(lane, flow)
+            try:
+                return await func(*args)
+            finally:
+                self.release()
+        finally:
+            self.pending -= 1
+            if not self.pending and self.drained is not None:
+                self.drained.set()
+
+    async def join(self, timeout=None):
+        """
+        Waits until the submitted requests, including the waiting ones, are
+        handled. Returns False when some of them are left after `timeout`.
+        """
+        # Lets the tasks created for the latest deliveries submit their requests
+        await asyncio.sleep(0)
+        if not self.pending:
+            return True
+
+        self.drained = asyncio.Event()
+        try:
+            await asyncio.wait_for(self.drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.drained = None
+        return True
+
+    async def acquire(self, lane, flow=DEFAULT_FLOW):
+        if self.running < self.concurrency and not self.get_waiting_lanes():
+            self.start(lane, flow, 0)
+            return
+
+        waiter = asyncio.get_event_loop().create_future()
+        self.lanes[lane].append(flow, waiter, self.clock())
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot was already given to the cancelled request
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.running -= 1
+        self.dispatch()
+
+    def start(self, lane, flow, waited):
+        self.running += 1
+        self.dispatched[lane, flow] += 1
+        self.waited[lane, flow] += waited
+
+    def get_waiting_lanes(self):
+        return [lane for lane, queue in self.lanes.items() if not queue.is_empty()]
+
+    def dispatch(self):
+        while self.running < self.concurrency:
+            waiting = self.get_waiting_lanes()
+            if not waiting:
+                return
+
+            for lane in waiting:
+                self.credits[lane] += self.weights[lane]
+            lane = max(waiting, key=self.credits.get)
+            self.credits[lane] -= sum(self.weights[name] for name in waiting)
+
+            flow, waiter, enqueued_at = self.lanes[lane].pop()
+            self.start(lane, flow, self.clock() - enqueued_at)
+            waiter.set_result(None)
+
+    def get_stats(self):
+        now = self.clock()
+        lanes = {}
+        for lane, queue in self.lanes.items():
+            waiting = queue.get_waiting(now)
+            flows = {flow for name, flow in self.dispatched if name == lane}
+            flows.update(waiting)
+
+            lanes[lane] = {
+                'waiting': sum(count for count, _oldest in waiting.values()),
+                'dispatched': sum(self.dispatched[lane, flow] for flow in flows),
+                'flows': {},
+            }
+            for flow in sorted(flows):
+                count, oldest = waiting.get(flow, (0, 0))
+                dispatched = self.dispatched[lane, flow]
+                lanes[lane]['flows'][flow] = {
+                    'waiting': count,
+                    'dispatched': dispatched,
+                    'average-wait-ms': (
+                        self.waited[lane, flow] * 1000.0 / dispatched if dispatched else 0
+                    ),
+                    'oldest-wait-ms': oldest * 1000.0,
+                }
+        return {'concurrency': self.concurrency, 'running': self.running, 'lanes': lanes}
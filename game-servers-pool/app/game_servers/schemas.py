@@ -7,7 +7,53 @@ from app import app
 GameServer = app.config["LAZY_UMONGO"].GameServer
 
 
-class RequestGetServerSchema(Schema):
+class AllocationConstraintsSchema(Schema):
+    game_mode = fields.String(
+        attribute="game-mode",
+        load_from="game-mode",
+        required=True,
+        allow_none=False,
+        validate=[
+            validate.Length(min=1, error='Field cannot be blank.'),
+        ]
+    )
+    regions = fields.List(
+        fields.String(validate=[validate.Length(min=1, error='Field cannot be blank.')]),
+        required=False,
+        allow_none=False
+    )
+    ping = fields.Dict(
+        required=False,
+        allow_none=False
+    )
+    required_tags = fields.List(
+        fields.String(validate=[validate.Length(min=1, error='Field cannot be blank.')]),
+        attribute="required-tags",
+        load_from="required-tags",
+        required=False,
+        allow_none=False
+    )
+    preferred_tags = fields.List(
+        fields.String(validate=[validate.Length(min=1, error='Field cannot be blank.')]),
+        attribute="preferred-tags",
+        load_from="preferred-tags",
+        required=False,
+        allow_none=False
+    )
+
+    @validates('ping')
+    def validate_ping(self, value):
+        for region, latency in value.items():
+            if not isinstance(latency, (int, float)) or isinstance(latency, bool) or latency < 0:
+                raise ValidationError(
+                    "Ping to '{}' must be a non-negative number.".format(region)
+                )
+
+    class Meta:
+        ordered = True
+
+
+class RequestGetServerSchema(AllocationConstraintsSchema):
     required_slots = fields.Integer(
         attribute="required-slots",
         load_from="required-slots",
@@ -17,13 +63,20 @@ class RequestGetServerSchema(Schema):
             validate.Range(min=0, error="Field must have a positive value."),
         ]
     )
-    game_mode = fields.String(
-        attribute="game-mode",
-        load_from="game-mode",
+
+    class Meta:
+        ordered = True
+
+
+class RequestMatchSchema(AllocationConstraintsSchema):
+    parties = fields.List(
+        fields.Integer(
+            validate=[validate.Range(min=1, error="The value must be positive integer.")]
+        ),
         required=True,
         allow_none=False,
         validate=[
-            validate.Length(min=1, error='Field cannot be blank.'),
+            validate.Length(min=1, error="At least one party is required."),
         ]
     )
 
@@ -80,6 +133,18 @@ class RegisterGameServerSchema(Schema):
         required=False,
         missing={}
     )
+    region = fields.String(
+        required=False,
+        allow_none=False,
+        validate=[
+            validate.Length(min=1, error='Field cannot be blank.'),
+        ]
+    )
+    tags = fields.List(
+        fields.String(validate=[validate.Length(min=1, error='Field cannot be blank.')]),
+        required=False,
+        allow_none=False
+    )
 
     @validates('id')
     def validate_id(self, value):
@@ -99,6 +164,8 @@ class RegisterGameServerSchema(Schema):
             'available_slots',
             'credentials',
             'game_mode',
+            'region',
+            'tags',
         )
 
 
@@ -132,6 +199,104 @@ class UpdateGameServerSchema(Schema):
         )
 
 
+class ReportGameServerSchema(Schema):
+    id = fields.String(
+        required=True
+    )
+    cpu = fields.Float(
+        required=True,
+        allow_none=False,
+        validate=[
+            validate.Range(min=0, error="Field must have a positive value."),
+        ]
+    )
+    memory = fields.Float(
+        required=True,
+        allow_none=False,
+        validate=[
+            validate.Range(min=0, error="Field must have a positive value."),
+        ]
+    )
+    tick_time = fields.Float(
+        load_from="tick-time",
+        required=True,
+        allow_none=False,
+        validate=[
+            validate.Range(min=0, error="Field must have a positive value."),
+        ]
+    )
+    tick_budget = fields.Float(
+        load_from="tick-budget",
+        required=False,
+        allow_none=False,
+        validate=[
+            validate.Range(min=1, error="The value must be greater or equal to 1."),
+        ]
+    )
+
+    @validates('id')
+    def validate_id(self, value):
+        if not ObjectId.is_valid(value):
+            raise ValidationError(
+                "'{}' is not a valid ObjectId, it must be a 12-byte "
+                "input or a 24-character hex string.".format(value)
+            )
+
+    class Meta:
+        ordered = True
+
+
+class UnregisterGameServerSchema(Schema):
+    id = fields.String(
+        required=True
+    )
+
+    @validates('id')
+    def validate_id(self, value):
+        if not ObjectId.is_valid(value):
+            raise ValidationError(
+                "'{}' is not a valid ObjectId, it must be a 12-byte "
+                "input or a 24-character hex string.".format(value)
+            )
+
+    class Meta:
+        model = GameServer
+        ordered = True
+        fields = (
+            'id',
+        )
+
+
+class ExportGameServersSchema(Schema):
+    game_mode = fields.String(
+        load_from="game-mode",
+        required=False,
+        allow_none=False,
+        validate=[
+            validate.Length(min=1, error='Field cannot be blank.'),
+        ]
+    )
+    min_slots = fields.Integer(
+        load_from="min-slots",
+        required=False,
+        allow_none=False,
+        validate=[
+            validate.Range(min=0, error="Field must have a positive value."),
+        ]
+    )
+    max_slots = fields.Integer(
+        load_from="max-slots",
+        required=False,
+        allow_none=False,
+        validate=[
+            validate.Range(min=0, error="Field must have a positive value."),
+        ]
+    )
+
+    class Meta:
+        ordered = True
+
+
 class SimpleGameServerSchema(Schema):
     id = fields.String(
         dump_only=True
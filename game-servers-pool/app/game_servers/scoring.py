@@ -0,0 +1,144 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from app.game_servers.regions import ANY_REGION
+
+
+MAX_TAG_BITS = 64
+
+
+def get_column(values, rows):
+    return numpy.frombuffer(values, dtype=values.typecode)[rows]
+
+
+class CandidateScorer(object):
+    """
+    Picks the best server of a game mode by scoring all of its candidates
+    over the columns of a pool store.
+
+    The score of a server with enough free slots is
+
+        load_weight * headroom - fit_weight * part of slots left unused
+        - penalty of its region + sum of preferences of its tags
+
+    so that, at the same load, the fullest fitting servers are filled
+    first (best fit). Overloaded servers aren't candidates, as with
+    the `LoadEstimator`, whose headroom settings are used.
+
+    With NumPy installed the candidates are scored in a single pass over
+    the columns, otherwise in a Python loop, which gives the same scores.
+    """
+
+    def __init__(self, estimator, fit_weight=1.0, load_weight=1.0, region_penalties=None,
+                 tag_preferences=None, use_numpy=None):
+        if use_numpy and numpy is None:
+            raise ValueError("NumPy isn't installed.")
+
+        self.estimator = estimator
+        self.fit_weight = fit_weight
+        self.load_weight = load_weight
+        self.region_penalties = region_penalties or {}
+        self.tag_preferences = tag_preferences or {}
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+
+    def get_region_penalties(self, store):
+        return [self.region_penalties.get(region, 0.0) for region in store.regions.values]
+
+    def get_tag_preferences(self, store):
+        preferences = []
+        for tag, preference in self.tag_preferences.items():
+            tag_id = store.tags.find_id(tag)
+            if tag_id is not None and tag_id < MAX_TAG_BITS:
+                preferences.append((1 << tag_id, preference))
+        return preferences
+
+    def choose(self, store, game_mode, required_slots, region=ANY_REGION, rows=None):
+        """
+        Returns the row of the best server, or `None` when there is no
+        candidate. Candidates can be narrowed to an array of `rows`.
+        """
+        game_mode_id = store.game_modes.find_id(game_mode)
+        if game_mode_id is None:
+            return None
+
+        region_id = None
+        if region is not ANY_REGION:
+            region_id = store.regions.find_id(region)
+            if region_id is None:
+                return None
+
+        if rows is None:
+            rows = store.game_mode_rows[game_mode_id]
+        if not rows:
+            return None
+
+        if self.use_numpy:
+            return self.choose_vectorized(store, required_slots, region_id, rows)
+        return self.choose_iteratively(store, required_slots, region_id, rows)
+
+    def choose_vectorized(self, store, required_slots, region_id, rows):
+        rows = numpy.frombuffer(rows, dtype=rows.typecode)
+        slots = get_column(store.slots, rows)
+        region_ids = get_column(store.region_ids, rows)
+
+        fresh = get_column(store.headrooms_expire_at, rows) > self.estimator.clock()
+        headrooms = numpy.where(
+            fresh, get_column(store.headrooms, rows), self.estimator.default_headroom
+        )
+        matches = (slots >= required_slots) & ~(
+            fresh & (headrooms < self.estimator.min_headroom)
+        )
+        if region_id is not None:
+            matches &= region_ids == region_id
+        if not matches.any():
+            return None
+
+        scores = self.load_weight * headrooms - self.fit_weight * (
+            (slots - required_slots) / numpy.maximum(slots, 1)
+        )
+        scores -= numpy.array(self.get_region_penalties(store))[region_ids]
+        tag_preferences = self.get_tag_preferences(store)
+        if tag_preferences:
+            tag_masks = get_column(store.tag_masks, rows)
+            for bit, preference in tag_preferences:
+                scores += preference * ((tag_masks & numpy.uint64(bit)) != 0)
+
+        scores[~matches] = -numpy.inf
+        return int(rows[numpy.argmax(scores)])
+
+    def choose_iteratively(self, store, required_slots, region_id, rows):
+        now = self.estimator.clock()
+        default_headroom = self.estimator.default_headroom
+        min_headroom = self.estimator.min_headroom
+        region_penalties = self.get_region_penalties(store)
+        tag_preferences = self.get_tag_preferences(store)
+        slots, region_ids, tag_masks = store.slots, store.region_ids, store.tag_masks
+        headrooms, headrooms_expire_at = store.headrooms, store.headrooms_expire_at
+
+        best_row, best_score = None, None
+        for row in rows:
+            available_slots = slots[row]
+            if available_slots < required_slots:
+                continue
+            if region_id is not None and region_ids[row] != region_id:
+                continue
+
+            headroom = default_headroom
+            if headrooms_expire_at[row] > now:
+                headroom = headrooms[row]
+                if headroom < min_headroom:
+                    continue
+
+            score = self.load_weight * headroom - self.fit_weight * (
+                (available_slots - required_slots) / max(available_slots, 1)
+            )
+            score -= region_penalties[region_ids[row]]
+            for bit, preference in tag_preferences:
+                if tag_masks[row] & bit:
+                    score += preference
+
+            if best_score is None or score > best_score:
+                best_row, best_score = row, score
+        return best_row
@@ -0,0 +1,7 @@
+from app.game_servers.storage.base import (  # NOQA
+    BaseGameServerStorage, StorageTimeoutError, TIMEOUT_ERROR,
+    CHANGE_UPDATE, CHANGE_DELETE, CHANGE_INVALIDATE
+)
+from app.game_servers.storage.extension import StorageExtension  # NOQA
+from app.game_servers.storage.memory import InMemoryGameServerStorage  # NOQA
+from app.game_servers.storage.mongodb import MongoGameServerStorage  # NOQA
@@ -0,0 +1,88 @@
+TIMEOUT_ERROR = "TimeoutError"
+
+CHANGE_UPDATE = 'update'
+CHANGE_DELETE = 'delete'
+CHANGE_INVALIDATE = 'invalidate'
+
+
+class StorageTimeoutError(Exception):
+    """
+    Raised when the storage didn't complete an operation in time.
+    """
+
+    def __init__(self, message="The storage didn't respond in time."):
+        super(StorageTimeoutError, self).__init__(message)
+
+
+class BaseGameServerStorage(object):
+    """
+    Base class for storages of the game servers pool.
+
+    Documents returned by storages are plain dictionaries with the `id`
+    key instead of `_id` and the rest of fields named as in the
+    `GameServer` document.
+
+    Each change of a server increments its `version`, which is returned by
+    `register`, `allocate`, `free` and `evict` along with the changed server.
+    """
+
+    async def init(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def register(self, server_id, data):
+        raise NotImplementedError('`register(server_id, data)` method must be implemented.')
+
+    async def allocate(self, game_mode, required_slots, region=None, tags=None):
+        raise NotImplementedError(
+            '`allocate(game_mode, required_slots, region=None, tags=None)` '
+            'method must be implemented.'
+        )
+
+    async def allocate_many(self, game_mode, slots, region=None, tags=None):
+        """
+        Allocates slots for several requests at once and returns
+        the allocated servers (or `None`) in the order of the requests.
+        """
+        documents = []
+        for required_slots in slots:
+            document = await self.allocate(game_mode, required_slots, region=region, tags=tags)
+            documents.append(document)
+        return documents
+
+    async def free(self, server_id, freed_slots):
+        raise NotImplementedError('`free(server_id, freed_slots)` method must be implemented.')
+
+    async def report(self, server_id, metrics):
+        raise NotImplementedError('`report(server_id, metrics)` method must be implemented.')
+
+    async def evict(self, server_id):
+        raise NotImplementedError('`evict(server_id)` method must be implemented.')
+
+    async def summarize(self, game_mode=None):
+        raise NotImplementedError('`summarize(game_mode=None)` method must be implemented.')
+
+    def servers(self, filters=None, batch_size=1000):
+        raise NotImplementedError(
+            '`servers(filters=None, batch_size=1000)` method must be implemented.'
+        )
+
+    async def get_operation_time(self):
+        """
+        Returns the current position in the changes of the pool, from which
+        `changes(start_at=...)` yields the changes made after it, or `None`
+        when it isn't known.
+        """
+        raise NotImplementedError('`get_operation_time()` method must be implemented.')
+
+    def changes(self, resume_token=None, start_at=None):
+        """
+        Yields changes of the pool made by any process. Each change is a
+        dictionary with the `token`, `operation` and `id` keys, and also the
+        `game_mode` and `available_slots` keys for the "update" operation.
+        """
+        raise NotImplementedError(
+            '`changes(resume_token=None, start_at=None)` method must be implemented.'
+        )
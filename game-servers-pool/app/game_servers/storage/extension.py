@@ -0,0 +1,78 @@
+from sage_utils.extension import BaseExtension
+
+from app.game_servers.scoring import CandidateScorer
+from app.game_servers.storage.memory import InMemoryGameServerStorage
+from app.game_servers.storage.mongodb import get_write_concern, MongoGameServerStorage
+from app.game_servers.telemetry import LoadEstimator
+
+
+class StorageExtension(BaseExtension):
+    extension_name = app_attribute = 'storage'
+
+    def create_estimator(self, app):
+        return LoadEstimator(
+            half_life=app.config["TELEMETRY_HALF_LIFE"],
+            tick_budget=app.config["TELEMETRY_TICK_BUDGET"],
+            min_headroom=app.config["TELEMETRY_MIN_HEADROOM"],
+            stale_after=app.config["TELEMETRY_STALE_AFTER"],
+            default_headroom=app.config["TELEMETRY_DEFAULT_HEADROOM"],
+            sample_size=app.config["TELEMETRY_SAMPLE_SIZE"]
+        )
+
+    def create_scorer(self, app, estimator):
+        if not app.config["ALLOCATION_SCORING_ENABLED"]:
+            return None
+        # NumPy is optional, the scorer falls back to plain Python without it
+        scorer = CandidateScorer(
+            estimator,
+            fit_weight=app.config["ALLOCATION_FIT_WEIGHT"],
+            load_weight=app.config["ALLOCATION_LOAD_WEIGHT"],
+            region_penalties=app.config["ALLOCATION_REGION_PENALTIES"],
+            tag_preferences=app.config["ALLOCATION_TAG_PREFERENCES"],
+            use_numpy=None
+        )
+        print("Allocations are scored with {}.".format(
+            'NumPy' if scorer.use_numpy else 'plain Python, install NumPy for faster scoring'
+        ))
+        return scorer
+
+    def create_storage(self, app):
+        backend = app.config["STORAGE_BACKEND"]
+        if backend == 'mongodb':
+            from app.game_servers.documents import GameServer
+            timeout_ms = app.config["MONGODB_WRITE_CONCERN_TIMEOUT_MS"]
+            return MongoGameServerStorage(
+                GameServer,
+                operation_timeout_ms=app.config["MONGODB_OPERATION_TIMEOUT_MS"],
+                allocation_write_concern=get_write_concern(
+                    app.config["MONGODB_ALLOCATION_WRITE_CONCERN"], timeout_ms
+                ),
+                registration_write_concern=get_write_concern(
+                    app.config["MONGODB_REGISTRATION_WRITE_CONCERN"], timeout_ms
+                ),
+                estimator=self.create_estimator(app)
+            )
+        elif backend == 'memory':
+            # The pool of the memory storage isn't shared between processes,
+            # so there are no changes of other processes to watch
+            if app.config["CHANGE_STREAM_ENABLED"]:
+                raise ValueError(
+                    "Change streams are supported only by the 'mongodb' storage backend."
+                )
+            estimator = self.create_estimator(app)
+            return InMemoryGameServerStorage(
+                snapshot_path=app.config["STORAGE_SNAPSHOT_PATH"],
+                snapshot_interval=app.config["STORAGE_SNAPSHOT_INTERVAL"],
+                estimator=estimator,
+                scorer=self.create_scorer(app, estimator)
+            )
+        raise ValueError("Unknown storage backend '{}'.".format(backend))
+
+    def init_app(self, app, *args, **kwargs):
+        # The storage is initialized on start together with other services,
+        # see `app.workers.startup.start_services`
+        setattr(app, self.app_attribute, self.create_storage(app))
+
+        @app.listener('after_server_stop')
+        async def storage_free_resources(app_inner, _loop):
+            await getattr(app_inner, self.app_attribute).close()
@@ -0,0 +1,364 @@
+import asyncio
+import json
+import os
+import random
+from array import array
+from copy import deepcopy
+
+from bson import ObjectId
+
+from app.game_servers.pool_snapshot import write_snapshot
+from app.game_servers.pool_store import PoolStore
+from app.game_servers.storage.base import BaseGameServerStorage
+from app.game_servers.telemetry import LoadEstimator
+
+
+# Random servers checked before walking the index for a sample
+SAMPLE_PROBES = 16
+
+
+def matches_filters(document, filters):
+    if filters.get('game_mode', None) and document['game_mode'] != filters['game_mode']:
+        return False
+    if filters.get('min_slots', None) is not None and \
+            document['available_slots'] < filters['min_slots']:
+        return False
+    if filters.get('max_slots', None) is not None and \
+            document['available_slots'] > filters['max_slots']:
+        return False
+    return True
+
+
+class IdentifiersSet(object):
+    """
+    Set with O(1) insertion, removal and random choice.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+
+        last_item = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last_item
+            self.positions[last_item] = position
+
+
+class InMemoryGameServerStorage(BaseGameServerStorage):
+    """
+    Storage that keeps the pool in memory of a single process.
+
+    When the snapshot path is specified, the pool is loaded from it on
+    start and saved there periodically and on stop.
+
+    When the scorer is specified, servers are also kept in a pool store
+    and allocations pick the server with the best score instead of
+    the random sample of the estimator.
+    """
+
+    def __init__(self, snapshot_path=None, snapshot_interval=None, estimator=None, scorer=None):
+        self.estimator = estimator or LoadEstimator()
+        self.scorer = scorer
+        self.pool = PoolStore() if scorer else None
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.documents = {}
+        self.game_modes = {}
+        self.tags = {}
+        # Servers with free slots per game mode and per game mode and region,
+        # which allocations sample without reading the whole pool
+        self.free_servers = {}
+        self.free_regions = {}
+        # One counter for all servers keeps versions of a registered
+        # again server growing as well
+        self.last_version = 0
+        self._snapshot_task = None
+
+    def _next_version(self):
+        self.last_version += 1
+        return self.last_version
+
+    def _add(self, document):
+        self.documents[document['id']] = document
+        self.game_modes.setdefault(document['game_mode'], set()).add(document['id'])
+        self._update_free(document)
+        for tag in document.get('tags', ()):
+            self.tags.setdefault((document['game_mode'], tag), set()).add(document['id'])
+        if self.pool is not None:
+            self.pool.add(
+                document['id'],
+                document['game_mode'],
+                document['available_slots'],
+                region=document.get('region', None),
+                tags=document.get('tags', ())
+            )
+            self._set_headroom(document)
+
+    def _set_headroom(self, document):
+        telemetry = document.get('telemetry', None)
+        if self.pool is not None and telemetry:
+            expire_at = telemetry['reported_at'] + self.estimator.stale_after
+            self.pool.set_headroom(document['id'], telemetry['headroom'], expire_at)
+
+    def _discard(self, index, key, server_id):
+        server_ids = index[key]
+        server_ids.discard(server_id)
+        if not server_ids:
+            del index[key]
+
+    def _update_free(self, document, removed=False):
+        region_key = (document['game_mode'], document.get('region', None))
+        for index, key in ((self.free_servers, document['game_mode']),
+                           (self.free_regions, region_key)):
+            if document['available_slots'] > 0 and not removed:
+                index.setdefault(key, IdentifiersSet()).add(document['id'])
+            elif key in index:
+                self._discard(index, key, document['id'])
+
+    def _remove(self, server_id):
+        document = self.documents.pop(server_id, None)
+        if document:
+            self._discard(self.game_modes, document['game_mode'], server_id)
+            self._update_free(document, removed=True)
+            for tag in document.get('tags', ()):
+                self._discard(self.tags, (document['game_mode'], tag), server_id)
+            if self.pool is not None:
+                self.pool.remove(server_id)
+        return document
+
+    def copy_documents(self):
+        # Nested values are replaced rather than changed in place,
+        # so shallow copies keep the current state
+        documents = []
+        for document in self.documents.values():
+            document = dict(document)
+            document['id'] = str(document['id'])
+            documents.append(document)
+        return documents
+
+    def dump_snapshot(self, documents):
+        return json.dumps({'servers': documents}).encode('utf-8')
+
+    def write_snapshot(self, documents):
+        write_snapshot(self.snapshot_path, self.dump_snapshot(documents))
+
+    def load_snapshot(self):
+        with open(self.snapshot_path) as snapshot:
+            content = json.load(snapshot)
+
+        self.documents.clear()
+        self.game_modes.clear()
+        self.tags.clear()
+        self.free_servers.clear()
+        self.free_regions.clear()
+        if self.pool is not None:
+            self.pool.clear()
+        for document in content['servers']:
+            document['id'] = ObjectId(document['id'])
+            self._add(document)
+        self.last_version = max(
+            [document.get('version', 0) for document in self.documents.values()], default=0
+        )
+
+    async def save_snapshot(self):
+        # Documents are copied on the event loop to get a consistent state,
+        # while serializing and writing to disk are moved to a thread
+        documents = self.copy_documents()
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.write_snapshot, documents)
+
+    async def save_snapshot_periodically(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            await self.save_snapshot()
+
+    async def init(self):
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            self.load_snapshot()
+
+        if self.snapshot_path and self.snapshot_interval:
+            self._snapshot_task = asyncio.ensure_future(self.save_snapshot_periodically())
+
+    async def close(self):
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+
+        if self.snapshot_path:
+            await self.save_snapshot()
+
+    async def register(self, server_id, data):
+        self._remove(server_id)
+        document = deepcopy(data)
+        document['id'] = server_id
+        document['version'] = self._next_version()
+        self._add(document)
+        return {'id': server_id, 'version': document['version']}
+
+    def score(self, game_mode, required_slots, region=None, tags=None):
+        rows = None
+        if tags:
+            # Tags are filtered through the indexes, the rest is done by the scorer
+            indexes = [self.tags.get((game_mode, tag), set()) for tag in tags]
+            indexes.sort(key=len)
+            rows = array('I', [
+                self.pool.get_row(server_id)
+                for server_id in indexes[0].intersection(*indexes[1:])
+            ])
+
+        row = self.scorer.choose(self.pool, game_mode, required_slots, region=region, rows=rows)
+        if row is None:
+            return None
+        return self.documents[self.pool.get_object_id(row)]
+
+    def _get_candidate(self, server_id, required_slots, indexes):
+        if not all(server_id in index for index in indexes):
+            return None
+        document = self.documents[server_id]
+        if document['available_slots'] < required_slots:
+            return None
+        if self.estimator.is_overloaded(document.get('telemetry', None)):
+            return None
+        return document
+
+    def sample(self, game_mode, required_slots, region=None, tags=None):
+        if region is None:
+            free_server_ids = self.free_servers.get(game_mode, None)
+        else:
+            free_server_ids = self.free_regions.get((game_mode, region), None)
+        if not free_server_ids:
+            return None
+
+        # Servers are picked from the smallest index and checked against the rest
+        indexes = [free_server_ids] + [self.tags.get((game_mode, tag), set()) for tag in tags or ()]
+        indexes.sort(key=len)
+        server_ids = indexes[0].items if indexes[0] is free_server_ids else list(indexes[0])
+        if not server_ids:
+            return None
+
+        # Random servers are probed first, then the index is walked from
+        # a random position until the sample is collected
+        sample_size = self.estimator.sample_size
+        sampled = {}
+        for _ in range(SAMPLE_PROBES):
+            document = self._get_candidate(random.choice(server_ids), required_slots, indexes[1:])
+            if document:
+                sampled[document['id']] = document
+                if len(sampled) >= sample_size:
+                    return self.estimator.choose(list(sampled.values()))
+
+        start = random.randrange(len(server_ids))
+        for position in range(len(server_ids)):
+            server_id = server_ids[(start + position) % len(server_ids)]
+            document = self._get_candidate(server_id, required_slots, indexes[1:])
+            if document:
+                sampled[document['id']] = document
+                if len(sampled) >= sample_size:
+                    break
+
+        if not sampled:
+            return None
+        return self.estimator.choose(list(sampled.values()))
+
+    async def allocate(self, game_mode, required_slots, region=None, tags=None):
+        choose = self.score if self.scorer else self.sample
+        document = choose(game_mode, required_slots, region=region, tags=tags)
+        if not document:
+            return None
+
+        document['available_slots'] -= required_slots
+        document['version'] = self._next_version()
+        self._update_free(document)
+        if self.pool is not None:
+            self.pool.add_slots(document['id'], -required_slots)
+        document = deepcopy(document)
+        document.pop('telemetry', None)
+        return document
+
+    async def free(self, server_id, freed_slots):
+        document = self.documents.get(server_id, None)
+        if not document:
+            return None
+
+        document['available_slots'] += freed_slots
+        document['version'] = self._next_version()
+        self._update_free(document)
+        if self.pool is not None:
+            self.pool.add_slots(server_id, freed_slots)
+        return {
+            'id': server_id,
+            'game_mode': document['game_mode'],
+            'available_slots': document['available_slots'],
+            'version': document['version'],
+        }
+
+    async def report(self, server_id, metrics):
+        document = self.documents.get(server_id, None)
+        if not document:
+            return None
+
+        document['telemetry'] = self.estimator.update(document.get('telemetry', None), metrics)
+        self._set_headroom(document)
+        return {
+            'id': server_id,
+            'game_mode': document['game_mode'],
+            'telemetry': dict(document['telemetry']),
+        }
+
+    async def evict(self, server_id):
+        document = self._remove(server_id)
+        if not document:
+            return None
+        return {
+            'id': server_id,
+            'game_mode': document['game_mode'],
+            'version': self._next_version(),
+        }
+
+    async def summarize(self, game_mode=None):
+        game_modes = [game_mode] if game_mode else list(self.game_modes.keys())
+        summary = {}
+        for name in game_modes:
+            server_ids = self.game_modes.get(name, ())
+            if server_ids:
+                summary[name] = {
+                    'servers': len(server_ids),
+                    'available_slots': sum(
+                        self.documents[server_id]['available_slots'] for server_id in server_ids
+                    ),
+                }
+        return summary
+
+    async def servers(self, filters=None, batch_size=1000):
+        filters = filters or {}
+        if filters.get('game_mode', None):
+            server_ids = list(self.game_modes.get(filters['game_mode'], ()))
+        else:
+            server_ids = list(self.documents.keys())
+
+        # Documents can be changed or removed while the consumer is awaiting,
+        # so they are looked up and copied right before being yielded
+        for index, server_id in enumerate(server_ids):
+            document = self.documents.get(server_id, None)
+            if document and matches_filters(document, filters):
+                document = {key: value for key, value in document.items() if key != 'credentials'}
+                yield deepcopy(document)
+
+            if index % batch_size == batch_size - 1:
+                await asyncio.sleep(0)
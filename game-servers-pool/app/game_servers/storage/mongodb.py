@@ -0,0 +1,391 @@
+from datetime import datetime
+from functools import wraps
+from uuid import uuid4
+
+from pymongo import ReturnDocument, UpdateOne, WriteConcern
+from pymongo.errors import ConnectionFailure, ExceededMaxWaiters, ExecutionTimeout, WTimeoutError
+
+from app.game_servers.storage.base import (
+    BaseGameServerStorage, StorageTimeoutError, CHANGE_UPDATE, CHANGE_DELETE, CHANGE_INVALIDATE
+)
+from app.game_servers.telemetry import LoadEstimator
+
+
+ALLOCATE_ATTEMPTS = 3
+REPORT_ATTEMPTS = 3
+# Amount of the latest batches kept in a document for checking whether
+# the batched update was applied to it
+ALLOCATION_BATCHES_KEPT = 16
+ALLOCATE_PROJECTION = {
+    'host': True,
+    'port': True,
+    'credentials': True,
+    'game_mode': True,
+    'available_slots': True,
+    'region': True,
+    'telemetry': True,
+    'version': True,
+}
+
+
+# Waiting for a free connection of the pool longer than `waitQueueTimeoutMS`
+# and failed server selection are reported as connection failures
+TIMEOUT_EXCEPTIONS = (ConnectionFailure, ExceededMaxWaiters, ExecutionTimeout, WTimeoutError)
+
+
+def get_write_concern(value, timeout_ms=None):
+    if not value:
+        return None
+    value = str(value)
+    return WriteConcern(w=int(value) if value.isdigit() else value, wtimeout=timeout_ms)
+
+
+def with_deadline(method):
+
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await method(*args, **kwargs)
+        except TIMEOUT_EXCEPTIONS as exc:
+            raise StorageTimeoutError() from exc
+
+    return wrapper
+
+
+def get_change(change):
+    operation_type = change['operationType']
+    if operation_type in ('insert', 'replace', 'update'):
+        document = change.get('fullDocument', None)
+        # The server was removed before the update was looked up,
+        # so the following "delete" event will take care of it
+        if document is None:
+            return None
+        return {
+            'token': change['_id'],
+            'operation': CHANGE_UPDATE,
+            'id': document['_id'],
+            'game_mode': document['game_mode'],
+            'available_slots': document['available_slots'],
+        }
+    elif operation_type == 'delete':
+        return {
+            'token': change['_id'],
+            'operation': CHANGE_DELETE,
+            'id': change['documentKey']['_id'],
+        }
+    elif operation_type == 'invalidate':
+        return {'token': change['_id'], 'operation': CHANGE_INVALIDATE, 'id': None}
+    return None
+
+
+def get_servers_query(filters):
+    query = {}
+    if filters.get('game_mode', None):
+        query['game_mode'] = filters['game_mode']
+
+    available_slots = {}
+    if filters.get('min_slots', None) is not None:
+        available_slots['$gte'] = filters['min_slots']
+    if filters.get('max_slots', None) is not None:
+        available_slots['$lte'] = filters['max_slots']
+    if available_slots:
+        query['available_slots'] = available_slots
+
+    if filters.get('modified_since', None) is not None:
+        query['last_modified'] = {'$gte': filters['modified_since']}
+
+    return query
+
+
+class MongoGameServerStorage(BaseGameServerStorage):
+
+    def __init__(self, document, operation_timeout_ms=None, allocation_write_concern=None,
+                 registration_write_concern=None, estimator=None):
+        self.document = document
+        self.estimator = estimator or LoadEstimator()
+        self.operation_timeout_ms = operation_timeout_ms
+        self.allocation_write_concern = allocation_write_concern
+        self.registration_write_concern = registration_write_concern
+
+    @property
+    def collection(self):
+        return self.document.collection
+
+    def get_collection(self, write_concern=None):
+        collection = self.collection
+        if write_concern is not None:
+            collection = collection.with_options(write_concern=write_concern)
+        return collection
+
+    def get_deadline(self):
+        return {'maxTimeMS': self.operation_timeout_ms} if self.operation_timeout_ms else {}
+
+    async def init(self):
+        await self.document.ensure_indexes()
+
+    @with_deadline
+    async def register(self, server_id, data):
+        # Building the umongo document validates the data and fills defaults
+        document = self.document(**dict(data, last_modified=datetime.utcnow()))
+        document.required_validate()
+        fields = document.to_mongo()
+        # The document is replaced field by field, so that the version of
+        # a registered again server keeps growing
+        update = {'$set': fields, '$inc': {'version': 1}}
+        missing = {
+            name: '' for name in self.document.schema.fields
+            if name not in fields and name not in ('id', 'version')
+        }
+        if missing:
+            update['$unset'] = missing
+        collection = self.get_collection(self.registration_write_concern)
+        document = await collection.find_one_and_update(
+            {'_id': server_id},
+            update,
+            projection={'version': True},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            **self.get_deadline()
+        )
+        return {'id': server_id, 'version': document['version']}
+
+    def get_allocation_pipeline(self, game_mode, required_slots, sample_size, region=None,
+                                tags=None):
+        conditions = [
+            {'available_slots': {'$gte': required_slots}},
+            {"game_mode": game_mode},
+            {'telemetry.overloaded_until': {'$not': {'$gt': self.estimator.clock()}}},
+        ]
+        if region is not None:
+            conditions.append({'region': region})
+        if tags:
+            conditions.append({'tags': {'$all': list(tags)}})
+
+        return [
+            {'$match': {'$and': conditions}},
+            {'$sample': {'size': sample_size}},
+            {'$project': ALLOCATE_PROJECTION},
+        ]
+
+    @with_deadline
+    async def allocate(self, game_mode, required_slots, region=None, tags=None):
+        sample_size = self.estimator.sample_size
+        pipeline = self.get_allocation_pipeline(
+            game_mode, required_slots, sample_size, region=region, tags=tags
+        )
+        collection = self.get_collection(self.allocation_write_concern)
+        for _attempt in range(ALLOCATE_ATTEMPTS):
+            cursor = collection.aggregate(pipeline, **self.get_deadline())
+            result = await cursor.to_list(sample_size)
+            if not result:
+                return None
+
+            # The sampled servers could be taken by concurrent requests, so the
+            # slots are decremented only when they are still available
+            for document in self.estimator.rank(result):
+                updated = await collection.find_one_and_update(
+                    {'_id': document['_id'], 'available_slots': {'$gte': required_slots}},
+                    {
+                        '$inc': {'available_slots': -required_slots, 'version': 1},
+                        '$set': {'last_modified': datetime.utcnow()},
+                    },
+                    projection={'available_slots': True, 'version': True},
+                    return_document=ReturnDocument.AFTER,
+                    **self.get_deadline()
+                )
+                if updated:
+                    document.pop('telemetry', None)
+                    document['id'] = document.pop('_id')
+                    document['available_slots'] = updated['available_slots']
+                    document['version'] = updated['version']
+                    return document
+        return None
+
+    @with_deadline
+    async def allocate_many(self, game_mode, slots, region=None, tags=None):
+        if len(slots) == 1:
+            return [await self.allocate(game_mode, slots[0], region=region, tags=tags)]
+
+        sample_size = self.estimator.sample_size * len(slots)
+        pipeline = self.get_allocation_pipeline(
+            game_mode, min(slots), sample_size, region=region, tags=tags
+        )
+        collection = self.get_collection(self.allocation_write_concern)
+        cursor = collection.aggregate(pipeline, **self.get_deadline())
+        candidates = await cursor.to_list(sample_size)
+
+        # Larger requests are placed first, while the amounts of free slots
+        # are tracked locally, so that one update per server is enough
+        remaining = {candidate['_id']: candidate['available_slots'] for candidate in candidates}
+        assigned = {}
+        for index in sorted(range(len(slots)), key=lambda index: -slots[index]):
+            suitable = [
+                candidate for candidate in candidates
+                if remaining[candidate['_id']] >= slots[index]
+            ]
+            if suitable:
+                candidate = self.estimator.choose(suitable)
+                remaining[candidate['_id']] -= slots[index]
+                assigned[index] = candidate
+
+        totals = {}
+        for index, candidate in assigned.items():
+            totals[candidate['_id']] = totals.get(candidate['_id'], 0) + slots[index]
+
+        applied = {}
+        if totals:
+            batch_id = uuid4().hex
+            await collection.bulk_write([
+                UpdateOne(
+                    {'_id': server_id, 'available_slots': {'$gte': total}},
+                    {
+                        '$inc': {'available_slots': -total, 'version': 1},
+                        '$set': {'last_modified': datetime.utcnow()},
+                        '$push': {'allocation_batches': {
+                            '$each': [batch_id],
+                            '$slice': -ALLOCATION_BATCHES_KEPT
+                        }}
+                    }
+                )
+                for server_id, total in totals.items()
+            ], ordered=False)
+
+            # Updates of servers taken by concurrent requests don't match, which
+            # isn't reported by the bulk write, so the servers are read back
+            cursor = collection.find(
+                {'_id': {'$in': list(totals.keys())}},
+                projection={'available_slots': True, 'allocation_batches': True, 'version': True},
+                max_time_ms=self.operation_timeout_ms
+            )
+            async for document in cursor:
+                if batch_id in document.get('allocation_batches', []):
+                    applied[document['_id']] = document
+
+        documents = []
+        for index, required_slots in enumerate(slots):
+            candidate = assigned.get(index, None)
+            if candidate and candidate['_id'] in applied:
+                document = {
+                    key: value for key, value in candidate.items()
+                    if key not in ('_id', 'telemetry')
+                }
+                document['id'] = candidate['_id']
+                document['available_slots'] = applied[candidate['_id']]['available_slots']
+                document['version'] = applied[candidate['_id']]['version']
+            else:
+                document = await self.allocate(game_mode, required_slots, region=region, tags=tags)
+            documents.append(document)
+        return documents
+
+    @with_deadline
+    async def free(self, server_id, freed_slots):
+        collection = self.get_collection(self.allocation_write_concern)
+        document = await collection.find_one_and_update(
+            {'_id': server_id},
+            {
+                '$inc': {'available_slots': freed_slots, 'version': 1},
+                '$set': {'last_modified': datetime.utcnow()},
+            },
+            projection={'game_mode': True, 'available_slots': True, 'version': True},
+            return_document=ReturnDocument.AFTER,
+            **self.get_deadline()
+        )
+        if not document:
+            return None
+
+        document['id'] = document.pop('_id')
+        return document
+
+    @with_deadline
+    async def report(self, server_id, metrics):
+        collection = self.get_collection(self.registration_write_concern)
+        for attempt in range(REPORT_ATTEMPTS):
+            document = await self.collection.find_one(
+                {'_id': server_id},
+                projection={'telemetry': True},
+                max_time_ms=self.operation_timeout_ms
+            )
+            if not document:
+                return None
+
+            # The averages are replaced only when no other report was saved
+            # since they were read, the last attempt replaces them anyway
+            previous = document.get('telemetry', None)
+            telemetry = self.estimator.update(previous, metrics)
+            query = {'_id': server_id}
+            if attempt < REPORT_ATTEMPTS - 1:
+                query['telemetry.reported_at'] = previous['reported_at'] if previous else None
+            document = await collection.find_one_and_update(
+                query,
+                {'$set': {'telemetry': telemetry}},
+                projection={'game_mode': True},
+                return_document=ReturnDocument.AFTER,
+                **self.get_deadline()
+            )
+            if document:
+                return {'id': server_id, 'game_mode': document['game_mode'], 'telemetry': telemetry}
+        return None
+
+    @with_deadline
+    async def evict(self, server_id):
+        collection = self.get_collection(self.registration_write_concern)
+        document = await collection.find_one_and_delete(
+            {'_id': server_id},
+            projection={'game_mode': True, 'version': True},
+            **self.get_deadline()
+        )
+        if not document:
+            return None
+
+        # The removal is the next change of the server
+        document['id'] = document.pop('_id')
+        document['version'] = document.get('version', 0) + 1
+        return document
+
+    @with_deadline
+    async def summarize(self, game_mode=None):
+        pipeline = [
+            {'$group': {
+                '_id': '$game_mode',
+                'servers': {'$sum': 1},
+                'available_slots': {'$sum': '$available_slots'},
+            }}
+        ]
+        if game_mode:
+            pipeline.insert(0, {'$match': {'game_mode': game_mode}})
+
+        result = await self.collection.aggregate(pipeline, **self.get_deadline()).to_list(None)
+        return {
+            item['_id']: {'servers': item['servers'], 'available_slots': item['available_slots']}
+            for item in result
+        }
+
+    async def servers(self, filters=None, batch_size=1000):
+        cursor = self.collection.find(
+            get_servers_query(filters or {}),
+            projection={'credentials': False, 'allocation_batches': False},
+            batch_size=batch_size
+        )
+        async for document in cursor:
+            document['id'] = document.pop('_id')
+            yield document
+
+    async def get_operation_time(self):
+        # Replies of members of a replica set carry the time of the latest operation
+        result = await self.collection.database.command('ping')
+        return result.get('operationTime', None)
+
+    async def changes(self, resume_token=None, start_at=None):
+        stream = self.collection.watch(
+            [{'$project': {'fullDocument.credentials': False}}],
+            full_document='updateLookup',
+            resume_after=resume_token,
+            start_at_operation_time=start_at if resume_token is None else None
+        )
+        try:
+            async for change in stream:
+                change = get_change(change)
+                if change:
+                    yield change
+        finally:
+            await stream.close()
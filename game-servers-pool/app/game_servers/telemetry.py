@@ -0,0 +1,76 @@
+import random
+import time
+
+
+class LoadEstimator(object):
+    """
+    Estimates the headroom of game servers from the reported utilization.
+
+    Servers report CPU and memory usage as fractions of their limits and
+    the tick time, which is turned into a fraction of the tick budget.
+    Reports are folded into exponentially weighted averages, where the
+    weight of the previous value halves every `half_life` seconds, so a
+    single spike doesn't exclude a server for long. The headroom is the
+    part of the most utilized resource that is still free.
+
+    Servers below the minimal headroom are excluded from allocations until
+    a better report arrives or `stale_after` seconds pass. Reports older
+    than that are ignored and `default_headroom` is used instead.
+
+    Allocations pick the server with the most headroom out of `sample_size`
+    random candidates, so that the least loaded server isn't flooded.
+    """
+
+    def __init__(self, half_life=30, tick_budget=16, min_headroom=0.1, stale_after=60,
+                 default_headroom=0.5, sample_size=2, clock=time.time):
+        self.half_life = half_life
+        self.tick_budget = tick_budget
+        self.min_headroom = min_headroom
+        self.stale_after = stale_after
+        self.default_headroom = default_headroom
+        self.sample_size = sample_size
+        self.clock = clock
+
+    def update(self, telemetry, metrics):
+        now = self.clock()
+        tick_budget = metrics.get('tick_budget', None) or self.tick_budget
+        sample = {
+            'cpu': metrics['cpu'],
+            'memory': metrics['memory'],
+            'tick': metrics['tick_time'] / tick_budget,
+        }
+
+        if telemetry and now - telemetry['reported_at'] < self.stale_after:
+            weight = 0.5 ** (max(now - telemetry['reported_at'], 0) / self.half_life)
+            sample = {
+                key: telemetry[key] * weight + value * (1 - weight)
+                for key, value in sample.items()
+            }
+
+        headroom = 1.0 - max(sample.values())
+        overloaded = headroom < self.min_headroom
+        sample.update({
+            'headroom': headroom,
+            'reported_at': now,
+            'overloaded_until': now + self.stale_after if overloaded else 0,
+        })
+        return sample
+
+    def get_headroom(self, telemetry):
+        if not telemetry or self.clock() - telemetry['reported_at'] >= self.stale_after:
+            return self.default_headroom
+        return telemetry['headroom']
+
+    def is_overloaded(self, telemetry):
+        return bool(telemetry) and telemetry['overloaded_until'] > self.clock()
+
+    def rank(self, documents):
+        return sorted(
+            documents,
+            key=lambda document: self.get_headroom(document.get('telemetry', None)),
+            reverse=True
+        )
+
+    def choose(self, documents):
+        sample = random.sample(documents, min(self.sample_size, len(documents)))
+        return self.rank(sample)[0]
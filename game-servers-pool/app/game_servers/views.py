@@ -0,0 +1,151 @@
+import hmac
+
+from sage_utils.constants import AUTHORIZATION_ERROR, VALIDATION_ERROR
+from sage_utils.wrappers import Response
+from sanic.response import json, stream
+from sanic.views import HTTPMethodView
+
+from app.game_servers.export import export_game_servers
+from app.game_servers.scheduler import HIGH_PRIORITY, get_game_mode
+from app.game_servers.schemas import ExportGameServersSchema
+from app.game_servers.storage import TIMEOUT_ERROR
+
+
+def is_authorized(request, token):
+    # Requests are refused when the token isn't specified
+    if not token:
+        return False
+
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer':
+        return False
+    return hmac.compare_digest(credentials.strip().encode('utf-8'), token.encode('utf-8'))
+
+
+def unauthorized():
+    response = Response.from_error(AUTHORIZATION_ERROR, "Invalid or missing token.")
+    return json(response.data, status=401)
+
+
+async def pool_snapshot(request):
+    """
+    Returns the current state of the pool for bootstrapping a local replica.
+
+    Consumers are expected to bind their queue to the changes stream first,
+    then fetch the snapshot and apply the received deltas over it. Servers
+    and deltas carry the version of the server, so a delta is applied only
+    when its version is newer than the known one, and otherwise dropped.
+    A server that isn't known accepts any version.
+
+    Requests must carry the `ADMIN_API_TOKEN` as a bearer token.
+    """
+    if not is_authorized(request, request.app.config["ADMIN_API_TOKEN"]):
+        return unauthorized()
+
+    filters = {'game_mode': request.args.get('game-mode', None)}
+    pool_events = request.app.pool_events
+    source, sequence = pool_events.source, pool_events.last_sequence
+    servers = [
+        {
+            'id': str(document['id']),
+            'game-mode': document['game_mode'],
+            'available-slots': document['available_slots'],
+            'version': document.get('version', None),
+        }
+        async for document in request.app.storage.servers(filters)
+    ]
+
+    return json({
+        'source': source,
+        'seq': sequence,
+        'servers': servers,
+    })
+
+
+async def pool_summary(request):
+    """
+    Returns the amount of servers and available slots per game mode.
+    """
+    summary = await request.app.storage.summarize(request.args.get('game-mode', None))
+    return json({
+        game_mode: {
+            'servers': item['servers'],
+            'available-slots': item['available_slots'],
+        }
+        for game_mode, item in summary.items()
+    })
+
+
+async def allocation_stats(request):
+    """
+    Returns the distribution of sizes of the batched allocations, the
+    queue depth and wait time of requests per scheduler lane and game
+    mode, and the state of the scaled queue consumers.
+    """
+    coalescer = request.app.allocation_coalescer
+    return json({
+        'allocation-batching': coalescer.get_stats() if coalescer else None,
+        'scheduler': request.app.request_scheduler.get_stats(),
+        'consumers': {
+            worker.QUEUE_NAME: worker.consumers.get_stats()
+            for worker in request.app.amqp.workers
+            if getattr(worker, 'consumers', None)
+        },
+    })
+
+
+async def export_pool(request):
+    """
+    Streams game servers as NDJSON, optionally filtered by the game mode
+    and the range of available slots.
+
+    Requests must carry the `ADMIN_API_TOKEN` as a bearer token.
+    """
+    if not is_authorized(request, request.app.config["ADMIN_API_TOKEN"]):
+        return unauthorized()
+
+    result = ExportGameServersSchema().load(request.raw_args)
+    if result.errors:
+        response = Response.from_error(VALIDATION_ERROR, result.errors)
+        return json(response.data, status=400)
+
+    batch_size = request.app.config["EXPORT_BATCH_SIZE"]
+
+    async def streaming_fn(response):
+        async for line in export_game_servers(request.app.storage, result.data, batch_size):
+            await response.write(line)
+
+    return stream(streaming_fn, content_type='application/x-ndjson')
+
+
+class RetrieveServerView(HTTPMethodView):
+    """
+    Allocates a game server over HTTP with the same logic and response
+    envelope as the `game-servers-pool.server.retrieve` queue.
+
+    Requests must carry the `RETRIEVE_API_TOKEN` as a bearer token and
+    are scheduled in the same lane as the requests of the queue.
+    """
+
+    def __init__(self, worker):
+        self.worker = worker
+
+    async def post(self, request):
+        if not is_authorized(request, request.app.config["RETRIEVE_API_TOKEN"]):
+            return unauthorized()
+
+        idempotency_key = request.headers.get('Idempotency-Key', None)
+        response = await request.app.request_scheduler.submit(
+            HIGH_PRIORITY,
+            self.worker.handle_once,
+            request.body,
+            idempotency_key,
+            flow=get_game_mode(request.body)
+        )
+        response.data[Response.EVENT_FIELD_NAME] = request.headers.get('X-Correlation-Id', None)
+        error = response.data.get(Response.ERROR_FIELD_NAME, None)
+        if error:
+            status = 504 if error[Response.ERROR_TYPE_FIELD_NAME] == TIMEOUT_ERROR else 400
+        else:
+            status = 200
+        return json(response.data, status=status)
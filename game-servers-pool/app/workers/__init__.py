@@ -1,4 +1,8 @@
+from app.workers.allocate_match import AllocateMatchWorker  # NOQA
 from app.workers.get_server import GetServerWorker  # NOQA
 from app.workers.microservice_register import MicroserviceRegisterWorker  # NOQA
+from app.workers.pool_events import PoolEventsWorker  # NOQA
 from app.workers.register_server import RegisterServerWorker  # NOQA
+from app.workers.report_server import ReportServerWorker  # NOQA
+from app.workers.unregister_server import UnregisterServerWorker  # NOQA
 from app.workers.update_server import UpdateServerWorker  # NOQA
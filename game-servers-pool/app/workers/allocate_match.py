@@ -0,0 +1,71 @@
+from uuid import uuid4
+
+from marshmallow import ValidationError
+from sage_utils.constants import TOKEN_ERROR, VALIDATION_ERROR
+from sage_utils.wrappers import Response
+
+from app.game_servers.allocation import allocate_server, get_party_key, get_party_token
+from app.game_servers.scheduler import HIGH_PRIORITY
+from app.workers.base import IdempotentQueueWorker
+from app.workers.pool_events import ALLOCATE_OPERATION
+
+
+class AllocateMatchWorker(IdempotentQueueWorker):
+    QUEUE_NAME = 'game-servers-pool.match.allocate'
+    REQUEST_EXCHANGE_NAME = 'open-matchmaking.game-server-pool.match.allocate.direct'
+    LANE = HIGH_PRIORITY
+
+    def __init__(self, app, *args, **kwargs):
+        super(AllocateMatchWorker, self).__init__(app, *args, **kwargs)
+        from app.game_servers.schemas import RequestMatchSchema, RetrieveGameServerSchema
+        self.schema = RetrieveGameServerSchema
+        self.request_schema = RequestMatchSchema
+        self.region_fallbacks = app.config["REGION_FALLBACKS"]
+        self.region_fallback_to_any = app.config["REGION_FALLBACK_TO_ANY"]
+
+    async def handle_data(self, raw_data):
+        try:
+            data = await self.validate_data(raw_data)
+        except ValidationError as exc:
+            return Response.from_error(VALIDATION_ERROR, exc.normalized_messages())
+
+        secret = self.app.config["PARTY_TOKEN_SECRET"]
+        if not secret:
+            return Response.from_error(
+                TOKEN_ERROR,
+                "Party tokens can't be signed without the `PARTY_TOKEN_SECRET`."
+            )
+
+        # Slots of all parties are taken from one server by a single update,
+        # so either the whole match is placed or nothing is changed
+        required_slots = sum(data['parties'])
+        document = await allocate_server(
+            self.storage,
+            required_slots,
+            data,
+            self.region_fallbacks,
+            self.region_fallback_to_any
+        )
+        if not document:
+            return Response.with_content(None)
+
+        self.app.pool_events.server_changed(
+            ALLOCATE_OPERATION,
+            document['id'],
+            data['game-mode'],
+            document['available_slots'],
+            delta=-required_slots,
+            version=document['version']
+        )
+
+        match_id = uuid4().hex
+        key = get_party_key(secret, document['id'])
+        content = self.schema().dump(document).data
+        content.update({
+            'match-id': match_id,
+            'parties': [
+                {'slots': slots, 'token': get_party_token(key, match_id, index, slots)}
+                for index, slots in enumerate(data['parties'])
+            ]
+        })
+        return Response.with_content(content)
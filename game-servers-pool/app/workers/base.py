@@ -0,0 +1,171 @@
+import json
+
+from aioamqp import AmqpClosedConnection
+from marshmallow import ValidationError
+from sanic_amqp_ext import AmqpWorker
+from sage_utils.wrappers import Response
+
+from app.game_servers.idempotency import IdempotencyCache, get_idempotency_key
+from app.game_servers.scheduler import DEFAULT_FLOW, HIGH_PRIORITY, LOW_PRIORITY, get_game_mode
+from app.game_servers.storage import StorageTimeoutError, TIMEOUT_ERROR
+from app.workers.scaling import QueueConsumers
+
+
+class QueueWorker(AmqpWorker):
+    """
+    Base class of the workers that handle requests from their queue and
+    reply to the queue of the client.
+
+    Subclasses set the queue and exchange names and the scheduler lane,
+    and implement `handle_request`. Requests of the high priority lane
+    are scheduled per game mode and their consumers can be scaled.
+    """
+    QUEUE_NAME = None
+    REQUEST_EXCHANGE_NAME = None
+    RESPONSE_EXCHANGE_NAME = 'open-matchmaking.responses.direct'
+    CONTENT_TYPE = 'application/json'
+    LANE = LOW_PRIORITY
+
+    def __init__(self, app, *args, **kwargs):
+        super(QueueWorker, self).__init__(app, *args, **kwargs)
+        self.storage = app.storage
+        self.request_schema = None
+        self.consumers = None
+
+    async def validate_data(self, raw_data):
+        try:
+            data = json.loads(raw_data.strip())
+        except json.decoder.JSONDecodeError:
+            data = {}
+
+        deserializer = self.request_schema()
+        result = deserializer.load(data)
+        if result.errors:
+            raise ValidationError(result.errors)
+
+        return result.data
+
+    async def handle_request(self, body, envelope, properties):
+        raise NotImplementedError(
+            '`handle_request(body, envelope, properties)` method must be implemented.'
+        )
+
+    async def process_request(self, channel, body, envelope, properties):
+        response = await self.handle_request(body, envelope, properties)
+        response.data[Response.EVENT_FIELD_NAME] = properties.correlation_id
+
+        if properties.reply_to:
+            await channel.publish(
+                json.dumps(response.data),
+                exchange_name=self.RESPONSE_EXCHANGE_NAME,
+                routing_key=properties.reply_to,
+                properties={
+                    'content_type': self.CONTENT_TYPE,
+                    'delivery_mode': 2,
+                    'correlation_id': properties.correlation_id
+                },
+                mandatory=True
+            )
+
+        await channel.basic_client_ack(delivery_tag=envelope.delivery_tag)
+
+    async def consume_callback(self, channel, body, envelope, properties):
+        flow = get_game_mode(body) if self.LANE == HIGH_PRIORITY else DEFAULT_FLOW
+        self.app.loop.create_task(self.app.request_scheduler.submit(
+            self.LANE, self.process_request, channel, body, envelope, properties, flow=flow
+        ))
+
+    def create_consumers(self, protocol):
+        config = self.app.config
+        if self.LANE != HIGH_PRIORITY:
+            return QueueConsumers(
+                self, protocol, min_prefetch_count=config["AMQP_LOW_PRIORITY_PREFETCH_COUNT"]
+            )
+
+        return QueueConsumers(
+            self,
+            protocol,
+            min_prefetch_count=config["AMQP_HIGH_PRIORITY_PREFETCH_COUNT"],
+            max_prefetch_count=config["CONSUMER_SCALING_MAX_PREFETCH_COUNT"],
+            max_channels=config["CONSUMER_SCALING_MAX_CHANNELS"],
+            interval=config["CONSUMER_SCALING_INTERVAL"],
+            drain_time=config["CONSUMER_SCALING_DRAIN_TIME"]
+        )
+
+    async def prepare(self):
+        pass
+
+    async def run(self, *args, **kwargs):
+        try:
+            _transport, protocol = await self.connect()
+        except AmqpClosedConnection as exc:
+            print(exc)
+            return
+
+        await self.prepare()
+        channel = await protocol.channel()
+        await channel.queue_declare(
+            queue_name=self.QUEUE_NAME,
+            durable=True,
+            passive=False,
+            auto_delete=False
+        )
+        await channel.queue_bind(
+            queue_name=self.QUEUE_NAME,
+            exchange_name=self.REQUEST_EXCHANGE_NAME,
+            routing_key=self.QUEUE_NAME
+        )
+        self.consumers = self.create_consumers(protocol)
+        await self.consumers.add_consumer(channel)
+        if self.LANE == HIGH_PRIORITY and self.app.config["CONSUMER_SCALING_ENABLED"]:
+            self.app.loop.create_task(self.consumers.scale())
+
+
+class IdempotentQueueWorker(QueueWorker):
+    """
+    Base class of the workers that reply to retried requests with the
+    response saved for the first one instead of handling them once more.
+
+    Subclasses implement `handle_data`, which is called for requests
+    that weren't handled before.
+    """
+
+    def __init__(self, app, *args, **kwargs):
+        super(IdempotentQueueWorker, self).__init__(app, *args, **kwargs)
+        self.idempotency_cache = IdempotencyCache(
+            max_size=app.config["IDEMPOTENCY_CACHE_SIZE"],
+            ttl=app.config["IDEMPOTENCY_CACHE_TTL"],
+            timeout_ms=app.config["MONGODB_OPERATION_TIMEOUT_MS"]
+        )
+
+    async def handle_data(self, raw_data):
+        raise NotImplementedError('`handle_data(raw_data)` method must be implemented.')
+
+    async def handle_once(self, raw_data, idempotency_key=None, replay=True):
+        async def handle():
+            response = await self.handle_data(raw_data)
+            return response.data
+
+        # Timed out requests aren't remembered, so that a retry of the
+        # request makes another attempt instead of replaying the error
+        try:
+            if idempotency_key and replay:
+                data = await self.idempotency_cache.get_or_create(idempotency_key, handle)
+            else:
+                data = await handle()
+                if idempotency_key:
+                    await self.idempotency_cache.set(idempotency_key, data)
+        except StorageTimeoutError as exc:
+            return Response.from_error(TIMEOUT_ERROR, str(exc))
+        return Response(data=dict(data))
+
+    async def handle_request(self, body, envelope, properties):
+        idempotency_key, replay = get_idempotency_key(envelope, properties)
+        return await self.handle_once(body, idempotency_key, replay=replay)
+
+    async def prepare(self):
+        from app.game_servers.documents import GameServer
+        collection_name = self.app.config["IDEMPOTENCY_CACHE_COLLECTION"]
+        if collection_name:
+            database = GameServer.collection.database
+            await self.idempotency_cache.init_collection(database[collection_name])
@@ -1,115 +1,51 @@
-import json
-
-from aioamqp import AmqpClosedConnection
 from marshmallow import ValidationError
-from sanic_amqp_ext import AmqpWorker
 from sage_utils.constants import VALIDATION_ERROR
 from sage_utils.wrappers import Response
 
+from app.game_servers.allocation import allocate_server
+from app.game_servers.scheduler import HIGH_PRIORITY
+from app.workers.base import IdempotentQueueWorker
+from app.workers.pool_events import ALLOCATE_OPERATION
+
 
-class GetServerWorker(AmqpWorker):
+class GetServerWorker(IdempotentQueueWorker):
     QUEUE_NAME = 'game-servers-pool.server.retrieve'
     REQUEST_EXCHANGE_NAME = 'open-matchmaking.game-server-pool.server.retrieve.direct'
-    RESPONSE_EXCHANGE_NAME = 'open-matchmaking.responses.direct'
-    CONTENT_TYPE = 'application/json'
+    LANE = HIGH_PRIORITY
 
     def __init__(self, app, *args, **kwargs):
         super(GetServerWorker, self).__init__(app, *args, **kwargs)
-        from app.game_servers.documents import GameServer
         from app.game_servers.schemas import RequestGetServerSchema, RetrieveGameServerSchema
-        self.game_server_document = GameServer
+        self.coalescer = app.allocation_coalescer
         self.schema = RetrieveGameServerSchema
         self.request_schema = RequestGetServerSchema
+        self.region_fallbacks = app.config["REGION_FALLBACKS"]
+        self.region_fallback_to_any = app.config["REGION_FALLBACK_TO_ANY"]
 
-    async def validate_data(self, raw_data):
-        try:
-            data = json.loads(raw_data.strip())
-        except json.decoder.JSONDecodeError:
-            data = {}
-
-        deserializer = self.request_schema()
-        result = deserializer.load(data)
-        if result.errors:
-            raise ValidationError(result.errors)
-
-        return result.data
-
-    async def get_game_server(self, raw_data):
+    async def handle_data(self, raw_data):
         try:
             data = await self.validate_data(raw_data)
         except ValidationError as exc:
             return Response.from_error(VALIDATION_ERROR, exc.normalized_messages())
 
-        pipeline = [
-            {'$match': {
-                '$and': [
-                    {'available_slots': {'$gte': data['required-slots']}},
-                    {"game_mode": data['game-mode']}
-                ]
-            }},
-            {'$sample': {'size': 1}},
-            {'$addFields': {
-                "available_slots": {
-                    "$subtract": ["$available_slots", data['required-slots']]
-                }
-            }}
-        ]
-        result = await self.game_server_document.collection.aggregate(pipeline).to_list(1)
+        document = await allocate_server(
+            self.coalescer or self.storage,
+            data['required-slots'],
+            data,
+            self.region_fallbacks,
+            self.region_fallback_to_any
+        )
 
-        if result:
-            document_updated_data = result[0]
-            document_id = document_updated_data.pop('_id')
-            await self.game_server_document.collection.update_one(
-                {'_id': document_id},
-                {'$set': document_updated_data}
+        if document:
+            self.app.pool_events.server_changed(
+                ALLOCATE_OPERATION,
+                document['id'],
+                data['game-mode'],
+                document['available_slots'],
+                delta=-data['required-slots'],
+                version=document['version']
             )
 
             serializer = self.schema()
-            document = serializer.dump(document_updated_data).data
-        else:
-            document = None
+            document = serializer.dump(document).data
         return Response.with_content(document)
-
-    async def process_request(self, channel, body, envelope, properties):
-        response = await self.get_game_server(body)
-        response.data[Response.EVENT_FIELD_NAME] = properties.correlation_id
-
-        if properties.reply_to:
-            await channel.publish(
-                json.dumps(response.data),
-                exchange_name=self.RESPONSE_EXCHANGE_NAME,
-                routing_key=properties.reply_to,
-                properties={
-                    'content_type': self.CONTENT_TYPE,
-                    'delivery_mode': 2,
-                    'correlation_id': properties.correlation_id
-                },
-                mandatory=True
-            )
-
-        await channel.basic_client_ack(delivery_tag=envelope.delivery_tag)
-
-    async def consume_callback(self, channel, body, envelope, properties):
-        self.app.loop.create_task(self.process_request(channel, body, envelope, properties))
-
-    async def run(self, *args, **kwargs):
-        try:
-            _transport, protocol = await self.connect()
-        except AmqpClosedConnection as exc:
-            print(exc)
-            return
-
-        channel = await protocol.channel()
-        await channel.queue_declare(
-            queue_name=self.QUEUE_NAME,
-            durable=True,
-            passive=False,
-            auto_delete=False
-        )
-        await channel.queue_bind(
-            queue_name=self.QUEUE_NAME,
-            exchange_name=self.REQUEST_EXCHANGE_NAME,
-            routing_key=self.QUEUE_NAME
-        )
-        await channel.basic_qos(prefetch_count=1, prefetch_size=0, connection_global=False)
-        await channel.basic_consume(self.consume_callback, queue_name=self.QUEUE_NAME)
@@ -17,5 +17,17 @@ class MicroserviceRegisterWorker(SanicAmqpExtensionMixin, BaseRegisterWorker):
                     'codename': 'game-servers-pool.server.retrieve',
                     'description': 'Get a server with credentials to connect',
                 },
+                {
+                    'codename': 'game-servers-pool.match.allocate',
+                    'description': 'Reserve slots for all parties of a match on one server',
+                },
+                {
+                    'codename': 'game-servers-pool.server.unregister',
+                    'description': 'Remove a game server from the pool',
+                },
+                {
+                    'codename': 'game-servers-pool.server.report',
+                    'description': 'Report utilization of a game server',
+                },
             ]
         }
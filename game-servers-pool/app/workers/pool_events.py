@@ -0,0 +1,285 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from itertools import count
+from uuid import uuid4
+
+from aioamqp import AmqpClosedConnection
+from sanic_amqp_ext import AmqpWorker
+
+from app.game_servers.pool_snapshot import dump_snapshot, read_snapshot, write_snapshot
+from app.game_servers.storage import CHANGE_DELETE, CHANGE_INVALIDATE
+
+
+REGISTER_OPERATION = 'register'
+ALLOCATE_OPERATION = 'allocate'
+FREE_OPERATION = 'free'
+EVICT_OPERATION = 'evict'
+# Seconds subtracted from the time of the snapshot when catching up,
+# which covers changes in flight and clocks of other processes
+SNAPSHOT_CATCH_UP_MARGIN = 5
+
+
+class PoolEventsWorker(AmqpWorker):
+    EXCHANGE_NAME = 'open-matchmaking.game-server-pool.events.topic'
+    CAPACITY_ROUTING_KEY = 'game-servers-pool.{type}.{game_mode}'
+    CHANGES_ROUTING_KEY = 'game-servers-pool.changes.{operation}.{game_mode}'
+    CONTENT_TYPE = 'application/json'
+
+    def __init__(self, app, *args, **kwargs):
+        super(PoolEventsWorker, self).__init__(app, *args, **kwargs)
+        from app.game_servers.capacity import CapacityTracker
+        from app.game_servers.changes import ResumeTokenStore
+        self.storage = app.storage
+        self.capacity = CapacityTracker(app.config["CAPACITY_WATERMARKS"])
+        self.resync_interval = app.config["CAPACITY_RESYNC_INTERVAL"]
+        self.snapshot_path = app.config["CAPACITY_SNAPSHOT_PATH"]
+        self.snapshot_interval = app.config["CAPACITY_SNAPSHOT_INTERVAL"]
+        self.snapshot_state = None
+        self.capacity_loaded = False
+        # Processes started by the `consume` command share the pool, so only
+        # one of them tracks its capacity, the others publish only changes
+        self.tracks_capacity = True
+        self.resume_tokens = ResumeTokenStore(
+            app.config["CHANGE_STREAM_TOKEN_KEY"],
+            save_interval=app.config["CHANGE_STREAM_TOKEN_SAVE_INTERVAL"]
+        )
+        self.events = None
+        self.source = None
+        self.sequence = None
+        self.last_sequence = 0
+
+    def server_changed(self, operation, server_id, game_mode, available_slots, delta=None,
+                       version=None):
+        change = {
+            'id': str(server_id),
+            'game-mode': game_mode,
+            'available-slots': available_slots,
+            'version': version,
+        }
+        if delta is not None:
+            change['delta'] = delta
+        self.publish_change(operation, change)
+
+        if self.tracks_capacity:
+            events = self.capacity.update_server(str(server_id), game_mode, available_slots)
+            self.publish_capacity_events(events)
+
+    def server_removed(self, server_id, game_mode, version=None):
+        self.publish_change(EVICT_OPERATION, {
+            'id': str(server_id),
+            'game-mode': game_mode,
+            'version': version,
+        })
+
+        if self.tracks_capacity:
+            events = self.capacity.remove_server(str(server_id))
+            self.publish_capacity_events(events)
+
+    def publish_change(self, operation, change):
+        # Sequence numbers are assigned only to events that will be published,
+        # so that consumers can rely on them for detecting lost deltas
+        if self.events is None:
+            return
+
+        self.last_sequence = next(self.sequence)
+        change.update({
+            'source': self.source,
+            'seq': self.last_sequence,
+            'op': operation,
+        })
+        routing_key = self.CHANGES_ROUTING_KEY.format(
+            operation=operation,
+            game_mode=change['game-mode']
+        )
+        self.publish(routing_key, change)
+
+    def publish_capacity_events(self, events):
+        for event in events:
+            routing_key = self.CAPACITY_ROUTING_KEY.format(
+                type=event['type'],
+                game_mode=event['game-mode']
+            )
+            self.publish(routing_key, event)
+
+    def publish(self, routing_key, payload):
+        # Events are dropped until the worker has connected to RabbitMQ
+        if self.events is not None:
+            self.events.put_nowait((routing_key, payload))
+
+    async def reload_capacity(self):
+        documents = [document async for document in self.storage.servers()]
+        self.publish_capacity_events(self.capacity.load(documents))
+        self.capacity_loaded = True
+
+    async def load_snapshot(self):
+        started_at = time.monotonic()
+        loop = asyncio.get_event_loop()
+        # A snapshot that can't be read is ignored like a missing one,
+        # then the whole pool is read from the storage
+        try:
+            store, state = await loop.run_in_executor(None, read_snapshot, self.snapshot_path)
+        except Exception as exc:
+            print("Can't load the pool snapshot: {}".format(exc))
+            return
+        if store is None:
+            return
+
+        self.snapshot_state = state
+        self.publish_capacity_events(self.capacity.load_store(store))
+        self.capacity_loaded = True
+        print("Loaded {} servers from the pool snapshot in {:.3f}s.".format(
+            len(store), time.monotonic() - started_at
+        ))
+
+    async def save_snapshot(self):
+        # The pool and the position in the changes stream are taken at once,
+        # while writing to disk is moved to a thread
+        state = {'written_at': time.time(), 'resume_token': self.resume_tokens.token}
+        content = dump_snapshot(self.capacity.servers, state)
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, write_snapshot, self.snapshot_path, content)
+
+    async def save_snapshot_periodically(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            if self.capacity_loaded:
+                await self.save_snapshot()
+
+    async def catch_up_capacity(self, state):
+        # The changes stream is resumed from the position saved in the snapshot,
+        # otherwise servers changed since the snapshot are read. Servers evicted
+        # in the meantime are dropped by the next resync
+        if self.app.config["CHANGE_STREAM_ENABLED"] and state.get('resume_token') is not None:
+            return
+
+        since = datetime.utcfromtimestamp(state['written_at'] - SNAPSHOT_CATCH_UP_MARGIN)
+        async for document in self.storage.servers({'modified_since': since}):
+            events = self.capacity.update_server(
+                str(document['id']), document['game_mode'], document['available_slots']
+            )
+            self.publish_capacity_events(events)
+
+    async def resync_capacity(self):
+        if self.snapshot_state is None:
+            await self.reload_capacity()
+        else:
+            await self.catch_up_capacity(self.snapshot_state)
+
+        while self.resync_interval:
+            await asyncio.sleep(self.resync_interval)
+            await self.reload_capacity()
+
+    def apply_change(self, change):
+        # Changes made by this process were already applied when they were
+        # made, but the amounts of slots are absolute, so applying them once
+        # more doesn't change anything
+        if change['operation'] == CHANGE_DELETE:
+            events = self.capacity.remove_server(str(change['id']))
+        else:
+            events = self.capacity.update_server(
+                str(change['id']), change['game_mode'], change['available_slots']
+            )
+        self.publish_capacity_events(events)
+
+    async def watch_changes(self):
+        resume_token = await self.resume_tokens.load()
+        # The pool loaded from the snapshot is behind the saved token
+        if self.snapshot_state and self.snapshot_state.get('resume_token') is not None:
+            resume_token = self.snapshot_state['resume_token']
+        while True:
+            received = False
+            try:
+                # Changes made while the stream wasn't watched are unknown. The
+                # stream starts from the time taken before the pool is read,
+                # so changes made during the reload aren't missed
+                start_at = None
+                if resume_token is None:
+                    start_at = await self.storage.get_operation_time()
+                    await self.reload_capacity()
+
+                async for change in self.storage.changes(resume_token, start_at=start_at):
+                    if change['operation'] == CHANGE_INVALIDATE:
+                        break
+                    received = True
+                    self.apply_change(change)
+                    resume_token = change['token']
+                    await self.resume_tokens.save(resume_token)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Until the stream is restored the periodic resync keeps
+                # the pool fresh. A stream that failed in the middle is
+                # resumed from the last change
+                print(exc)
+                await asyncio.sleep(self.resync_interval or 1)
+                if received:
+                    continue
+
+            # The stream was invalidated or couldn't be resumed from the token,
+            # e.g. because it's no longer in the oplog, so it starts over
+            resume_token = None
+
+    async def flush(self, timeout=None):
+        # Events of the handled requests are published and the position
+        # in the changes stream is saved before the process stops
+        await self.resume_tokens.flush()
+        if self.snapshot_path and self.capacity_loaded:
+            await self.save_snapshot()
+        if self.events is None:
+            return True
+
+        try:
+            await asyncio.wait_for(self.events.join(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def track_capacity(self):
+        if self.snapshot_path:
+            await self.load_snapshot()
+            if self.snapshot_interval:
+                self.app.loop.create_task(self.save_snapshot_periodically())
+        self.app.loop.create_task(self.resync_capacity())
+        if self.app.config["CHANGE_STREAM_ENABLED"]:
+            collection_name = self.app.config["CHANGE_STREAM_TOKEN_COLLECTION"]
+            if collection_name:
+                database = self.storage.collection.database
+                self.resume_tokens.collection = database[collection_name]
+            self.app.loop.create_task(self.watch_changes())
+
+    async def run(self, *args, **kwargs):
+        try:
+            _transport, protocol = await self.connect()
+        except AmqpClosedConnection as exc:
+            print(exc)
+            return
+
+        channel = await protocol.channel()
+        await channel.exchange_declare(
+            exchange_name=self.EXCHANGE_NAME,
+            type_name='topic',
+            durable=True,
+            passive=False,
+            auto_delete=False
+        )
+
+        # Each process gets its own sequence of events
+        self.source = uuid4().hex
+        self.sequence = count(1)
+        self.events = asyncio.Queue()
+        if self.tracks_capacity:
+            await self.track_capacity()
+        while True:
+            routing_key, payload = await self.events.get()
+            await channel.publish(
+                json.dumps(payload),
+                exchange_name=self.EXCHANGE_NAME,
+                routing_key=routing_key,
+                properties={
+                    'content_type': self.CONTENT_TYPE,
+                    'delivery_mode': 2,
+                }
+            )
+            self.events.task_done()
@@ -1,37 +1,22 @@
-import json
-
-from aioamqp import AmqpClosedConnection
 from bson import ObjectId
 from marshmallow import ValidationError
-from sanic_amqp_ext import AmqpWorker
 from sage_utils.constants import VALIDATION_ERROR
 from sage_utils.wrappers import Response
 
+from app.game_servers.allocation import get_party_key
+from app.game_servers.storage import StorageTimeoutError, TIMEOUT_ERROR
+from app.workers.base import QueueWorker
+from app.workers.pool_events import REGISTER_OPERATION
+
 
-class RegisterServerWorker(AmqpWorker):
+class RegisterServerWorker(QueueWorker):
     QUEUE_NAME = 'game-servers-pool.server.register'
     REQUEST_EXCHANGE_NAME = 'open-matchmaking.game-server-pool.server.register.direct'
-    RESPONSE_EXCHANGE_NAME = 'open-matchmaking.responses.direct'
-    CONTENT_TYPE = 'application/json'
 
     def __init__(self, app, *args, **kwargs):
         super(RegisterServerWorker, self).__init__(app, *args, **kwargs)
-        from app.game_servers.documents import GameServer
         from app.game_servers.schemas import RegisterGameServerSchema
-        self.game_server_document = GameServer
-        self.schema = RegisterGameServerSchema
-
-    async def validate_data(self, raw_data):
-        try:
-            data = json.loads(raw_data.strip())
-        except json.decoder.JSONDecodeError:
-            data = {}
-        deserializer = self.schema()
-        result = deserializer.load(data)
-        if result.errors:
-            raise ValidationError(result.errors)
-
-        return result.data
+        self.request_schema = RegisterGameServerSchema
 
     async def register_game_server(self, raw_data):
         try:
@@ -39,53 +24,26 @@ class RegisterServerWorker(AmqpWorker):
         except ValidationError as exc:
             return Response.from_error(VALIDATION_ERROR, exc.normalized_messages())
 
-        object_id = ObjectId(data['id']) if 'id' in data.keys() else ObjectId()
-        await self.game_server_document.collection.replace_one(
-            {'_id': object_id}, replacement=data, upsert=True
+        object_id = ObjectId(data.pop('id')) if 'id' in data.keys() else ObjectId()
+        try:
+            document = await self.storage.register(object_id, data)
+        except StorageTimeoutError as exc:
+            return Response.from_error(TIMEOUT_ERROR, str(exc))
+
+        self.app.pool_events.server_changed(
+            REGISTER_OPERATION,
+            object_id,
+            data['game_mode'],
+            data['available_slots'],
+            version=document['version']
         )
 
-        return Response.with_content({'id': str(object_id)})
-
-    async def process_request(self, channel, body, envelope, properties):
-        response = await self.register_game_server(body)
-        response.data[Response.EVENT_FIELD_NAME] = properties.correlation_id
+        content = {'id': str(object_id)}
+        # The key lets the game server check party tokens of its matches
+        secret = self.app.config["PARTY_TOKEN_SECRET"]
+        if secret:
+            content['party-key'] = get_party_key(secret, object_id)
+        return Response.with_content(content)
 
-        if properties.reply_to:
-            await channel.publish(
-                json.dumps(response.data),
-                exchange_name=self.RESPONSE_EXCHANGE_NAME,
-                routing_key=properties.reply_to,
-                properties={
-                    'content_type': self.CONTENT_TYPE,
-                    'delivery_mode': 2,
-                    'correlation_id': properties.correlation_id
-                },
-                mandatory=True
-            )
-
-        await channel.basic_client_ack(delivery_tag=envelope.delivery_tag)
-
-    async def consume_callback(self, channel, body, envelope, properties):
-        self.app.loop.create_task(self.process_request(channel, body, envelope, properties))
-
-    async def run(self, *args, **kwargs):
-        try:
-            _transport, protocol = await self.connect()
-        except AmqpClosedConnection as exc:
-            print(exc)
-            return
-
-        channel = await protocol.channel()
-        await channel.queue_declare(
-            queue_name=self.QUEUE_NAME,
-            durable=True,
-            passive=False,
-            auto_delete=False
-        )
-        await channel.queue_bind(
-            queue_name=self.QUEUE_NAME,
-            exchange_name=self.REQUEST_EXCHANGE_NAME,
-            routing_key=self.QUEUE_NAME
-        )
-        await channel.basic_qos(prefetch_count=1, prefetch_size=0, connection_global=False)
-        await channel.basic_consume(self.consume_callback, queue_name=self.QUEUE_NAME)
+    async def handle_request(self, body, envelope, properties):
+        return await self.register_game_server(body)
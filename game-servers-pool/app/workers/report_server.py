@@ -0,0 +1,44 @@
+from bson import ObjectId
+from marshmallow import ValidationError
+from sage_utils.constants import VALIDATION_ERROR, NOT_FOUND_ERROR
+from sage_utils.wrappers import Response
+
+from app.game_servers.storage import StorageTimeoutError, TIMEOUT_ERROR
+from app.workers.base import QueueWorker
+
+
+class ReportServerWorker(QueueWorker):
+    QUEUE_NAME = 'game-servers-pool.server.report'
+    REQUEST_EXCHANGE_NAME = 'open-matchmaking.game-server-pool.server.report.direct'
+
+    def __init__(self, app, *args, **kwargs):
+        super(ReportServerWorker, self).__init__(app, *args, **kwargs)
+        from app.game_servers.schemas import ReportGameServerSchema
+        self.request_schema = ReportGameServerSchema
+
+    async def report_game_server(self, raw_data):
+        try:
+            data = await self.validate_data(raw_data)
+        except ValidationError as exc:
+            return Response.from_error(VALIDATION_ERROR, exc.normalized_messages())
+
+        try:
+            document = await self.storage.report(ObjectId(data.pop('id')), data)
+        except StorageTimeoutError as exc:
+            return Response.from_error(TIMEOUT_ERROR, str(exc))
+
+        if not document:
+            return Response.from_error(
+                NOT_FOUND_ERROR,
+                "The requested game server was not found."
+            )
+
+        telemetry = document['telemetry']
+        return Response.with_content({
+            'id': str(document['id']),
+            'headroom': telemetry['headroom'],
+            'overloaded': self.storage.estimator.is_overloaded(telemetry),
+        })
+
+    async def handle_request(self, body, envelope, properties):
+        return await self.report_game_server(body)
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+
+class QueueConsumers(object):
+    """
+    Consumes the queue of a worker through a varying amount of channels.
+
+    Scaling is optional: without calling `scale` the queue is consumed
+    through the first channel only.
+
+    Every `interval` seconds the depth of the queue is polled and compared
+    with the rate of the delivered messages. When the backlog can't be
+    cleared within `drain_time` seconds, the amount of channels and the
+    prefetch are doubled. When the queue is empty, they are lowered step
+    by step. Both stay within the given bounds.
+    """
+
+    def __init__(self, worker, protocol, min_prefetch_count=1, max_prefetch_count=256,
+                 max_channels=4, interval=5.0, drain_time=1.0, clock=time.monotonic):
+        self.worker = worker
+        self.protocol = protocol
+        self.min_prefetch_count = min_prefetch_count
+        self.max_prefetch_count = max(max_prefetch_count, min_prefetch_count)
+        self.max_channels = max_channels
+        self.interval = interval
+        self.drain_time = drain_time
+        self.clock = clock
+        self.prefetch_count = min_prefetch_count
+        self.consumers = []
+        self.idle_channels = []
+        self.delivered = 0
+        self.depth = 0
+        self.rate = 0.0
+        self.stopped = False
+
+    async def consume_callback(self, channel, body, envelope, properties):
+        self.delivered += 1
+        await self.worker.consume_callback(channel, body, envelope, properties)
+
+    async def add_consumer(self, channel=None):
+        if channel is None:
+            if self.idle_channels:
+                channel = self.idle_channels.pop()
+            else:
+                channel = await self.protocol.channel()
+
+        await channel.basic_qos(
+            prefetch_count=self.prefetch_count,
+            prefetch_size=0,
+            connection_global=False
+        )
+        result = await channel.basic_consume(
+            self.consume_callback,
+            queue_name=self.worker.QUEUE_NAME
+        )
+        self.consumers.append((channel, result['consumer_tag']))
+
+    async def remove_consumer(self):
+        # Messages delivered before the cancellation are acknowledged through
+        # the same channel, so it's kept open and reused on the next scale up
+        channel, consumer_tag = self.consumers.pop()
+        await channel.basic_cancel(consumer_tag)
+        self.idle_channels.append(channel)
+
+    async def set_prefetch_count(self, prefetch_count):
+        # The prefetch of a channel applies only to consumers started after
+        # it was set, so each consumer is restarted on its channel
+        self.prefetch_count = prefetch_count
+        consumers, self.consumers = self.consumers, []
+        for channel, consumer_tag in consumers:
+            await channel.basic_cancel(consumer_tag)
+            await self.add_consumer(channel)
+
+    async def measure(self, elapsed):
+        # Restarting consumers could fail midway and leave none of them,
+        # then the queue is consumed again before being polled
+        if not self.consumers:
+            await self.add_consumer()
+        channel, _consumer_tag = self.consumers[0]
+        result = await channel.queue_declare(queue_name=self.worker.QUEUE_NAME, passive=True)
+        self.depth = result['message_count']
+        self.rate = self.delivered / elapsed if elapsed > 0 else 0.0
+        self.delivered = 0
+
+    def get_target(self):
+        channels, prefetch_count = len(self.consumers), self.prefetch_count
+        if self.depth > self.rate * self.drain_time:
+            return (
+                min(channels * 2, self.max_channels),
+                min(prefetch_count * 2, self.max_prefetch_count)
+            )
+        elif self.depth == 0:
+            return (
+                max(channels - 1, 1),
+                max(prefetch_count // 2, self.min_prefetch_count)
+            )
+        return channels, prefetch_count
+
+    async def cancel(self):
+        # No more messages are delivered, while the delivered ones can
+        # still be acknowledged until the channels are closed
+        self.stopped = True
+        while self.consumers:
+            await self.remove_consumer()
+
+    async def close(self):
+        await self.cancel()
+        while self.idle_channels:
+            channel = self.idle_channels.pop()
+            if channel.is_open:
+                await channel.close()
+
+    async def scale(self):
+        measured_at = self.clock()
+        while not self.stopped:
+            await asyncio.sleep(self.interval)
+            if self.stopped:
+                break
+
+            now = self.clock()
+            try:
+                await self.measure(now - measured_at)
+                channels, prefetch_count = self.get_target()
+                if prefetch_count != self.prefetch_count:
+                    await self.set_prefetch_count(prefetch_count)
+                while len(self.consumers) < channels:
+                    await self.add_consumer()
+                while len(self.consumers) > channels:
+                    await self.remove_consumer()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Scaling is retried on the next poll with what was left
+                print(exc)
+            measured_at = now
+
+    def get_stats(self):
+        return {
+            'depth': self.depth,
+            'rate': self.rate,
+            'channels': len(self.consumers),
+            'prefetch-count': self.prefetch_count,
+        }
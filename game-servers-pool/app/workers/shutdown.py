@@ -0,0 +1,27 @@
+import time
+
+
+async def drain_workers(app, timeout):
+    """
+    Stops consuming requests and lets the delivered ones finish before
+    the connections are closed, so that no request is interrupted after
+    the pool was changed but before the reply and the acknowledgement.
+    Requests left after `timeout` seconds are redelivered by RabbitMQ.
+    """
+    deadline = time.monotonic() + timeout
+    workers = [worker for worker in app.amqp.workers if getattr(worker, 'consumers', None)]
+    for worker in workers:
+        await worker.consumers.cancel()
+
+    # Batched allocations are placed right away instead of waiting the window
+    if app.allocation_coalescer:
+        app.allocation_coalescer.flush_all()
+
+    if not await app.request_scheduler.join(max(deadline - time.monotonic(), 0)):
+        print("Stopped with {} unfinished requests.".format(app.request_scheduler.pending))
+
+    if not await app.pool_events.flush(max(deadline - time.monotonic(), 0)):
+        print("Stopped with unpublished pool events.")
+
+    for worker in workers:
+        await worker.consumers.close()
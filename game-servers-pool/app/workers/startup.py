@@ -0,0 +1,85 @@
+import asyncio
+import multiprocessing
+import os
+import time
+
+from app.workers.microservice_register import MicroserviceRegisterWorker
+
+
+AMQP_READY_TIMEOUT = 30
+AMQP_READY_POLL_INTERVAL = 0.01
+
+
+async def measure(name, awaitable, timings):
+    started_at = time.monotonic()
+    try:
+        return await awaitable
+    finally:
+        timings[name] = time.monotonic() - started_at
+
+
+def format_timings(total, timings):
+    return "Started in {:.3f}s: {}.".format(total, ', '.join(
+        "{} {:.3f}s".format(name, elapsed) for name, elapsed in sorted(timings.items())
+    ))
+
+
+def create_primary_flag():
+    # Shared by the processes forked by the HTTP server, see `claim_primary`
+    return multiprocessing.Value('i', 0)
+
+
+def claim_primary(app):
+    """
+    Returns whether the current process is the primary one. Processes forked
+    by the HTTP server share `app.primary_flag` and the first one to claim it
+    becomes the primary, other processes are told by `app.is_primary`.
+    """
+    flag = getattr(app, 'primary_flag', None)
+    if flag is None:
+        return getattr(app, 'is_primary', True)
+
+    with flag.get_lock():
+        if not flag.value:
+            flag.value = os.getpid()
+        return flag.value == os.getpid()
+
+
+async def start_services(app, loop):
+    """
+    Warms up the connection to MongoDB and checks the indexes concurrently
+    in each process, instead of one after another. The primary process also
+    registers the microservice at the same time. Returns the timings.
+    """
+    # Only the primary process tracks the capacity of the shared pool and
+    # registers the microservice. Workers are started before, but check it
+    # only after connecting to RabbitMQ
+    app.is_primary = claim_primary(app)
+    if not app.is_primary:
+        app.pool_events.tracks_capacity = False
+
+    steps = [('storage', app.storage.init())]
+    if app.config["STORAGE_BACKEND"] == 'mongodb':
+        steps.append(('mongodb', app.mongodb.admin.command('ping')))
+    if app.is_primary and app.config["MICROSERVICE_REGISTRATION_ENABLED"]:
+        steps.append(('registration', MicroserviceRegisterWorker(app).run(loop=loop)))
+
+    loop.create_task(wait_for_consumers(app))
+    timings = {}
+    started_at = time.monotonic()
+    await asyncio.gather(*[measure(name, step, timings) for name, step in steps])
+    print(format_timings(time.monotonic() - started_at, timings))
+    return timings
+
+
+async def wait_for_consumers(app, timeout=AMQP_READY_TIMEOUT):
+    # Workers set up their channels in the background, so they are
+    # considered ready once all of them consume their queues
+    started_at = time.monotonic()
+    workers = [worker for worker in app.amqp.workers if hasattr(worker, 'QUEUE_NAME')]
+    while any(worker.consumers is None for worker in workers):
+        if time.monotonic() - started_at > timeout:
+            print("AMQP workers aren't ready after {}s.".format(timeout))
+            return
+        await asyncio.sleep(AMQP_READY_POLL_INTERVAL)
+    print("AMQP workers are ready in {:.3f}s.".format(time.monotonic() - started_at))
@@ -0,0 +1,194 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import signal
+import time
+from functools import partial
+from multiprocessing.connection import wait
+
+from sanic.server import trigger_events
+
+
+SERVER_EVENTS = (
+    ('before_server_start', False),
+    ('after_server_start', False),
+)
+STOP_EVENTS = (
+    ('before_server_stop', True),
+    ('after_server_stop', True),
+)
+
+
+def select_workers(workers, queue_names=None):
+    """
+    Returns workers consuming the given queues. Workers without a queue,
+    like the publisher of pool events, are always kept, because the others
+    rely on them.
+    """
+    if not queue_names:
+        return list(workers)
+
+    known = {worker.QUEUE_NAME for worker in workers if hasattr(worker, 'QUEUE_NAME')}
+    unknown = set(queue_names) - known
+    if unknown:
+        raise ValueError("Unknown queues: {}.".format(', '.join(sorted(unknown))))
+
+    return [
+        worker for worker in workers
+        if not hasattr(worker, 'QUEUE_NAME') or worker.QUEUE_NAME in queue_names
+    ]
+
+
+def get_process_plan(groups, cpus=None):
+    """
+    Expands `[(queue_names, processes), ...]` into a list of
+    `(queue_names, cpu)` items, one per process. When `cpus` are given,
+    processes are pinned to them in turns.
+    """
+    plan = []
+    for queue_names, processes in groups:
+        for _ in range(processes):
+            cpu = cpus[len(plan) % len(cpus)] if cpus else None
+            plan.append((queue_names, cpu))
+    return plan
+
+
+def set_max_pool_size(uri, max_pool_size):
+    if 'maxPoolSize=' in uri:
+        return re.sub(r'maxPoolSize=\d+', 'maxPoolSize={}'.format(max_pool_size), uri)
+    separator = '&' if '?' in uri else '?'
+    return '{}{}maxPoolSize={}'.format(uri, separator, max_pool_size)
+
+
+def get_listeners(app, events):
+    listeners = []
+    for event, reverse in events:
+        event_listeners = list(app.listeners[event])
+        if reverse:
+            event_listeners.reverse()
+        listeners.extend(partial(listener, app) for listener in event_listeners)
+    return listeners
+
+
+def run_consumer(app, queue_names, cpu=None, primary=True, max_pool_size=None):
+    """
+    Runs the AMQP workers of the application in the current process,
+    going through the same lifecycle events as the HTTP server. Only
+    the primary process tracks the capacity of the pool.
+    """
+    # Interruptions are handled by the supervisor, which stops all processes
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if cpu is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, {cpu})
+    if max_pool_size:
+        app.config["MONGODB_URI"] = set_max_pool_size(app.config["MONGODB_URI"], max_pool_size)
+    app.amqp.workers[:] = select_workers(app.amqp.workers, queue_names)
+    app.is_primary = primary
+    app.pool_events.tracks_capacity = primary
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    # Workers schedule their tasks via `app.loop`, which is available
+    # only while the application is running
+    app.is_running = True
+    try:
+        trigger_events(get_listeners(app, SERVER_EVENTS), loop)
+        loop.add_signal_handler(signal.SIGTERM, loop.stop)
+        loop.run_forever()
+    finally:
+        app.is_running = False
+        trigger_events(get_listeners(app, STOP_EVENTS), loop)
+        loop.close()
+
+
+class ConsumerSupervisor(object):
+    """
+    Starts a process per item of the plan and restarts the processes that
+    exit. A process that failed soon after the start is restarted with an
+    exponentially growing delay, up to `max_restart_delay` seconds.
+
+    The process of the first item is the primary one, also when restarted.
+    """
+
+    def __init__(self, target, plan, restart_delay=1.0, max_restart_delay=30.0,
+                 stop_timeout=10.0, clock=time.monotonic):
+        self.target = target
+        self.plan = plan
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stop_timeout = stop_timeout
+        self.clock = clock
+        self.processes = {}
+        self.started_at = {}
+        self.failures = {}
+        self.pending = {}
+        self.stopping = False
+
+    def start(self, index):
+        queue_names, cpu = self.plan[index]
+        process = multiprocessing.Process(
+            target=self.target,
+            args=(queue_names, cpu, index == 0),
+            name='consumer-{}'.format(index)
+        )
+        process.start()
+        self.processes[index] = process
+        self.started_at[index] = self.clock()
+
+    def get_restart_delay(self, index):
+        now = self.clock()
+        if now - self.started_at[index] >= self.max_restart_delay:
+            self.failures[index] = 0
+        failures = self.failures.get(index, 0)
+        self.failures[index] = failures + 1
+        return min(self.restart_delay * 2 ** failures, self.max_restart_delay)
+
+    def check(self):
+        now = self.clock()
+        for index, process in list(self.processes.items()):
+            if not process.is_alive():
+                del self.processes[index]
+                delay = self.get_restart_delay(index)
+                print("Consumer {} exited with code {}, restarting in {:.1f}s.".format(
+                    process.name, process.exitcode, delay
+                ))
+                self.pending[index] = now + delay
+
+        for index, restart_at in list(self.pending.items()):
+            if restart_at <= now:
+                del self.pending[index]
+                self.start(index)
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def terminate(self):
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = self.clock() + self.stop_timeout
+        for process in self.processes.values():
+            process.join(max(deadline - self.clock(), 0))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for index in range(len(self.plan)):
+            self.start(index)
+        try:
+            while not self.stopping:
+                sentinels = [process.sentinel for process in self.processes.values()]
+                if sentinels:
+                    wait(sentinels, timeout=1.0)
+                else:
+                    time.sleep(min(1.0, self.restart_delay))
+                self.check()
+        finally:
+            self.terminate()
@@ -0,0 +1,42 @@
+from bson import ObjectId
+from marshmallow import ValidationError
+from sage_utils.constants import VALIDATION_ERROR, NOT_FOUND_ERROR
+from sage_utils.wrappers import Response
+
+from app.game_servers.storage import StorageTimeoutError, TIMEOUT_ERROR
+from app.workers.base import QueueWorker
+
+
+class UnregisterServerWorker(QueueWorker):
+    QUEUE_NAME = 'game-servers-pool.server.unregister'
+    REQUEST_EXCHANGE_NAME = 'open-matchmaking.game-server-pool.server.unregister.direct'
+
+    def __init__(self, app, *args, **kwargs):
+        super(UnregisterServerWorker, self).__init__(app, *args, **kwargs)
+        from app.game_servers.schemas import UnregisterGameServerSchema
+        self.request_schema = UnregisterGameServerSchema
+
+    async def unregister_game_server(self, raw_data):
+        try:
+            data = await self.validate_data(raw_data)
+        except ValidationError as exc:
+            return Response.from_error(VALIDATION_ERROR, exc.normalized_messages())
+
+        try:
+            document = await self.storage.evict(ObjectId(data['id']))
+        except StorageTimeoutError as exc:
+            return Response.from_error(TIMEOUT_ERROR, str(exc))
+
+        if not document:
+            return Response.from_error(
+                NOT_FOUND_ERROR,
+                "The requested game server was not found."
+            )
+
+        self.app.pool_events.server_removed(
+            document['id'], document['game_mode'], version=document['version']
+        )
+        return Response.with_content({'id': str(document['id'])})
+
+    async def handle_request(self, body, envelope, properties):
+        return await self.unregister_game_server(body)
@@ -0,0 +1,106 @@
+"""
+Compares the latency of allocations over AMQP RPC and over HTTP.
+
+Requires a running instance of the microservice with RabbitMQ and MongoDB:
+
+    APP_CONFIG_PATH=./config.py python -m benchmarks.allocation_latency \
+        --http-host 127.0.0.1 --http-port 8000 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from uuid import uuid4
+
+from app import app
+from app.workers import GetServerWorker, RegisterServerWorker, UnregisterServerWorker
+from benchmarks.clients import HttpClient, RpcClient, percentile
+
+
+RETRIEVE_PATH = '/game-servers-pool/api/servers/retrieve'
+
+
+def summarize(latencies):
+    return {
+        'requests': len(latencies),
+        'mean-ms': sum(latencies) / len(latencies) * 1000.0,
+        'p50-ms': percentile(latencies, 50) * 1000.0,
+        'p99-ms': percentile(latencies, 99) * 1000.0,
+        'max-ms': max(latencies) * 1000.0,
+    }
+
+
+async def measure(request, payload, count):
+    latencies = []
+    for _ in range(count):
+        started_at = time.perf_counter()
+        await request(payload)
+        latencies.append(time.perf_counter() - started_at)
+    return latencies
+
+
+async def benchmark(options):
+    game_mode = 'benchmark-{}'.format(uuid4().hex)
+    total = (options.requests + options.warmup) * 2
+    payload = {'required-slots': 1, 'game-mode': game_mode}
+
+    register_client = RpcClient(
+        app, RegisterServerWorker.QUEUE_NAME, RegisterServerWorker.REQUEST_EXCHANGE_NAME
+    )
+    response = await register_client.call({
+        'host': '127.0.0.1',
+        'port': 9000,
+        'available-slots': total,
+        'game-mode': game_mode,
+    })
+    server_id = response['content']['id']
+
+    amqp_client = RpcClient(
+        app, GetServerWorker.QUEUE_NAME, GetServerWorker.REQUEST_EXCHANGE_NAME
+    )
+    http_client = HttpClient(options.http_host, options.http_port)
+
+    async def amqp_request(data):
+        return await amqp_client.call(data)
+
+    async def http_request(data):
+        return await http_client.post(RETRIEVE_PATH, data)
+
+    try:
+        await measure(amqp_request, payload, options.warmup)
+        await measure(http_request, payload, options.warmup)
+        amqp_latencies = await measure(amqp_request, payload, options.requests)
+        http_latencies = await measure(http_request, payload, options.requests)
+    finally:
+        unregister_client = RpcClient(
+            app,
+            UnregisterServerWorker.QUEUE_NAME,
+            UnregisterServerWorker.REQUEST_EXCHANGE_NAME
+        )
+        await unregister_client.call({'id': server_id})
+        for client in (register_client, unregister_client, amqp_client, http_client):
+            await client.close()
+
+    return {
+        'amqp': summarize(amqp_latencies),
+        'http': summarize(http_latencies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--http-host', default='127.0.0.1')
+    parser.add_argument('--http-port', type=int, default=8000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=100)
+    options = parser.parse_args(argv)
+
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(benchmark(options))
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import math
+from uuid import uuid4
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = max(0, math.ceil(percent / 100.0 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class RpcClient(object):
+    """
+    RPC client over RabbitMQ which keeps its connection and its reply queue
+    open between requests, unlike `sage_utils.amqp.clients.RpcAmqpClient`.
+    """
+    CONTENT_TYPE = 'application/json'
+
+    def __init__(self, app, routing_key, request_exchange,
+                 response_exchange='open-matchmaking.responses.direct'):
+        self.app = app
+        self.routing_key = routing_key
+        self.request_exchange = request_exchange
+        self.response_exchange = response_exchange
+        self.transport = None
+        self.protocol = None
+        self.channel = None
+        self.queue_name = None
+        self.waiters = {}
+
+    async def connect(self):
+        self.transport, self.protocol = await self.app.amqp.connect()
+        self.channel = await self.protocol.channel()
+        result = await self.channel.queue_declare(
+            queue_name='',
+            exclusive=True,
+            durable=False,
+            passive=False,
+            auto_delete=True
+        )
+        self.queue_name = result['queue']
+        await self.channel.queue_bind(
+            queue_name=self.queue_name,
+            exchange_name=self.response_exchange,
+            routing_key=self.queue_name
+        )
+        await self.channel.basic_consume(self.on_response, queue_name=self.queue_name, no_ack=True)
+
+    async def on_response(self, _channel, body, _envelope, properties):
+        waiter = self.waiters.pop(properties.correlation_id, None)
+        if waiter and not waiter.done():
+            waiter.set_result(json.loads(body))
+
+    async def call(self, payload, timeout=None):
+        if not self.protocol:
+            await self.connect()
+
+        correlation_id = uuid4().hex
+        waiter = asyncio.get_event_loop().create_future()
+        self.waiters[correlation_id] = waiter
+        await self.channel.publish(
+            json.dumps(payload),
+            exchange_name=self.request_exchange,
+            routing_key=self.routing_key,
+            properties={
+                'content_type': self.CONTENT_TYPE,
+                'delivery_mode': 2,
+                'correlation_id': correlation_id,
+                'reply_to': self.queue_name,
+            }
+        )
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        finally:
+            self.waiters.pop(correlation_id, None)
+
+    async def close(self):
+        if self.protocol:
+            await self.protocol.close()
+        if self.transport:
+            self.transport.close()
+        self.protocol = None
+        self.transport = None
+
+
+class HttpClient(object):
+    """
+    Minimal HTTP/1.1 client that reuses one keep-alive connection.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def post(self, path, payload):
+        if not self.writer:
+            await self.connect()
+
+        body = json.dumps(payload).encode('utf-8')
+        head = (
+            'POST {} HTTP/1.1\r\n'
+            'Host: {}:{}\r\n'
+            'Content-Type: application/json\r\n'
+            'Content-Length: {}\r\n'
+            'Connection: keep-alive\r\n'
+            '\r\n'
+        ).format(path, self.host, self.port, len(body))
+        self.writer.write(head.encode('latin-1') + body)
+
+        status_line = await self.reader.readline()
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, value = line.decode('latin-1').split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+        content = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        return int(status_line.split()[1]), json.loads(content)
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+        self.reader = None
+        self.writer = None
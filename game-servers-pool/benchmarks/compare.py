@@ -0,0 +1,52 @@
+"""
+Compares two results of `benchmarks.workers` and reports regressions.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+
+KEY_FIELDS = ('storage', 'worker', 'pool-size', 'game-modes')
+LINE_FORMAT = '{:<12} {:<22} pool={:<7} modes={:<3} {:>10.0f} -> {:>10.0f} msg/s ({:+.1f}%)'
+
+
+def load_results(path):
+    with open(path) as source:
+        results = json.load(source)['results']
+    return {tuple(result[field] for field in KEY_FIELDS): result for result in results}
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    for key in sorted(set(baseline.keys()) & set(current.keys())):
+        before, after = baseline[key], current[key]
+        change = (after['messages-per-second'] / before['messages-per-second'] - 1) * 100.0
+        line = LINE_FORMAT.format(
+            *key, before['messages-per-second'], after['messages-per-second'], change
+        )
+        print(line)
+        if change < -threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Allowed drop of throughput in percents.')
+    options = parser.parse_args(argv)
+
+    regressions = compare(
+        load_results(options.baseline), load_results(options.current), options.threshold
+    )
+    if regressions:
+        print('\n{} regression(s) found.'.format(len(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Open-loop traffic generator for a running instance of the microservice.
+
+Register, retrieve and free requests are sent at the target rate with
+Poisson arrivals against a dedicated game mode, so the final slot
+accounting isn't affected by other clients of the pool.
+"""
+import asyncio
+import random
+import time
+from uuid import uuid4
+
+from benchmarks.clients import RpcClient, percentile
+
+
+REGISTER = 'register'
+RETRIEVE = 'retrieve'
+FREE = 'free'
+
+
+def parse_mix(value):
+    weights = [float(weight) for weight in str(value).split(':')]
+    if len(weights) != 3 or sum(weights) <= 0 or min(weights) < 0:
+        raise ValueError("The mix must be in the `register:retrieve:free` format.")
+    return dict(zip((REGISTER, RETRIEVE, FREE), weights))
+
+
+def summarize(latencies):
+    if not latencies:
+        return {'requests': 0}
+    return {
+        'requests': len(latencies),
+        'p50-ms': percentile(latencies, 50) * 1000.0,
+        'p95-ms': percentile(latencies, 95) * 1000.0,
+        'p99-ms': percentile(latencies, 99) * 1000.0,
+        'max-ms': max(latencies) * 1000.0,
+    }
+
+
+class LoadTest(object):
+
+    def __init__(self, app, game_server_document, rate=100.0, duration=30.0, mix='1:8:4',
+                 servers=10, slots=100, max_required_slots=4, timeout=5.0):
+        from app.workers import GetServerWorker, RegisterServerWorker, UpdateServerWorker
+        self.app = app
+        self.game_server_document = game_server_document
+        self.rate = rate
+        self.duration = duration
+        self.mix = parse_mix(mix)
+        self.servers = servers
+        self.slots = slots
+        self.max_required_slots = max_required_slots
+        self.timeout = timeout
+        self.game_mode = 'loadtest-{}'.format(uuid4().hex)
+
+        self.clients = {
+            REGISTER: RpcClient(app, RegisterServerWorker.QUEUE_NAME,
+                                RegisterServerWorker.REQUEST_EXCHANGE_NAME),
+            RETRIEVE: RpcClient(app, GetServerWorker.QUEUE_NAME,
+                                GetServerWorker.REQUEST_EXCHANGE_NAME),
+            FREE: RpcClient(app, UpdateServerWorker.QUEUE_NAME,
+                            UpdateServerWorker.REQUEST_EXCHANGE_NAME),
+        }
+        self.latencies = {REGISTER: [], RETRIEVE: [], FREE: []}
+        self.addresses = {}
+        self.next_port = 10000
+        self.allocations = []
+        self.expected_slots = 0
+        self.retrieve_attempts = 0
+        self.empty_allocations = 0
+        self.skipped = 0
+        self.unresolved_frees = 0
+        self.errors = 0
+
+    async def call(self, operation, payload):
+        """
+        Returns the response of a successful request, or `None` when it
+        timed out or failed.
+        """
+        started_at = time.perf_counter()
+        try:
+            response = await self.clients[operation].call(payload, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.errors += 1
+            return None
+
+        self.latencies[operation].append(time.perf_counter() - started_at)
+        if 'error' in response.keys():
+            self.errors += 1
+            return None
+        return response
+
+    async def register(self):
+        port = self.next_port
+        self.next_port += 1
+        response = await self.call(REGISTER, {
+            'host': '127.0.0.1',
+            'port': port,
+            'available-slots': self.slots,
+            'game-mode': self.game_mode,
+        })
+        if response is not None:
+            self.addresses[('127.0.0.1', port)] = response['content']['id']
+            self.expected_slots += self.slots
+
+    async def retrieve(self):
+        required_slots = random.randint(1, self.max_required_slots)
+        self.retrieve_attempts += 1
+        response = await self.call(RETRIEVE, {
+            'required-slots': required_slots,
+            'game-mode': self.game_mode,
+        })
+        if response is None:
+            return
+
+        content = response['content']
+        if content is None:
+            self.empty_allocations += 1
+            return
+
+        # The server is resolved later, since it may be allocated
+        # before its registration reply has been received
+        self.allocations.append(((content['host'], content['port']), required_slots))
+        self.expected_slots -= required_slots
+
+    async def free(self):
+        if not self.allocations:
+            self.skipped += 1
+            return
+
+        index = random.randrange(len(self.allocations))
+        allocations = self.allocations
+        address, freed_slots = allocations[index]
+        # Registration replies of the server may be late or lost, then the
+        # allocation is kept for a later free request
+        server_id = self.addresses.get(address, None)
+        if server_id is None:
+            self.unresolved_frees += 1
+            return
+
+        allocations[index], allocations[-1] = allocations[-1], allocations[index]
+        allocations.pop()
+        response = await self.call(FREE, {'id': server_id, 'freed-slots': freed_slots})
+        if response is not None:
+            self.expected_slots += freed_slots
+
+    async def get_actual_slots(self):
+        pipeline = [
+            {'$match': {'game_mode': self.game_mode}},
+            {'$group': {'_id': None, 'total': {'$sum': '$available_slots'}}},
+        ]
+        result = await self.game_server_document.collection.aggregate(pipeline).to_list(1)
+        return result[0]['total'] if result else 0
+
+    async def run(self):
+        try:
+            return await self.generate()
+        finally:
+            await self.game_server_document.collection.delete_many({'game_mode': self.game_mode})
+            for client in self.clients.values():
+                await client.close()
+
+    async def generate(self):
+        loop = asyncio.get_event_loop()
+        for _ in range(self.servers):
+            await self.register()
+        for latencies in self.latencies.values():
+            latencies.clear()
+
+        operations = list(self.mix.keys())
+        weights = [self.mix[operation] for operation in operations]
+        handlers = {REGISTER: self.register, RETRIEVE: self.retrieve, FREE: self.free}
+
+        tasks = []
+        started_at = loop.time()
+        next_arrival = started_at
+        while True:
+            next_arrival += random.expovariate(self.rate)
+            if next_arrival - started_at >= self.duration:
+                break
+
+            await asyncio.sleep(max(0.0, next_arrival - loop.time()))
+            operation = random.choices(operations, weights)[0]
+            tasks.append(loop.create_task(handlers[operation]()))
+
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started_at
+
+        actual_slots = await self.get_actual_slots()
+        attempts = self.retrieve_attempts
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        return {
+            'game-mode': self.game_mode,
+            'duration-s': elapsed,
+            'target-rate': self.rate,
+            'throughput': len(all_latencies) / elapsed,
+            'latency': summarize(all_latencies),
+            'operations': {
+                operation: summarize(latencies)
+                for operation, latencies in self.latencies.items()
+            },
+            'empty-allocation-rate': self.empty_allocations / attempts if attempts else 0.0,
+            'skipped-frees': self.skipped,
+            'unresolved-frees': self.unresolved_frees,
+            'errors': self.errors,
+            'expected-slots': self.expected_slots,
+            'actual-slots': actual_slots,
+            'slot-accounting-error': actual_slots - self.expected_slots,
+        }
@@ -0,0 +1,132 @@
+"""
+Memory benchmark of the in-process representations of the pool.
+
+Measures the bytes per server kept by the compact pool store, compared
+with a document per server (as the in-memory storage keeps them) and with
+the tuples previously used by the capacity tracker (without hosts and ports):
+
+    APP_CONFIG_PATH=./config.py python -m benchmarks.pool_memory --output results.json
+"""
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+
+from bson import ObjectId
+
+from app.game_servers.pool_store import PoolStore
+
+
+DEFAULT_POOL_SIZES = '10000,100000,1000000'
+DEFAULT_GAME_MODES = 8
+DEFAULT_MAX_BASELINE_SIZE = 100000
+# Game servers of a host share its address and listen on different ports
+SERVERS_PER_HOST = 16
+
+
+def generate_servers(pool_size, game_modes):
+    for index in range(pool_size):
+        host_index = index // SERVERS_PER_HOST
+        yield (
+            ObjectId(),
+            '10.{}.{}.{}'.format(
+                host_index // 65536 % 256, host_index // 256 % 256, host_index % 256
+            ),
+            9000 + index % SERVERS_PER_HOST,
+            index % 100,
+            'game-mode-{}'.format(index % game_modes),
+        )
+
+
+def fill_documents(servers):
+    documents = {}
+    for server_id, host, port, available_slots, game_mode in servers:
+        documents[server_id] = {
+            'id': server_id,
+            'host': host,
+            'port': port,
+            'available_slots': available_slots,
+            'game_mode': game_mode,
+        }
+    return documents
+
+
+def fill_tuples(servers):
+    tuples = {}
+    for server_id, host, port, available_slots, game_mode in servers:
+        tuples[str(server_id)] = (game_mode, available_slots)
+    return tuples
+
+
+def fill_pool_store(servers):
+    store = PoolStore()
+    for server_id, host, port, available_slots, game_mode in servers:
+        store.add(server_id, game_mode, available_slots, host=host, port=port)
+    return store
+
+
+REPRESENTATIONS = [
+    ('pool-store', fill_pool_store, False),
+    ('documents', fill_documents, True),
+    ('tuples', fill_tuples, True),
+]
+
+
+def measure(fill, pool_size, game_modes):
+    tracemalloc.start()
+    try:
+        # Only memory still referenced by the filled representation is
+        # counted, the generated servers are released as they are consumed
+        before = tracemalloc.get_traced_memory()[0]
+        representation = fill(generate_servers(pool_size, game_modes))
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del representation
+    return {
+        'bytes': used,
+        'bytes-per-server': round(used / pool_size, 1),
+    }
+
+
+def benchmark(options):
+    results = []
+    for pool_size in options.pool_sizes:
+        for name, fill, is_baseline in REPRESENTATIONS:
+            if is_baseline and pool_size > options.max_baseline_size:
+                continue
+            result = measure(fill, pool_size, options.game_modes)
+            result.update({'representation': name, 'pool-size': pool_size})
+            results.append(result)
+    return results
+
+
+def to_int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pool-sizes', type=to_int_list, default=DEFAULT_POOL_SIZES)
+    parser.add_argument('--game-modes', type=int, default=DEFAULT_GAME_MODES)
+    parser.add_argument('--max-baseline-size', type=int, default=DEFAULT_MAX_BASELINE_SIZE)
+    parser.add_argument('--output', '-o', default=None)
+    options = parser.parse_args(argv)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': benchmark(options),
+    }
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
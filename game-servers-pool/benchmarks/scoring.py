@@ -0,0 +1,116 @@
+"""
+Benchmark of scoring the candidates of a game mode on allocations.
+
+Compares scoring all servers of a single game mode in one NumPy pass over
+the columns of the pool store with the pure-Python loop (NumPy must be
+installed for the former):
+
+    APP_CONFIG_PATH=./config.py python -m benchmarks.scoring --output results.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from bson import ObjectId
+
+from app.game_servers import scoring
+from app.game_servers.pool_store import PoolStore
+from app.game_servers.scoring import CandidateScorer
+from app.game_servers.telemetry import LoadEstimator
+
+
+DEFAULT_POOL_SIZES = '10000,100000,1000000'
+REGIONS = ['eu-west', 'eu-central', 'us-east', 'us-west', 'ap-south']
+TAGS = ['dedicated', 'ranked', 'beta']
+
+
+def create_pool(pool_size, now):
+    store = PoolStore()
+    for _ in range(pool_size):
+        server_id = ObjectId()
+        store.add(
+            server_id,
+            'battle-royale',
+            random.randint(0, 100),
+            region=random.choice(REGIONS),
+            tags=random.sample(TAGS, random.randint(0, len(TAGS)))
+        )
+        if random.random() < 0.8:
+            store.set_headroom(server_id, random.random(), now + 60)
+    return store
+
+
+def measure(scorer, store, requests):
+    rows = []
+    started_at = time.perf_counter()
+    for _ in range(requests):
+        rows.append(scorer.choose(store, 'battle-royale', 4))
+    elapsed = time.perf_counter() - started_at
+    return rows, {
+        'requests': requests,
+        'milliseconds-per-request': round(elapsed / requests * 1000, 3),
+    }
+
+
+def benchmark(options):
+    estimator = LoadEstimator()
+    scorer_options = {
+        'region_penalties': {'us-east': 0.5, 'ap-south': 1.0},
+        'tag_preferences': {'dedicated': 0.2},
+    }
+    scorers = [('python', CandidateScorer(estimator, use_numpy=False, **scorer_options))]
+    if scoring.numpy is not None:
+        scorers.append(('numpy', CandidateScorer(estimator, use_numpy=True, **scorer_options)))
+    else:
+        print("NumPy isn't installed, only the Python loop is measured.", file=sys.stderr)
+
+    results = []
+    for pool_size in options.pool_sizes:
+        store = create_pool(pool_size, estimator.clock())
+        chosen_rows = {}
+        for name, scorer in scorers:
+            requests = max(1, options.requests * options.pool_sizes[0] // pool_size)
+            chosen_rows[name], result = measure(scorer, store, requests)
+            result.update({'scoring': name, 'pool-size': pool_size})
+            results.append(result)
+
+        # Both implementations must agree on the chosen servers
+        if len(set(rows[0] for rows in chosen_rows.values())) != 1:
+            raise RuntimeError("Scorers chose different servers at {}.".format(pool_size))
+    return results
+
+
+def to_int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pool-sizes', type=to_int_list, default=DEFAULT_POOL_SIZES)
+    # Amount of requests at the smallest pool size, it's scaled down for bigger pools
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', default=None)
+    options = parser.parse_args(argv)
+    random.seed(options.seed)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': scoring.numpy.__version__ if scoring.numpy is not None else None,
+        'results': benchmark(options),
+    }
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+"""
+In-process stand-ins for the RabbitMQ channel and the Motor collection,
+implementing only the subset of their API used by the workers.
+"""
+import random
+from collections import namedtuple
+from copy import deepcopy
+
+from bson import ObjectId
+
+from app.game_servers.storage.memory import IdentifiersSet
+
+
+FakeEnvelope = namedtuple('FakeEnvelope', ['delivery_tag', 'is_redeliver'])
+
+
+class FakeProperties(object):
+
+    def __init__(self, correlation_id=None, reply_to=None, message_id=None):
+        self.correlation_id = correlation_id
+        self.reply_to = reply_to
+        self.message_id = message_id
+
+
+class FakeChannel(object):
+
+    def __init__(self):
+        self.published = 0
+        self.acked = 0
+
+    async def publish(self, payload, exchange_name, routing_key, properties=None,
+                      mandatory=False, immediate=False):
+        self.published += 1
+
+    async def basic_client_ack(self, delivery_tag, multiple=False):
+        self.acked += 1
+
+
+class FakeCursor(object):
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length):
+        return self.documents if length is None else self.documents[:length]
+
+    def __aiter__(self):
+        self._iterator = iter(self.documents)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def get_field(document, key):
+    value = document
+    for part in key.split('.'):
+        value = value.get(part, None) if isinstance(value, dict) else None
+    return value
+
+
+def matches_condition(value, condition):
+    if not isinstance(condition, dict):
+        return value == condition
+
+    for operator, operand in condition.items():
+        if operator == '$gte' and not (value is not None and value >= operand):
+            return False
+        if operator == '$gt' and not (value is not None and value > operand):
+            return False
+        if operator == '$lte' and not (value is not None and value <= operand):
+            return False
+        if operator == '$in' and value not in operand:
+            return False
+        if operator == '$all' and not set(operand).issubset(value or ()):
+            return False
+        if operator == '$not' and matches_condition(value, operand):
+            return False
+    return True
+
+
+def matches(document, query):
+    for key, condition in query.items():
+        if key == '$and':
+            if not all(matches(document, subquery) for subquery in condition):
+                return False
+        elif not matches_condition(get_field(document, key), condition):
+            return False
+    return True
+
+
+def project(document, projection):
+    if not projection:
+        return deepcopy(document)
+
+    included = {key for key, value in projection.items() if value}
+    if included:
+        return {key: deepcopy(value) for key, value in document.items()
+                if key in included or key == '_id'}
+    return {key: deepcopy(value) for key, value in document.items() if key not in projection}
+
+
+class FakeCollection(object):
+    """
+    Collection of documents indexed by the `_id` and `game_mode` fields.
+
+    The `$sample` stage probes random documents of the requested game mode
+    before falling back to a full scan, so that its cost doesn't dominate
+    the measurements of the workers.
+    """
+    SAMPLE_PROBES = 16
+
+    def __init__(self):
+        self.documents = {}
+        self.game_modes = {}
+
+    def _index(self, document):
+        ids = self.game_modes.setdefault(document.get('game_mode', None), IdentifiersSet())
+        ids.add(document['_id'])
+
+    def _unindex(self, document):
+        self.game_modes[document.get('game_mode', None)].discard(document['_id'])
+
+    def _candidates(self, query):
+        ids = query.get('_id', None)
+        if isinstance(ids, dict) and '$in' in ids:
+            return [document_id for document_id in ids['$in'] if document_id in self.documents]
+
+        game_mode = query.get('game_mode', None)
+        for subquery in query.get('$and', []):
+            game_mode = subquery.get('game_mode', game_mode)
+
+        if isinstance(game_mode, str):
+            ids = self.game_modes[game_mode].items if game_mode in self.game_modes else []
+        else:
+            ids = list(self.documents.keys())
+        return ids
+
+    def _sample(self, query, size):
+        ids = self._candidates(query)
+        sampled = {}
+        for _ in range(self.SAMPLE_PROBES if ids else 0):
+            document = self.documents[random.choice(ids)]
+            if matches(document, query):
+                sampled[document['_id']] = document
+            if len(sampled) >= size:
+                return list(sampled.values())
+
+        documents = [self.documents[i] for i in ids if matches(self.documents[i], query)]
+        return random.sample(documents, min(size, len(documents)))
+
+    def _find_one_raw(self, query):
+        if '_id' in query.keys():
+            document = self.documents.get(query['_id'], None)
+            return document if document and matches(document, query) else None
+        for document_id in self._candidates(query):
+            if matches(self.documents[document_id], query):
+                return self.documents[document_id]
+        return None
+
+    async def insert_one(self, document):
+        document = deepcopy(document)
+        document.setdefault('_id', ObjectId())
+        self.documents[document['_id']] = document
+        self._index(document)
+        return document['_id']
+
+    async def find_one(self, query, projection=None, **kwargs):
+        document = self._find_one_raw(query)
+        return project(document, projection) if document else None
+
+    def find(self, query=None, projection=None, **kwargs):
+        query = query or {}
+        documents = [
+            project(self.documents[document_id], projection)
+            for document_id in self._candidates(query)
+            if matches(self.documents[document_id], query)
+        ]
+        return FakeCursor(documents)
+
+    async def count_documents(self, query):
+        return len(self.find(query).documents)
+
+    def with_options(self, **kwargs):
+        return self
+
+    def aggregate(self, pipeline, **kwargs):
+        documents = None
+        if len(pipeline) > 1 and '$match' in pipeline[0] and '$sample' in pipeline[1]:
+            documents = self._sample(pipeline[0]['$match'], pipeline[1]['$sample']['size'])
+            pipeline = pipeline[2:]
+
+        for stage in pipeline:
+            if '$match' in stage.keys():
+                query = stage['$match']
+                documents = [
+                    self.documents[document_id]
+                    for document_id in self._candidates(query)
+                    if matches(self.documents[document_id], query)
+                ] if documents is None else [doc for doc in documents if matches(doc, query)]
+            elif '$sample' in stage.keys():
+                size = stage['$sample']['size']
+                documents = random.sample(documents, min(size, len(documents)))
+            elif '$addFields' in stage.keys():
+                documents = [deepcopy(document) for document in documents]
+                for document in documents:
+                    for field, expression in stage['$addFields'].items():
+                        minuend, subtrahend = expression['$subtract']
+                        document[field] = document[minuend.lstrip('$')] - subtrahend
+            elif '$project' in stage.keys():
+                documents = [project(document, stage['$project']) for document in documents]
+        return FakeCursor(documents or [])
+
+    def _apply_update(self, document, update):
+        for field, value in update.get('$set', {}).items():
+            document[field] = value
+        for field, value in update.get('$inc', {}).items():
+            document[field] = document.get(field, 0) + value
+        for field, value in update.get('$push', {}).items():
+            items = document.get(field, []) + list(value['$each'])
+            document[field] = items[value['$slice']:] if '$slice' in value else items
+
+    async def update_one(self, query, update, upsert=False):
+        document = self._find_one_raw(query)
+        if document:
+            game_mode = document.get('game_mode', None)
+            self._apply_update(document, update)
+            if document.get('game_mode', None) != game_mode:
+                self.game_modes[game_mode].discard(document['_id'])
+                self._index(document)
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            await self.update_one(request._filter, request._doc)
+
+    async def replace_one(self, query, replacement, upsert=False):
+        document = self._find_one_raw(query)
+        if document:
+            self._unindex(document)
+            del self.documents[document['_id']]
+        elif not upsert:
+            return
+
+        replacement = deepcopy(replacement)
+        replacement['_id'] = document['_id'] if document else query['_id']
+        self.documents[replacement['_id']] = replacement
+        self._index(replacement)
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False,
+                                  return_document=False, **kwargs):
+        document = self._find_one_raw(query)
+        if not document:
+            return None
+
+        before = project(document, projection)
+        await self.update_one({'_id': document['_id']}, update)
+        return project(document, projection) if return_document else before
+
+    async def find_one_and_delete(self, query, projection=None, **kwargs):
+        document = self._find_one_raw(query)
+        if document:
+            self._unindex(document)
+            del self.documents[document['_id']]
+            return project(document, projection)
+        return None
+
+    async def delete_many(self, query):
+        for document_id in list(self._candidates(query)):
+            document = self.documents[document_id]
+            if matches(document, query):
+                self._unindex(document)
+                del self.documents[document_id]
+
+
+class FakeGameServer(object):
+    """
+    Stand-in for the umongo `GameServer` document.
+    """
+    FIELDS = ('host', 'port', 'available_slots', 'credentials', 'game_mode', 'region')
+    REQUIRED_FIELDS = ('host', 'port', 'available_slots', 'game_mode')
+
+    def __init__(self, **data):
+        self.data = {field: data[field] for field in self.FIELDS if field in data.keys()}
+        self.data.setdefault('credentials', {})
+
+    def required_validate(self):
+        missing = [field for field in self.REQUIRED_FIELDS if field not in self.data.keys()]
+        if missing:
+            raise ValueError('Missing required fields: {}'.format(', '.join(missing)))
+
+    def to_mongo(self):
+        return deepcopy(self.data)
+
+
+class FakeGameServerDocument(object):
+    """
+    Stand-in for the umongo `GameServer` document class.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __call__(self, **data):
+        return FakeGameServer(**data)
+
+    async def ensure_indexes(self):
+        pass
@@ -0,0 +1,211 @@
+"""
+Hermetic benchmarks of the AMQP workers.
+
+Workers process messages through in-process stand-ins of the RabbitMQ
+channel and the MongoDB collection (or through the in-memory storage),
+so neither of them is required:
+
+    APP_CONFIG_PATH=./config.py python -m benchmarks.workers --output results.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from bson import ObjectId
+
+from app import app
+from app.game_servers.storage import InMemoryGameServerStorage, MongoGameServerStorage
+from app.workers import GetServerWorker, PoolEventsWorker, RegisterServerWorker, UpdateServerWorker
+from benchmarks.stubs import (
+    FakeChannel, FakeCollection, FakeEnvelope, FakeGameServerDocument, FakeProperties
+)
+
+
+DEFAULT_POOL_SIZES = '10,100,1000,10000,100000'
+DEFAULT_GAME_MODES = '1,8,64'
+STORAGES = ('fake-mongodb', 'memory')
+
+
+class NullQueue(object):
+
+    def put_nowait(self, item):
+        pass
+
+
+class BenchmarkApp(object):
+    """
+    Minimal replacement of the Sanic application used by the workers.
+    """
+
+    def __init__(self, config, loop):
+        self.config = config
+        self.loop = loop
+        self.storage = None
+        self.pool_events = None
+        self.allocation_coalescer = None
+
+
+async def create_pool(storage_name, pool_size, game_modes):
+    if storage_name == 'memory':
+        storage = InMemoryGameServerStorage()
+    else:
+        storage = MongoGameServerStorage(FakeGameServerDocument(FakeCollection()))
+
+    documents = []
+    for index in range(pool_size):
+        server_id = ObjectId()
+        document = {
+            'host': '10.0.{}.{}'.format(index // 256 % 256, index % 256),
+            'port': 9000 + index % 1000,
+            'available_slots': 1000000,
+            'credentials': {'token': 'token-{}'.format(index)},
+            'game_mode': game_modes[index % len(game_modes)],
+        }
+        await storage.register(server_id, document)
+        documents.append(dict(document, id=server_id))
+    return storage, documents
+
+
+def retrieve_messages(documents, game_modes, count):
+    for _ in range(count):
+        body = json.dumps({'required-slots': 1, 'game-mode': random.choice(game_modes)})
+        yield body.encode('utf-8')
+
+
+def register_messages(documents, game_modes, count):
+    for _ in range(count):
+        document = random.choice(documents)
+        body = json.dumps({
+            'id': str(document['id']),
+            'host': document['host'],
+            'port': document['port'],
+            'available-slots': 1000000,
+            'credentials': document['credentials'],
+            'game-mode': document['game_mode'],
+        })
+        yield body.encode('utf-8')
+
+
+def update_messages(documents, game_modes, count):
+    for _ in range(count):
+        document = random.choice(documents)
+        body = json.dumps({'id': str(document['id']), 'freed-slots': 1})
+        yield body.encode('utf-8')
+
+
+SCENARIOS = (
+    (GetServerWorker, retrieve_messages),
+    (RegisterServerWorker, register_messages),
+    (UpdateServerWorker, update_messages),
+)
+
+
+async def drive(worker, messages):
+    channel = FakeChannel()
+    for index, body in enumerate(messages):
+        properties = FakeProperties(correlation_id=str(index), reply_to='benchmark')
+        envelope = FakeEnvelope(delivery_tag=index, is_redeliver=False)
+        await worker.process_request(channel, body, envelope, properties)
+    return channel
+
+
+async def run_scenario(storage_name, worker_class, generate_messages, pool_size,
+                       game_modes_count, count):
+    loop = asyncio.get_event_loop()
+    game_modes = ['game-mode-{}'.format(index) for index in range(game_modes_count)]
+
+    benchmark_app = BenchmarkApp(app.config, loop)
+    benchmark_app.storage, documents = await create_pool(storage_name, pool_size, game_modes)
+    benchmark_app.pool_events = PoolEventsWorker(benchmark_app)
+    benchmark_app.pool_events.capacity.load(documents)
+    benchmark_app.pool_events.source = 'benchmark'
+    benchmark_app.pool_events.sequence = iter(range(1, sys.maxsize))
+    benchmark_app.pool_events.events = NullQueue()
+
+    worker = worker_class(benchmark_app)
+
+    # Warm up caches and lazily initialized parts of the libraries
+    await drive(worker, list(generate_messages(documents, game_modes, min(count, 100))))
+
+    messages = list(generate_messages(documents, game_modes, count))
+    started_at, cpu_started_at = time.perf_counter(), time.process_time()
+    channel = await drive(worker, messages)
+    elapsed, cpu_elapsed = time.perf_counter() - started_at, time.process_time() - cpu_started_at
+    assert channel.acked == count
+
+    messages = list(generate_messages(documents, game_modes, count))
+    tracemalloc.start()
+    retained_before, _peak = tracemalloc.get_traced_memory()
+    await drive(worker, messages)
+    retained_after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'storage': storage_name,
+        'worker': worker_class.__name__,
+        'pool-size': pool_size,
+        'game-modes': game_modes_count,
+        'messages': count,
+        'messages-per-second': count / elapsed,
+        'cpu-us-per-message': cpu_elapsed / count * 1000000.0,
+        'retained-bytes-per-message': (retained_after - retained_before) / count,
+        'peak-traced-bytes': peak,
+    }
+
+
+async def benchmark(options):
+    results = []
+    for pool_size in options.pool_sizes:
+        for game_modes_count in options.game_modes:
+            for worker_class, generate_messages in SCENARIOS:
+                result = await run_scenario(
+                    options.storage, worker_class, generate_messages, pool_size,
+                    game_modes_count, options.messages
+                )
+                results.append(result)
+                print(
+                    '{storage:<12} {worker:<22} pool={pool-size:<7} modes={game-modes:<3} '
+                    '{messages-per-second:>10.0f} msg/s '
+                    '{cpu-us-per-message:>8.1f} us/msg'.format(**result),
+                    file=sys.stderr
+                )
+    return results
+
+
+def to_int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pool-sizes', type=to_int_list, default=DEFAULT_POOL_SIZES)
+    parser.add_argument('--game-modes', type=to_int_list, default=DEFAULT_GAME_MODES)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--storage', choices=STORAGES, default=STORAGES[0])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', default=None)
+    options = parser.parse_args(argv)
+    random.seed(options.seed)
+
+    loop = asyncio.get_event_loop()
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': loop.run_until_complete(benchmark(options)),
+    }
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
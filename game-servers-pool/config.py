@@ -18,6 +18,66 @@ def to_int(value):
         return None
 
 
+def to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def to_positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise ValueError("The value must be a positive integer, got {}.".format(value))
+    return number
+
+
+def to_watermarks(value):
+    watermarks = {}
+    for item in filter(None, str(value).split(';')):
+        game_mode, low, high = item.strip().rsplit(':', 2)
+        low, high = int(low), int(high)
+        if low >= high:
+            raise ValueError(
+                "The low watermark for '{}' must be less than the high one.".format(game_mode)
+            )
+        watermarks[game_mode] = (low, high)
+    return watermarks
+
+
+def to_values(value):
+    values = {}
+    for item in filter(None, str(value).split(';')):
+        name, number = item.strip().rsplit(':', 1)
+        values[name] = float(number)
+    return values
+
+
+def to_weights(value):
+    weights = to_values(value)
+    for name, weight in weights.items():
+        if weight <= 0:
+            raise ValueError("The weight of '{}' must be positive.".format(name))
+    return weights
+
+
+def to_consumer_groups(value):
+    groups = []
+    for item in filter(None, str(value).split(';')):
+        queue_names, processes = item.strip().rsplit(':', 1)
+        queue_names = [name.strip() for name in queue_names.split(',') if name.strip()]
+        groups.append((queue_names, int(processes)))
+    return groups
+
+
+def to_fallbacks(value):
+    fallbacks = {}
+    for item in filter(None, str(value).split(';')):
+        region, regions = item.strip().split(':', 1)
+        fallbacks[region.strip()] = [name.strip() for name in regions.split(',') if name.strip()]
+    return fallbacks
+
+
 APP_HOST = os.environ.get('APP_HOST', "127.0.0.1")
 APP_PORT = to_int(os.environ.get('APP_HOST', "80"))
 APP_DEBUG = to_bool(os.environ.get('APP_DEBUG', False))
@@ -28,6 +88,16 @@ if APP_SSL_CERT and APP_SSL_KEY:
     APP_SSL = {"cert": APP_SSL_CERT, "key": APP_SSL_KEY}
 else:
     APP_SSL = None
+# Co-located matchmakers keep HTTP connections open between allocations
+KEEP_ALIVE_TIMEOUT = to_int(os.environ.get('APP_KEEP_ALIVE_TIMEOUT', 75))
+# Token expected in the `Authorization: Bearer <token>` header by the HTTP endpoint of
+# retrieve requests, which refuses all requests when the token isn't specified
+RETRIEVE_API_TOKEN = os.environ.get("RETRIEVE_API_TOKEN", None)
+# Token expected in the same way by the snapshot and export endpoints of the pool
+ADMIN_API_TOKEN = os.environ.get("ADMIN_API_TOKEN", None)
+# Secret from which keys of game servers signing party tokens of matches are derived,
+# matches aren't allocated when it isn't specified
+PARTY_TOKEN_SECRET = os.environ.get("PARTY_TOKEN_SECRET", None)
 
 # MongoDB settings
 MONGODB_USERNAME = os.environ.get("MONGODB_USERNAME", "user")
@@ -35,15 +105,47 @@ MONGODB_PASSWORD = os.environ.get("MONGODB_PASSWORD", "password")
 MONGODB_HOST = os.environ.get("MONGODB_HOST", "mongodb")
 MONGODB_PORT = to_int(os.environ.get("MONGODB_PORT", 27017))
 MONGODB_DATABASE = os.environ.get("MONGODB_DATABASE", "")
-MONGODB_URI = 'mongodb://{}:{}@{}:{}/{}'.format(
+MONGODB_MAX_POOL_SIZE = to_int(os.environ.get("MONGODB_MAX_POOL_SIZE", 100))
+MONGODB_MIN_POOL_SIZE = to_int(os.environ.get("MONGODB_MIN_POOL_SIZE", 0))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = to_int(os.environ.get("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 1000))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = to_int(
+    os.environ.get("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 5000)
+)
+MONGODB_SOCKET_TIMEOUT_MS = to_int(os.environ.get("MONGODB_SOCKET_TIMEOUT_MS", 10000))
+MONGODB_URI = 'mongodb://{}:{}@{}:{}/{}?{}'.format(
     MONGODB_USERNAME,
     MONGODB_PASSWORD,
     MONGODB_HOST,
     MONGODB_PORT,
-    MONGODB_DATABASE
+    MONGODB_DATABASE,
+    '&'.join([
+        'maxPoolSize={}'.format(MONGODB_MAX_POOL_SIZE),
+        'minPoolSize={}'.format(MONGODB_MIN_POOL_SIZE),
+        'waitQueueTimeoutMS={}'.format(MONGODB_WAIT_QUEUE_TIMEOUT_MS),
+        'serverSelectionTimeoutMS={}'.format(MONGODB_SERVER_SELECTION_TIMEOUT_MS),
+        'socketTimeoutMS={}'.format(MONGODB_SOCKET_TIMEOUT_MS),
+    ])
+)
+# Server-side deadline (maxTimeMS) of queries made while handling requests
+MONGODB_OPERATION_TIMEOUT_MS = to_int(os.environ.get("MONGODB_OPERATION_TIMEOUT_MS", 1000))
+# Write concerns are a number of nodes or a tag set name, e.g. "majority"
+MONGODB_ALLOCATION_WRITE_CONCERN = os.environ.get("MONGODB_ALLOCATION_WRITE_CONCERN", "1")
+MONGODB_REGISTRATION_WRITE_CONCERN = os.environ.get(
+    "MONGODB_REGISTRATION_WRITE_CONCERN", "majority"
+)
+MONGODB_WRITE_CONCERN_TIMEOUT_MS = to_int(
+    os.environ.get("MONGODB_WRITE_CONCERN_TIMEOUT_MS", 1000)
 )
 LAZY_UMONGO = MotorAsyncIOInstance()
 
+# Storage settings
+# mongodb, memory. STORAGE_BACKEND is still read when APP_STORAGE_BACKEND isn't specified
+STORAGE_BACKEND = os.environ.get(
+    "APP_STORAGE_BACKEND", os.environ.get("STORAGE_BACKEND", "mongodb")
+)
+STORAGE_SNAPSHOT_PATH = os.environ.get("STORAGE_SNAPSHOT_PATH", None)
+STORAGE_SNAPSHOT_INTERVAL = to_int(os.environ.get("STORAGE_SNAPSHOT_INTERVAL", 60))
+
 # AMQP settings
 AMQP_USERNAME = os.environ.get("AMQP_USERNAME", "user")
 AMQP_PASSWORD = os.environ.get("AMQP_PASSWORD", "password")
@@ -52,6 +154,127 @@ AMQP_PORT = to_int(os.environ.get("AMQP_PORT", 5672))
 AMQP_VIRTUAL_HOST = os.environ.get("AMQP_VIRTUAL_HOST", "vhost")
 AMQP_USING_SSL = to_bool(os.environ.get("AMQP_USING_SSL", False))
 
+# Microservice settings
+# Whether the microservice and its permissions are registered in the Auth/Auth
+# microservice on start of each process
+MICROSERVICE_REGISTRATION_ENABLED = to_bool(
+    os.environ.get("MICROSERVICE_REGISTRATION_ENABLED", True)
+)
+
+# Idempotency settings
+IDEMPOTENCY_CACHE_SIZE = to_int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 10000))
+IDEMPOTENCY_CACHE_TTL = to_int(os.environ.get("IDEMPOTENCY_CACHE_TTL", 300))
+# Responses are shared via MongoDB only when the collection name is specified
+IDEMPOTENCY_CACHE_COLLECTION = os.environ.get("IDEMPOTENCY_CACHE_COLLECTION", None)
+
+# Allocation batching settings
+# Concurrent retrieve requests with the same constraints are placed together
+ALLOCATION_BATCHING_ENABLED = to_bool(os.environ.get("ALLOCATION_BATCHING_ENABLED", False))
+ALLOCATION_BATCH_WINDOW_MS = to_float(os.environ.get("ALLOCATION_BATCH_WINDOW_MS", 2))
+ALLOCATION_BATCH_MAX_SIZE = to_int(os.environ.get("ALLOCATION_BATCH_MAX_SIZE", 32))
+
+# Request scheduling settings
+# Retrieve and match requests are started before register, update, unregister
+# and report ones, which still get a share of the slots proportional to weights
+SCHEDULER_CONCURRENCY = to_int(os.environ.get("SCHEDULER_CONCURRENCY", 32))
+SCHEDULER_HIGH_PRIORITY_WEIGHT = to_int(os.environ.get("SCHEDULER_HIGH_PRIORITY_WEIGHT", 8))
+SCHEDULER_LOW_PRIORITY_WEIGHT = to_int(os.environ.get("SCHEDULER_LOW_PRIORITY_WEIGHT", 1))
+# Unacknowledged messages delivered to each worker. Requests of the low priority
+# lane are handled one by one per queue, so that changes of a server stay ordered.
+# Prefetching more than the concurrency lets game modes be served fairly
+AMQP_HIGH_PRIORITY_PREFETCH_COUNT = to_int(
+    os.environ.get("AMQP_HIGH_PRIORITY_PREFETCH_COUNT", 64)
+)
+AMQP_LOW_PRIORITY_PREFETCH_COUNT = to_int(os.environ.get("AMQP_LOW_PRIORITY_PREFETCH_COUNT", 1))
+# Game modes waiting for retrieve and match requests are served in turns, where
+# each may start as many requests as its weight. Weights are described in the
+# `game-mode:weight;game-mode:weight` format, not listed game modes have weight 1
+SCHEDULER_GAME_MODE_WEIGHTS = to_weights(os.environ.get("SCHEDULER_GAME_MODE_WEIGHTS", ""))
+
+# Consumer settings
+# Whether the `run` command consumes requests in the HTTP server processes. Disable
+# it when the requests are consumed by processes started with the `consume` command
+APP_CONSUMERS_ENABLED = to_bool(os.environ.get("APP_CONSUMERS_ENABLED", True))
+# Groups of queues consumed by separate processes, described in the
+# `queue,queue:processes;queue:processes` format. When not specified, every process
+# started by the `consume` command consumes all queues
+CONSUMER_GROUPS = to_consumer_groups(os.environ.get("CONSUMER_GROUPS", ""))
+CONSUMER_PROCESSES = to_int(os.environ.get("CONSUMER_PROCESSES", os.cpu_count() or 1))
+# Whether each consumer process is bound to a single CPU, taken in turns
+CONSUMER_PIN_CPUS = to_bool(os.environ.get("CONSUMER_PIN_CPUS", False))
+# Size of the MongoDB connection pool of each consumer process
+CONSUMER_MONGODB_MAX_POOL_SIZE = to_int(os.environ.get("CONSUMER_MONGODB_MAX_POOL_SIZE", 20))
+CONSUMER_RESTART_DELAY = to_float(os.environ.get("CONSUMER_RESTART_DELAY", 1))
+CONSUMER_MAX_RESTART_DELAY = to_float(os.environ.get("CONSUMER_MAX_RESTART_DELAY", 30))
+
+# Consumer scaling settings
+# Workers of retrieve and match requests poll the depth of their queues and add
+# channels and raise the prefetch when the backlog grows, within these bounds
+CONSUMER_SCALING_ENABLED = to_bool(os.environ.get("CONSUMER_SCALING_ENABLED", False))
+CONSUMER_SCALING_INTERVAL = to_float(os.environ.get("CONSUMER_SCALING_INTERVAL", 5))
+CONSUMER_SCALING_MAX_CHANNELS = to_int(os.environ.get("CONSUMER_SCALING_MAX_CHANNELS", 4))
+CONSUMER_SCALING_MAX_PREFETCH_COUNT = to_int(
+    os.environ.get("CONSUMER_SCALING_MAX_PREFETCH_COUNT", 256)
+)
+# Seconds within which a backlog must be cleared at the measured processing rate
+CONSUMER_SCALING_DRAIN_TIME = to_float(os.environ.get("CONSUMER_SCALING_DRAIN_TIME", 1))
+
+# Shutdown settings
+# Seconds given to the requests delivered to the workers to finish on stop
+SHUTDOWN_DRAIN_TIMEOUT = to_float(os.environ.get("SHUTDOWN_DRAIN_TIMEOUT", 8))
+
+# Export settings
+EXPORT_BATCH_SIZE = to_int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+
+# Capacity events settings
+# Watermarks are described in the `game-mode:low:high;game-mode:low:high` format
+CAPACITY_WATERMARKS = to_watermarks(os.environ.get("CAPACITY_WATERMARKS", ""))
+CAPACITY_RESYNC_INTERVAL = to_int(os.environ.get("CAPACITY_RESYNC_INTERVAL", 60))
+# The tracked pool is saved there and loaded on start, instead of reading all servers
+CAPACITY_SNAPSHOT_PATH = os.environ.get("CAPACITY_SNAPSHOT_PATH", None)
+CAPACITY_SNAPSHOT_INTERVAL = to_int(os.environ.get("CAPACITY_SNAPSHOT_INTERVAL", 30))
+
+# Region settings
+# Fallbacks are described in the `region:fallback,fallback;region:fallback` format
+REGION_FALLBACKS = to_fallbacks(os.environ.get("REGION_FALLBACKS", ""))
+# Whether servers of any region are allocated when the preferred ones are full
+REGION_FALLBACK_TO_ANY = to_bool(os.environ.get("REGION_FALLBACK_TO_ANY", True))
+
+# Telemetry settings
+# Seconds after which the weight of the previously reported utilization halves
+TELEMETRY_HALF_LIFE = to_float(os.environ.get("TELEMETRY_HALF_LIFE", 30))
+# Tick time in milliseconds, used when game servers don't report their own budget
+TELEMETRY_TICK_BUDGET = to_float(os.environ.get("TELEMETRY_TICK_BUDGET", 16))
+# Servers with less free share of the most utilized resource aren't allocated
+TELEMETRY_MIN_HEADROOM = to_float(os.environ.get("TELEMETRY_MIN_HEADROOM", 0.1))
+TELEMETRY_STALE_AFTER = to_float(os.environ.get("TELEMETRY_STALE_AFTER", 60))
+TELEMETRY_DEFAULT_HEADROOM = to_float(os.environ.get("TELEMETRY_DEFAULT_HEADROOM", 0.5))
+# Amount of random candidates compared by their headroom on each allocation
+TELEMETRY_SAMPLE_SIZE = to_positive_int(os.environ.get("TELEMETRY_SAMPLE_SIZE", 2))
+
+# Allocation scoring settings
+# Scores all candidates of a game mode instead of a random sample, memory storage only.
+# Uses NumPy when it's installed, which is much faster on large pools
+ALLOCATION_SCORING_ENABLED = to_bool(os.environ.get("ALLOCATION_SCORING_ENABLED", False))
+# Weight of the part of slots left unused by an allocation, higher fills fuller servers first
+ALLOCATION_FIT_WEIGHT = to_float(os.environ.get("ALLOCATION_FIT_WEIGHT", 1))
+ALLOCATION_LOAD_WEIGHT = to_float(os.environ.get("ALLOCATION_LOAD_WEIGHT", 1))
+# Penalties and preferences are described in the `name:value;name:value` format,
+# where negative values turn a penalty into a preference and vice versa
+ALLOCATION_REGION_PENALTIES = to_values(os.environ.get("ALLOCATION_REGION_PENALTIES", ""))
+ALLOCATION_TAG_PREFERENCES = to_values(os.environ.get("ALLOCATION_TAG_PREFERENCES", ""))
+
+# Change stream settings
+# Requires the MongoDB storage backend running against a replica set,
+# the application refuses to start with any other backend
+CHANGE_STREAM_ENABLED = to_bool(os.environ.get("CHANGE_STREAM_ENABLED", False))
+# Resume tokens are kept only in memory when the collection name isn't specified
+CHANGE_STREAM_TOKEN_COLLECTION = os.environ.get("CHANGE_STREAM_TOKEN_COLLECTION", None)
+CHANGE_STREAM_TOKEN_KEY = os.environ.get("CHANGE_STREAM_TOKEN_KEY", SERVICE_NAME)
+CHANGE_STREAM_TOKEN_SAVE_INTERVAL = to_int(
+    os.environ.get("CHANGE_STREAM_TOKEN_SAVE_INTERVAL", 1)
+)
+
 # Settings for tests
 TEST_MONGODB_USERNAME = os.environ.get("TEST_MONGODB_USERNAME", "root")
 TEST_MONGODB_PASSWORD = os.environ.get("TEST_MONGODB_PASSWORD", "root")
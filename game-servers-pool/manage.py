@@ -1,13 +1,19 @@
 from sanic_script import Manager
 
 from app import app
+from app.commands.consume import ConsumeCommand
+from app.commands.export_servers import ExportServersCommand
+from app.commands.loadtest import LoadTestCommand
 from app.commands.run_tests import RunTestsCommand
 from app.commands.run_server import RunServerCommand
 
 
 manager = Manager(app)
 manager.add_command('run', RunServerCommand)
+manager.add_command('consume', ConsumeCommand)
 manager.add_command('test', RunTestsCommand)
+manager.add_command('export', ExportServersCommand)
+manager.add_command('loadtest', LoadTestCommand)
 
 
 if __name__ == '__main__':
@@ -23,6 +23,10 @@ def app_factory():
         "MONGODB_PORT": sanic_app.config["TEST_MONGODB_PORT"],
         "MONGODB_DATABASE": sanic_app.config["TEST_MONGODB_DATABASE"],
         "MONGODB_URI": sanic_app.config["TEST_MONGODB_URI"],
+        "MICROSERVICE_REGISTRATION_ENABLED": False,
+        "RETRIEVE_API_TOKEN": "retrieve-token",
+        "ADMIN_API_TOKEN": "admin-token",
+        "PARTY_TOKEN_SECRET": "party-secret",
     })
     yield sanic_app
 
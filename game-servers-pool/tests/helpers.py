@@ -0,0 +1,10 @@
+class FakeClock(object):
+    """
+    Clock of the tests, which moves only when `now` is changed.
+    """
+
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,126 @@
+import pytest
+from sage_utils.amqp.clients import RpcAmqpClient
+from sage_utils.constants import TOKEN_ERROR, VALIDATION_ERROR
+from sage_utils.wrappers import Response
+
+from app.game_servers.allocation import get_party_key, get_party_token
+from app.game_servers.documents import GameServer
+from app.workers.allocate_match import AllocateMatchWorker
+
+
+REQUEST_QUEUE = AllocateMatchWorker.QUEUE_NAME
+REQUEST_EXCHANGE = AllocateMatchWorker.REQUEST_EXCHANGE_NAME
+RESPONSE_EXCHANGE = AllocateMatchWorker.RESPONSE_EXCHANGE_NAME
+
+
+async def create_game_server(port, available_slots):
+    game_server = GameServer(**{
+        'host': '127.0.0.1',
+        'port': port,
+        'available_slots': available_slots,
+        'credentials': {
+            'token': 'super_secret_token'
+        },
+        'game_mode': 'team-deathmatch'
+    })
+    await game_server.commit()
+    return game_server
+
+
+@pytest.mark.asyncio
+async def test_worker_places_all_parties_on_one_server(sanic_server):
+    await GameServer.collection.delete_many({})
+    await create_game_server(9000, 6)
+    game_server = await create_game_server(9001, 12)
+
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    response = await client.send(payload={'game-mode': 'team-deathmatch', 'parties': [5, 5]})
+
+    assert Response.CONTENT_FIELD_NAME in response.keys()
+    content = response[Response.CONTENT_FIELD_NAME]
+    assert content['port'] == game_server.port
+    assert content['credentials'] == game_server.credentials
+    assert len(content['parties']) == 2
+    for index, party in enumerate(content['parties']):
+        assert party['slots'] == 5
+        assert party['token'] == get_party_token(
+            get_party_key('party-secret', game_server.id), content['match-id'], index, 5
+        )
+
+    game_server = await GameServer.find_one({"_id": game_server.id})
+    assert game_server.available_slots == 2
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_worker_changes_nothing_when_match_does_not_fit(sanic_server):
+    await GameServer.collection.delete_many({})
+    await create_game_server(9000, 6)
+    await create_game_server(9001, 6)
+
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    response = await client.send(payload={'game-mode': 'team-deathmatch', 'parties': [5, 5]})
+
+    assert response[Response.CONTENT_FIELD_NAME] is None
+    updated_servers = await GameServer.collection.count_documents({"available_slots": 6})
+    assert updated_servers == 2
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_worker_returns_validation_error_for_empty_parties(sanic_server):
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    response = await client.send(payload={'game-mode': 'team-deathmatch', 'parties': []})
+
+    assert Response.ERROR_FIELD_NAME in response.keys()
+    error = response[Response.ERROR_FIELD_NAME]
+    assert error[Response.ERROR_TYPE_FIELD_NAME] == VALIDATION_ERROR
+    assert set(error[Response.ERROR_DETAILS_FIELD_NAME].keys()) == {'parties'}
+
+
+@pytest.mark.asyncio
+async def test_worker_refuses_matches_without_the_party_token_secret(sanic_server):
+    await GameServer.collection.delete_many({})
+    game_server = await create_game_server(9000, 12)
+
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    sanic_server.app.config["PARTY_TOKEN_SECRET"] = None
+    try:
+        response = await client.send(payload={'game-mode': 'team-deathmatch', 'parties': [5]})
+    finally:
+        sanic_server.app.config["PARTY_TOKEN_SECRET"] = "party-secret"
+
+    assert Response.ERROR_FIELD_NAME in response.keys()
+    error = response[Response.ERROR_FIELD_NAME]
+    assert error[Response.ERROR_TYPE_FIELD_NAME] == TOKEN_ERROR
+
+    game_server = await GameServer.find_one({"_id": game_server.id})
+    assert game_server.available_slots == 12
+
+    await GameServer.collection.delete_many({})
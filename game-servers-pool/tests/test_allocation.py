@@ -0,0 +1,35 @@
+from app.game_servers.allocation import (
+    get_allocation_attempts, get_party_key, get_party_token
+)
+from app.game_servers.regions import ANY_REGION
+
+
+def test_allocation_attempts_try_preferred_tags_first_in_each_region():
+    attempts = get_allocation_attempts({
+        'game-mode': '1v1',
+        'regions': ['eu-west'],
+        'required-tags': ['map:dust2'],
+        'preferred-tags': ['tier:high', 'map:dust2'],
+    })
+
+    assert attempts == [
+        ('eu-west', ['map:dust2', 'tier:high']),
+        ('eu-west', ['map:dust2']),
+        (ANY_REGION, ['map:dust2', 'tier:high']),
+        (ANY_REGION, ['map:dust2']),
+    ]
+
+
+def test_allocation_attempts_without_constraints():
+    assert get_allocation_attempts({'game-mode': '1v1'}) == [(ANY_REGION, [])]
+
+
+def test_party_tokens_depend_on_the_server_and_party():
+    key = get_party_key('secret', 'first')
+    token = get_party_token(key, 'match', 0, 5)
+
+    assert token == get_party_token(get_party_key('secret', 'first'), 'match', 0, 5)
+    assert token != get_party_token(key, 'match', 1, 5)
+    assert token != get_party_token(key, 'match', 0, 4)
+    assert token != get_party_token(get_party_key('secret', 'second'), 'match', 0, 5)
+    assert token != get_party_token(get_party_key('another', 'first'), 'match', 0, 5)
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from app.game_servers.coalescer import AllocationCoalescer
+
+
+class FakeStorage(object):
+
+    def __init__(self, available_slots):
+        self.available_slots = available_slots
+        self.calls = []
+
+    async def allocate_many(self, game_mode, slots, region=None, tags=None):
+        self.calls.append((game_mode, list(slots), region, tags))
+        documents = []
+        for required_slots in slots:
+            if self.available_slots >= required_slots:
+                self.available_slots -= required_slots
+                documents.append({'id': 'first', 'available_slots': self.available_slots})
+            else:
+                documents.append(None)
+        return documents
+
+
+@pytest.mark.asyncio
+async def test_coalescer_places_concurrent_requests_together():
+    storage = FakeStorage(available_slots=10)
+    coalescer = AllocationCoalescer(storage, window=0.01, max_batch_size=32)
+
+    documents = await asyncio.gather(
+        coalescer.allocate('1v1', 4),
+        coalescer.allocate('1v1', 4),
+        coalescer.allocate('1v1', 4),
+        coalescer.allocate('team-deathmatch', 1, region='eu-west'),
+    )
+
+    assert [document['available_slots'] if document else None for document in documents] == [
+        6, 2, None, 1
+    ]
+    assert sorted(storage.calls) == [
+        ('1v1', [4, 4, 4], None, []),
+        ('team-deathmatch', [1], 'eu-west', []),
+    ]
+    assert coalescer.get_stats()['batch-sizes'] == {'1': 1, '3': 1}
+
+
+@pytest.mark.asyncio
+async def test_coalescer_sends_full_batch_without_waiting():
+    storage = FakeStorage(available_slots=10)
+    coalescer = AllocationCoalescer(storage, window=10, max_batch_size=2)
+
+    documents = await asyncio.wait_for(asyncio.gather(
+        coalescer.allocate('1v1', 1),
+        coalescer.allocate('1v1', 1),
+    ), timeout=1)
+
+    assert len(documents) == 2
+    assert coalescer.get_stats()['requests'] == 2
+
+
+@pytest.mark.asyncio
+async def test_coalescer_flushes_pending_batches_at_once():
+    storage = FakeStorage(available_slots=10)
+    coalescer = AllocationCoalescer(storage, window=60, max_batch_size=32)
+
+    tasks = [asyncio.ensure_future(coalescer.allocate('team-deathmatch', 2)) for _ in range(2)]
+    await asyncio.sleep(0)
+    coalescer.flush_all()
+    documents = await asyncio.wait_for(asyncio.gather(*tasks), 1)
+
+    assert [document['available_slots'] for document in documents] == [8, 6]
+    assert coalescer.batches == {}
@@ -0,0 +1,100 @@
+import pytest
+from bson import ObjectId
+
+from app.game_servers import scoring
+from app.game_servers.pool_store import PoolStore
+from app.game_servers.scoring import CandidateScorer
+from app.game_servers.storage import InMemoryGameServerStorage
+from app.game_servers.telemetry import LoadEstimator
+from helpers import FakeClock
+
+
+NUMPY_MODES = [False]
+if scoring.numpy is not None:
+    NUMPY_MODES.append(True)
+
+
+def create_scorer(use_numpy, **kwargs):
+    estimator = LoadEstimator(min_headroom=0.1, default_headroom=0.5, clock=FakeClock(1000))
+    return CandidateScorer(estimator, use_numpy=use_numpy, **kwargs)
+
+
+def get_server_id(store, row):
+    return None if row is None else str(store.get_object_id(row))
+
+
+@pytest.mark.parametrize('use_numpy', NUMPY_MODES)
+def test_scorer_fills_the_fullest_fitting_servers_first(use_numpy):
+    scorer = create_scorer(use_numpy)
+    store = PoolStore()
+    store.add('empty', '1v1', 100)
+    store.add('almost-full', '1v1', 4)
+    store.add('full', '1v1', 1)
+    store.add('other-mode', 'battle-royale', 2)
+
+    assert get_server_id(store, scorer.choose(store, '1v1', 2)) == 'almost-full'
+    assert get_server_id(store, scorer.choose(store, '1v1', 10)) == 'empty'
+    assert scorer.choose(store, '1v1', 101) is None
+    assert scorer.choose(store, 'team-deathmatch', 1) is None
+
+
+@pytest.mark.parametrize('use_numpy', NUMPY_MODES)
+def test_scorer_prefers_servers_with_more_headroom_and_skips_overloaded_ones(use_numpy):
+    scorer = create_scorer(use_numpy)
+    now = scorer.estimator.clock()
+    store = PoolStore()
+    store.add('busy', '1v1', 10)
+    store.add('idle', '1v1', 10)
+    store.add('overloaded', '1v1', 2)
+    store.set_headroom('busy', 0.2, now + 60)
+    store.set_headroom('idle', 0.9, now + 60)
+    store.set_headroom('overloaded', 0.05, now + 60)
+
+    assert get_server_id(store, scorer.choose(store, '1v1', 2)) == 'idle'
+
+    # Stale reports are replaced by the default headroom
+    scorer.estimator.clock.now += 61
+    assert get_server_id(store, scorer.choose(store, '1v1', 2)) == 'overloaded'
+
+
+@pytest.mark.parametrize('use_numpy', NUMPY_MODES)
+def test_scorer_applies_regions_penalties_and_tags_preferences(use_numpy):
+    scorer = create_scorer(
+        use_numpy, region_penalties={'us-east': 2.0}, tag_preferences={'dedicated': 1.0}
+    )
+    store = PoolStore()
+    store.add('us-east', '1v1', 2, region='us-east', tags=['dedicated'])
+    store.add('eu-west', '1v1', 100, region='eu-west')
+    store.add('eu-west-dedicated', '1v1', 100, region='eu-west', tags=['dedicated'])
+
+    assert get_server_id(store, scorer.choose(store, '1v1', 2)) == 'eu-west-dedicated'
+    assert get_server_id(store, scorer.choose(store, '1v1', 2, region='us-east')) == 'us-east'
+    assert scorer.choose(store, '1v1', 2, region='ap-south') is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('use_numpy', NUMPY_MODES)
+async def test_storage_allocates_the_best_scored_server(use_numpy):
+    storage = InMemoryGameServerStorage(scorer=create_scorer(use_numpy))
+    empty_id, almost_full_id, tagged_id = ObjectId(), ObjectId(), ObjectId()
+    data = {'host': '127.0.0.1', 'port': 9000, 'credentials': {}, 'game_mode': '1v1'}
+    await storage.register(empty_id, dict(data, available_slots=100))
+    await storage.register(almost_full_id, dict(data, available_slots=6))
+    await storage.register(tagged_id, dict(data, available_slots=50, tags=['ranked']))
+
+    document = await storage.allocate('1v1', 4)
+    assert document['id'] == almost_full_id
+    assert document['available_slots'] == 2
+
+    document = await storage.allocate('1v1', 4)
+    assert document['id'] == tagged_id
+
+    document = await storage.allocate('1v1', 4, tags=['ranked'])
+    assert document['id'] == tagged_id
+    assert document['available_slots'] == 42
+
+    await storage.free(almost_full_id, 2)
+    await storage.evict(tagged_id)
+    document = await storage.allocate('1v1', 4)
+    assert document['id'] == almost_full_id
+    assert document['available_slots'] == 0
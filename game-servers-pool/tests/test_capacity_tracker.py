@@ -0,0 +1,93 @@
+from app.game_servers.capacity import CapacityTracker, CAPACITY_LOW, CAPACITY_HIGH
+from app.game_servers.pool_store import PoolStore
+
+
+def test_tracker_emits_initial_state_after_load():
+    tracker = CapacityTracker({'1v1': (10, 50), 'team-deathmatch': (10, 50)})
+    events = tracker.load([
+        {'id': 'first', 'game_mode': '1v1', 'available_slots': 60},
+        {'id': 'second', 'game_mode': 'battle-royal', 'available_slots': 5},
+    ])
+
+    assert len(events) == 2
+    assert events[0]['type'] == CAPACITY_HIGH
+    assert events[0]['game-mode'] == '1v1'
+    assert events[0]['free-slots'] == 60
+    assert events[1]['type'] == CAPACITY_LOW
+    assert events[1]['game-mode'] == 'team-deathmatch'
+    assert events[1]['free-slots'] == 0
+
+
+def test_tracker_emits_low_and_high_events_with_hysteresis():
+    tracker = CapacityTracker({'1v1': (10, 50)})
+    tracker.load([{'id': 'first', 'game_mode': '1v1', 'available_slots': 30}])
+
+    events = tracker.update_server('first', '1v1', 10)
+    assert len(events) == 1
+    assert events[0]['type'] == CAPACITY_LOW
+
+    assert tracker.update_server('first', '1v1', 11) == []
+    assert tracker.update_server('first', '1v1', 9) == []
+    assert tracker.update_server('first', '1v1', 49) == []
+
+    events = tracker.update_server('first', '1v1', 50)
+    assert len(events) == 1
+    assert events[0]['type'] == CAPACITY_HIGH
+
+    assert tracker.update_server('first', '1v1', 49) == []
+    assert tracker.update_server('first', '1v1', 51) == []
+
+
+def test_tracker_moves_slots_between_game_modes():
+    tracker = CapacityTracker({'1v1': (10, 50), 'team-deathmatch': (10, 50)})
+    tracker.load([
+        {'id': 'first', 'game_mode': '1v1', 'available_slots': 30},
+        {'id': 'second', 'game_mode': 'team-deathmatch', 'available_slots': 30},
+    ])
+
+    events = tracker.update_server('first', 'team-deathmatch', 30)
+    assert len(events) == 2
+    assert {event['game-mode']: event['type'] for event in events} == {
+        '1v1': CAPACITY_LOW,
+        'team-deathmatch': CAPACITY_HIGH,
+    }
+
+    assert tracker.free_slots['1v1'] == 0
+    assert tracker.free_slots['team-deathmatch'] == 60
+
+
+def test_tracker_releases_slots_of_removed_server():
+    tracker = CapacityTracker({'1v1': (10, 50)})
+    tracker.load([
+        {'id': 'first', 'game_mode': '1v1', 'available_slots': 30},
+        {'id': 'second', 'game_mode': '1v1', 'available_slots': 30},
+    ])
+
+    assert tracker.remove_server('unknown') == []
+
+    events = tracker.remove_server('first')
+    assert len(events) == 0
+    assert tracker.free_slots['1v1'] == 30
+
+    events = tracker.remove_server('second')
+    assert len(events) == 1
+    assert events[0]['type'] == CAPACITY_LOW
+
+
+def test_tracker_starts_from_a_loaded_store():
+    store = PoolStore()
+    store.add('first', '1v1', 30)
+    store.add('second', '1v1', 30)
+    store.add('third', 'team-deathmatch', 5)
+    store.remove('third')
+
+    tracker = CapacityTracker({'1v1': (10, 50), 'team-deathmatch': (10, 50)})
+    events = tracker.load_store(store)
+    assert {event['game-mode']: event['type'] for event in events} == {
+        '1v1': CAPACITY_HIGH,
+        'team-deathmatch': CAPACITY_LOW,
+    }
+    assert tracker.free_slots == {'1v1': 60}
+
+    tracker.update_server('first', '1v1', 10)
+    assert tracker.free_slots['1v1'] == 40
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from sage_utils.constants import AUTHORIZATION_ERROR
+
+from app.game_servers.documents import GameServer
+
+
+AUTHORIZATION_HEADERS = {'Authorization': 'Bearer admin-token'}
+
+
+async def create_game_servers(init_data_list):
+    objects = []
+    for create_data in init_data_list:
+        game_server = GameServer(**create_data)
+        await game_server.commit()
+        objects.append(game_server)
+    return objects
+
+
+@pytest.mark.asyncio
+async def test_export_streams_game_servers_without_credentials(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    objects = await create_game_servers([
+        {
+            'host': '127.0.0.1',
+            'port': 9000 + index,
+            'available_slots': 100,
+            'credentials': {
+                'token': 'super_secret_token'
+            },
+            'game_mode': '1v1'
+        }
+        for index in range(5)
+    ])
+
+    response = await sanic_server.get(
+        '/game-servers-pool/api/admin/export', headers=AUTHORIZATION_HEADERS
+    )
+    assert response.status == 200
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in (await response.text()).splitlines()]
+    assert len(lines) == len(objects)
+    assert {line['id'] for line in lines} == {str(obj.id) for obj in objects}
+    for line in lines:
+        assert 'credentials' not in line.keys()
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_export_filters_game_servers_by_game_mode_and_slots(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    objects = await create_game_servers([
+        {'host': '127.0.0.1', 'port': 9000, 'available_slots': 10, 'game_mode': '1v1'},
+        {'host': '127.0.0.1', 'port': 9001, 'available_slots': 50, 'game_mode': '1v1'},
+        {'host': '127.0.0.1', 'port': 9002, 'available_slots': 100, 'game_mode': '1v1'},
+        {'host': '127.0.0.1', 'port': 9003, 'available_slots': 50, 'game_mode': 'battle-royal'},
+    ])
+
+    response = await sanic_server.get(
+        '/game-servers-pool/api/admin/export?game-mode=1v1&min-slots=20&max-slots=60',
+        headers=AUTHORIZATION_HEADERS
+    )
+    assert response.status == 200
+
+    lines = [json.loads(line) for line in (await response.text()).splitlines()]
+    assert len(lines) == 1
+    assert lines[0]['id'] == str(objects[1].id)
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_export_returns_a_validation_error_for_invalid_filters(sanic_server):
+    response = await sanic_server.get(
+        '/game-servers-pool/api/admin/export?min-slots=-1', headers=AUTHORIZATION_HEADERS
+    )
+    assert response.status == 400
+
+    content = await response.json()
+    assert 'min-slots' in content['error']['details']
+
+
+@pytest.mark.asyncio
+async def test_export_refuses_requests_without_a_valid_token(sanic_server):
+    for headers in [{}, {'Authorization': 'Bearer retrieve-token'}]:
+        response = await sanic_server.get('/game-servers-pool/api/admin/export', headers=headers)
+        assert response.status == 401
+
+        content = await response.json()
+        assert content['error']['type'] == AUTHORIZATION_ERROR
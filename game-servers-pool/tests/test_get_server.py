@@ -62,6 +62,109 @@ async def test_worker_returns_one_existing_server_for_one_server_in_list(sanic_s
     await GameServer.collection.delete_many({})
 
 
+@pytest.mark.asyncio
+async def test_worker_returns_a_server_from_the_region_with_the_lowest_ping(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    objects = await create_game_servers([
+        {
+            'host': '127.0.0.1',
+            'port': 9000,
+            'available_slots': 100,
+            'credentials': {
+                'token': 'super_secret_token'
+            },
+            'game_mode': '1v1',
+            'region': 'us-east'
+        },
+        {
+            'host': '127.0.0.1',
+            'port': 9001,
+            'available_slots': 100,
+            'credentials': {
+                'token': 'super_secret_token2'
+            },
+            'game_mode': '1v1',
+            'region': 'eu-west'
+        },
+    ])
+
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    response = await client.send(payload={
+        'required-slots': 10,
+        'game-mode': '1v1',
+        'ping': {'us-east': 110, 'eu-west': 35}
+    })
+
+    assert Response.CONTENT_FIELD_NAME in response.keys()
+    content = response[Response.CONTENT_FIELD_NAME]
+    assert content['port'] == objects[1].port
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_worker_returns_a_server_with_required_and_preferred_tags(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    objects = await create_game_servers([
+        {
+            'host': '127.0.0.1',
+            'port': 9000,
+            'available_slots': 100,
+            'game_mode': '1v1',
+            'tags': ['map:dust2', 'build:1.0']
+        },
+        {
+            'host': '127.0.0.1',
+            'port': 9001,
+            'available_slots': 100,
+            'game_mode': '1v1',
+            'tags': ['map:dust2', 'build:1.1', 'tier:high']
+        },
+        {
+            'host': '127.0.0.1',
+            'port': 9002,
+            'available_slots': 100,
+            'game_mode': '1v1',
+            'tags': ['map:nuke', 'build:1.1', 'tier:high']
+        },
+    ])
+
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    response = await client.send(payload={
+        'required-slots': 10,
+        'game-mode': '1v1',
+        'required-tags': ['map:dust2'],
+        'preferred-tags': ['tier:high']
+    })
+
+    assert Response.CONTENT_FIELD_NAME in response.keys()
+    content = response[Response.CONTENT_FIELD_NAME]
+    assert content['port'] == objects[1].port
+
+    response = await client.send(payload={
+        'required-slots': 10,
+        'game-mode': '1v1',
+        'required-tags': ['map:vertigo']
+    })
+    assert response[Response.CONTENT_FIELD_NAME] is None
+
+    await GameServer.collection.delete_many({})
+
+
 @pytest.mark.asyncio
 async def test_worker_returns_a_random_server_from_a_list(sanic_server):
     await GameServer.collection.delete_many({})
@@ -259,3 +362,46 @@ async def test_worker_returns_a_validation_error_for_missing_fields(sanic_server
     assert game_server.available_slots == 90
 
     await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_worker_replays_the_response_for_the_same_message_id(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    objects = await create_game_servers([
+        {
+            'host': '127.0.0.1',
+            'port': 9000,
+            'available_slots': 100,
+            'credentials': {
+                'token': 'super_secret_token'
+            },
+            'game_mode': 'team-deathmatch'
+        }
+    ])
+    game_server = objects[0]
+
+    responses = []
+    for _ in range(2):
+        client = RpcAmqpClient(
+            sanic_server.app,
+            routing_key=REQUEST_QUEUE,
+            request_exchange=REQUEST_EXCHANGE,
+            response_queue='',
+            response_exchange=RESPONSE_EXCHANGE
+        )
+        response = await client.send(
+            payload={
+                'required-slots': 10,
+                'game-mode': 'team-deathmatch'
+            },
+            properties={'message_id': 'team-deathmatch-allocation'}
+        )
+        responses.append(response)
+
+    assert responses[0][Response.CONTENT_FIELD_NAME] == responses[1][Response.CONTENT_FIELD_NAME]
+
+    game_server = await GameServer.find_one({"_id": game_server.id})
+    assert game_server.available_slots == 90
+
+    await GameServer.collection.delete_many({})
@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import AutoReconnect, ExecutionTimeout
+
+from app.game_servers.idempotency import IdempotencyCache, get_idempotency_key
+from helpers import FakeClock
+
+
+@pytest.mark.asyncio
+async def test_cache_returns_saved_value():
+    cache = IdempotencyCache(max_size=10, ttl=60)
+    await cache.set('key', {'content': 'value'})
+
+    assert await cache.get('key') == {'content': 'value'}
+    assert await cache.get('unknown') is None
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used_values():
+    cache = IdempotencyCache(max_size=2, ttl=60)
+    await cache.set('first', 1)
+    await cache.set('second', 2)
+    assert await cache.get('first') == 1
+
+    await cache.set('third', 3)
+    assert await cache.get('first') == 1
+    assert await cache.get('second') is None
+    assert await cache.get('third') == 3
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_values():
+    clock = FakeClock()
+    cache = IdempotencyCache(max_size=10, ttl=60, clock=clock)
+    await cache.set('key', 'value')
+
+    clock.now = 59
+    assert await cache.get('key') == 'value'
+
+    clock.now = 60
+    assert await cache.get('key') is None
+
+
+@pytest.mark.asyncio
+async def test_cache_calls_factory_once_for_the_same_key():
+    cache = IdempotencyCache(max_size=10, ttl=60)
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        return {'content': len(calls)}
+
+    assert await cache.get_or_create('key', factory) == {'content': 1}
+    assert await cache.get_or_create('key', factory) == {'content': 1}
+    assert await cache.get_or_create('other', factory) == {'content': 2}
+    assert len(calls) == 2
+
+
+def test_get_idempotency_key_prefers_the_message_id():
+    envelope = SimpleNamespace(is_redeliver=False)
+    properties = SimpleNamespace(message_id='message', reply_to='reply', correlation_id='event')
+    assert get_idempotency_key(envelope, properties) == ('message', True)
+
+    properties.message_id = None
+    assert get_idempotency_key(envelope, properties) == ('reply:event', False)
+    envelope.is_redeliver = True
+    assert get_idempotency_key(envelope, properties) == ('reply:event', True)
+
+    properties.reply_to = None
+    assert get_idempotency_key(envelope, properties) == (None, False)
+
+
+class FailingCollection(object):
+
+    async def find_one(self, query, max_time_ms=None):
+        raise ExecutionTimeout('operation exceeded time limit')
+
+    async def replace_one(self, query, document, upsert=False):
+        raise AutoReconnect('connection closed')
+
+
+class SlowCollection(object):
+
+    async def find_one(self, query, max_time_ms=None):
+        await asyncio.sleep(60)
+
+    async def replace_one(self, query, document, upsert=False):
+        await asyncio.sleep(60)
+
+
+@pytest.mark.asyncio
+async def test_cache_falls_back_to_local_values_when_the_collection_fails():
+    for collection in [FailingCollection(), SlowCollection()]:
+        cache = IdempotencyCache(max_size=10, ttl=60, collection=collection, timeout_ms=10)
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            return {'content': len(calls)}
+
+        assert await cache.get_or_create('key', factory) == {'content': 1}
+        assert await cache.get_or_create('key', factory) == {'content': 1}
+        assert len(calls) == 1
@@ -0,0 +1,48 @@
+from app.game_servers.telemetry import LoadEstimator
+from helpers import FakeClock
+
+
+def test_estimator_takes_the_most_utilized_resource():
+    estimator = LoadEstimator(tick_budget=20, clock=FakeClock(1000))
+    telemetry = estimator.update(None, {'cpu': 0.2, 'memory': 0.4, 'tick_time': 15})
+
+    assert telemetry['tick'] == 0.75
+    assert round(telemetry['headroom'], 6) == 0.25
+    assert not estimator.is_overloaded(telemetry)
+
+
+def test_estimator_decays_previous_reports():
+    clock = FakeClock(1000)
+    estimator = LoadEstimator(half_life=10, min_headroom=0.1, stale_after=60, clock=clock)
+    telemetry = estimator.update(None, {'cpu': 0.95, 'memory': 0.1, 'tick_time': 1})
+    assert estimator.is_overloaded(telemetry)
+
+    clock.now += 10
+    telemetry = estimator.update(telemetry, {'cpu': 0.15, 'memory': 0.1, 'tick_time': 1})
+    assert round(telemetry['cpu'], 6) == 0.55
+    assert not estimator.is_overloaded(telemetry)
+
+
+def test_estimator_ignores_stale_reports():
+    clock = FakeClock(1000)
+    estimator = LoadEstimator(stale_after=60, default_headroom=0.5, clock=clock)
+    telemetry = estimator.update(None, {'cpu': 0.95, 'memory': 0.1, 'tick_time': 1})
+    assert estimator.get_headroom(telemetry) < 0.1
+
+    clock.now += 60
+    assert estimator.get_headroom(telemetry) == 0.5
+    assert not estimator.is_overloaded(telemetry)
+
+
+def test_estimator_ranks_servers_by_headroom():
+    estimator = LoadEstimator(default_headroom=0.5, clock=FakeClock(1000))
+    busy = {'id': 'busy', 'telemetry': estimator.update(None, {
+        'cpu': 0.8, 'memory': 0.1, 'tick_time': 1
+    })}
+    idle = {'id': 'idle', 'telemetry': estimator.update(None, {
+        'cpu': 0.1, 'memory': 0.1, 'tick_time': 1
+    })}
+    unknown = {'id': 'unknown'}
+
+    ranked = estimator.rank([busy, unknown, idle])
+    assert [document['id'] for document in ranked] == ['idle', 'unknown', 'busy']
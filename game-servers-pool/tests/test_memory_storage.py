@@ -0,0 +1,168 @@
+import os
+
+import pytest
+from bson import ObjectId
+
+from app.game_servers.storage import InMemoryGameServerStorage
+
+
+def create_data(**kwargs):
+    data = {
+        'host': '127.0.0.1',
+        'port': 9000,
+        'available_slots': 100,
+        'credentials': {
+            'token': 'super_secret_token'
+        },
+        'game_mode': '1v1'
+    }
+    data.update(kwargs)
+    return data
+
+
+@pytest.mark.asyncio
+async def test_storage_allocates_slots_on_a_suitable_server():
+    storage = InMemoryGameServerStorage()
+    server_id = ObjectId()
+    await storage.register(server_id, create_data(available_slots=10))
+    await storage.register(ObjectId(), create_data(available_slots=100, game_mode='battle-royal'))
+
+    document = await storage.allocate('1v1', 8)
+    assert document['id'] == server_id
+    assert document['available_slots'] == 2
+    assert document['credentials'] == {'token': 'super_secret_token'}
+
+    assert await storage.allocate('1v1', 8) is None
+    assert await storage.allocate('team-deathmatch', 1) is None
+
+
+@pytest.mark.asyncio
+async def test_storage_frees_slots_and_evicts_servers():
+    storage = InMemoryGameServerStorage()
+    server_id = ObjectId()
+    await storage.register(server_id, create_data(available_slots=10))
+
+    document = await storage.free(server_id, 5)
+    assert document == {
+        'id': server_id, 'game_mode': '1v1', 'available_slots': 15, 'version': 2
+    }
+    assert await storage.free(ObjectId(), 5) is None
+
+    document = await storage.evict(server_id)
+    assert document == {'id': server_id, 'game_mode': '1v1', 'version': 3}
+    assert await storage.evict(server_id) is None
+    assert await storage.summarize() == {}
+
+
+@pytest.mark.asyncio
+async def test_storage_increments_versions_of_changed_servers():
+    storage = InMemoryGameServerStorage()
+    server_id = ObjectId()
+    assert await storage.register(server_id, create_data(available_slots=10)) == {
+        'id': server_id, 'version': 1
+    }
+
+    assert (await storage.allocate('1v1', 2))['version'] == 2
+    assert (await storage.free(server_id, 2))['version'] == 3
+    assert (await storage.evict(server_id))['version'] == 4
+
+    # A server registered again is newer than its removal
+    assert (await storage.register(server_id, create_data()))['version'] == 5
+
+
+@pytest.mark.asyncio
+async def test_storage_summarizes_and_filters_servers():
+    storage = InMemoryGameServerStorage()
+    await storage.register(ObjectId(), create_data(available_slots=10))
+    await storage.register(ObjectId(), create_data(available_slots=50))
+    await storage.register(ObjectId(), create_data(available_slots=50, game_mode='battle-royal'))
+
+    assert await storage.summarize() == {
+        '1v1': {'servers': 2, 'available_slots': 60},
+        'battle-royal': {'servers': 1, 'available_slots': 50},
+    }
+    assert await storage.summarize('1v1') == {'1v1': {'servers': 2, 'available_slots': 60}}
+
+    filters = {'game_mode': '1v1', 'min_slots': 20}
+    documents = [document async for document in storage.servers(filters)]
+    assert len(documents) == 1
+    assert documents[0]['available_slots'] == 50
+    assert 'credentials' not in documents[0].keys()
+
+
+@pytest.mark.asyncio
+async def test_storage_restores_pool_from_snapshot(tmpdir):
+    snapshot_path = os.path.join(str(tmpdir), 'pool.json')
+    server_id = ObjectId()
+
+    storage = InMemoryGameServerStorage(snapshot_path=snapshot_path)
+    await storage.init()
+    await storage.register(server_id, create_data(available_slots=10))
+    await storage.close()
+    # The snapshot replaces the previous one without leaving temporary files
+    assert os.listdir(str(tmpdir)) == ['pool.json']
+
+    storage = InMemoryGameServerStorage(snapshot_path=snapshot_path)
+    await storage.init()
+    document = await storage.allocate('1v1', 10)
+    assert document['id'] == server_id
+    assert document['credentials'] == {'token': 'super_secret_token'}
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_storage_allocates_slots_in_the_requested_region():
+    storage = InMemoryGameServerStorage()
+    eu_server_id, us_server_id = ObjectId(), ObjectId()
+    await storage.register(eu_server_id, create_data(available_slots=10, region='eu-west'))
+    await storage.register(us_server_id, create_data(available_slots=100, region='us-east'))
+
+    document = await storage.allocate('1v1', 8, region='eu-west')
+    assert document['id'] == eu_server_id
+    assert await storage.allocate('1v1', 8, region='eu-west') is None
+    assert await storage.allocate('1v1', 8, region='eu-north') is None
+
+    document = await storage.allocate('1v1', 8)
+    assert document['id'] == us_server_id
+
+    await storage.evict(eu_server_id)
+    assert list(storage.free_regions.keys()) == [('1v1', 'us-east')]
+    assert us_server_id in storage.free_regions[('1v1', 'us-east')]
+
+
+@pytest.mark.asyncio
+async def test_storage_allocates_slots_on_a_server_with_the_requested_tags():
+    storage = InMemoryGameServerStorage()
+    dust_server_id, nuke_server_id = ObjectId(), ObjectId()
+    await storage.register(dust_server_id, create_data(tags=['map:dust2', 'tier:high']))
+    await storage.register(nuke_server_id, create_data(tags=['map:nuke', 'tier:high']))
+
+    document = await storage.allocate('1v1', 8, tags=['map:nuke', 'tier:high'])
+    assert document['id'] == nuke_server_id
+    assert await storage.allocate('1v1', 8, tags=['map:nuke', 'tier:low']) is None
+    assert await storage.allocate('1v1', 8, tags=['map:vertigo']) is None
+
+    await storage.evict(nuke_server_id)
+    assert ('1v1', 'map:nuke') not in storage.tags
+    assert storage.tags[('1v1', 'tier:high')] == {dust_server_id}
+
+
+@pytest.mark.asyncio
+async def test_storage_samples_only_servers_with_free_slots():
+    storage = InMemoryGameServerStorage()
+    server_ids = [ObjectId() for _ in range(100)]
+    for server_id in server_ids:
+        await storage.register(server_id, create_data(available_slots=2))
+
+    # Servers without free slots leave the index, and the last suitable
+    # server is found once random probes miss it
+    for _ in range(99):
+        assert await storage.allocate('1v1', 2)
+    assert len(storage.free_servers['1v1']) == 1
+    assert len(storage.free_regions[('1v1', None)]) == 1
+    assert (await storage.allocate('1v1', 2))['available_slots'] == 0
+    assert '1v1' not in storage.free_servers
+    assert await storage.allocate('1v1', 1) is None
+
+    await storage.free(server_ids[0], 1)
+    assert (await storage.allocate('1v1', 1))['id'] == server_ids[0]
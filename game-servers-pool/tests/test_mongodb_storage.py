@@ -0,0 +1,131 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from pymongo import WriteConcern
+from pymongo.errors import ExecutionTimeout, OperationFailure
+
+from app.game_servers.storage import CHANGE_DELETE, CHANGE_UPDATE, StorageTimeoutError
+from app.game_servers.storage.mongodb import (
+    MongoGameServerStorage, get_change, get_servers_query, get_write_concern, with_deadline
+)
+from app.game_servers.telemetry import LoadEstimator
+
+
+def test_get_write_concern():
+    assert get_write_concern(None) is None
+    assert get_write_concern('1', 500) == WriteConcern(w=1, wtimeout=500)
+    assert get_write_concern('majority', 500) == WriteConcern(w='majority', wtimeout=500)
+
+
+@pytest.mark.asyncio
+async def test_with_deadline_translates_timeouts():
+
+    @with_deadline
+    async def timed_out():
+        raise ExecutionTimeout('operation exceeded time limit', code=50)
+
+    with pytest.raises(StorageTimeoutError):
+        await timed_out()
+
+
+@pytest.mark.asyncio
+async def test_with_deadline_keeps_other_errors():
+
+    @with_deadline
+    async def failed():
+        raise OperationFailure('duplicate key', code=11000)
+
+    with pytest.raises(OperationFailure):
+        await failed()
+
+
+def test_get_change_returns_updated_server():
+    change = get_change({
+        '_id': {'_data': 'token'},
+        'operationType': 'update',
+        'documentKey': {'_id': 'first'},
+        'fullDocument': {'_id': 'first', 'game_mode': '1v1', 'available_slots': 10},
+    })
+
+    assert change == {
+        'token': {'_data': 'token'},
+        'operation': CHANGE_UPDATE,
+        'id': 'first',
+        'game_mode': '1v1',
+        'available_slots': 10,
+    }
+
+
+def test_get_change_skips_update_of_removed_server():
+    change = get_change({
+        '_id': {'_data': 'token'},
+        'operationType': 'update',
+        'documentKey': {'_id': 'first'},
+        'fullDocument': None,
+    })
+
+    assert change is None
+
+
+def test_get_change_returns_deleted_server():
+    change = get_change({
+        '_id': {'_data': 'token'},
+        'operationType': 'delete',
+        'documentKey': {'_id': 'first'},
+    })
+
+    assert change == {'token': {'_data': 'token'}, 'operation': CHANGE_DELETE, 'id': 'first'}
+
+
+def test_get_servers_query_selects_servers_modified_since():
+    since = datetime(2019, 1, 1)
+    assert get_servers_query({'game_mode': '1v1', 'modified_since': since}) == {
+        'game_mode': '1v1',
+        'last_modified': {'$gte': since},
+    }
+    assert get_servers_query({}) == {}
+
+
+class FakeTelemetryCollection(object):
+    """
+    Collection of a single server, where another report is saved right
+    after the first read of the telemetry.
+    """
+
+    def __init__(self):
+        self.document = {'_id': 'first', 'game_mode': '1v1', 'telemetry': None}
+        self.queries = []
+
+    async def find_one(self, query, projection=None, max_time_ms=None):
+        telemetry = self.document['telemetry']
+        if not self.queries:
+            self.document['telemetry'] = {'reported_at': 900, 'cpu': 0.5, 'memory': 0.5,
+                                          'tick': 0.5, 'headroom': 0.5, 'overloaded_until': 0}
+        return {'_id': self.document['_id'], 'telemetry': telemetry}
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None,
+                                  **kwargs):
+        self.queries.append(query)
+        telemetry = self.document['telemetry']
+        if telemetry and telemetry['reported_at'] != query['telemetry.reported_at']:
+            return None
+        self.document.update(update['$set'])
+        return {'_id': self.document['_id'], 'game_mode': self.document['game_mode']}
+
+
+@pytest.mark.asyncio
+async def test_report_is_applied_over_the_latest_saved_report():
+    collection = FakeTelemetryCollection()
+    estimator = LoadEstimator(half_life=100, stale_after=200, clock=lambda: 1000)
+    storage = MongoGameServerStorage(SimpleNamespace(collection=collection), estimator=estimator)
+
+    result = await storage.report('first', {'cpu': 0.1, 'memory': 0.1, 'tick_time': 1.6})
+    assert collection.queries == [
+        {'_id': 'first', 'telemetry.reported_at': None},
+        {'_id': 'first', 'telemetry.reported_at': 900},
+    ]
+    assert result['game_mode'] == '1v1'
+    # The concurrent report was averaged in
+    assert result['telemetry']['cpu'] == pytest.approx(0.5 * 0.5 + 0.1 * 0.5)
+    assert collection.document['telemetry'] == result['telemetry']
@@ -0,0 +1,170 @@
+import asyncio
+import json
+from itertools import count
+from types import SimpleNamespace
+
+import pytest
+from sage_utils.amqp.clients import RpcAmqpClient
+from sage_utils.wrappers import Response
+
+from app.game_servers.documents import GameServer
+from app.game_servers.pool_snapshot import HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION
+from app.workers.pool_events import PoolEventsWorker
+from app.workers.register_server import RegisterServerWorker
+from app.workers.unregister_server import UnregisterServerWorker
+from app.workers.update_server import UpdateServerWorker
+
+
+async def bind_changes_queue(app):
+    transport, protocol = await app.amqp.connect()
+    channel = await protocol.channel()
+    await channel.exchange_declare(
+        exchange_name=PoolEventsWorker.EXCHANGE_NAME,
+        type_name='topic',
+        durable=True,
+        passive=False,
+        auto_delete=False
+    )
+    result = await channel.queue_declare(queue_name='', exclusive=True, auto_delete=True)
+    await channel.queue_bind(
+        queue_name=result['queue'],
+        exchange_name=PoolEventsWorker.EXCHANGE_NAME,
+        routing_key='game-servers-pool.changes.#'
+    )
+
+    changes = asyncio.Queue()
+
+    async def on_change(_channel, body, _envelope, _properties):
+        changes.put_nowait(json.loads(body))
+
+    await channel.basic_consume(on_change, queue_name=result['queue'], no_ack=True)
+    return transport, protocol, changes
+
+
+async def call(app, worker_class, payload):
+    client = RpcAmqpClient(
+        app,
+        routing_key=worker_class.QUEUE_NAME,
+        request_exchange=worker_class.REQUEST_EXCHANGE_NAME,
+        response_queue='',
+        response_exchange=worker_class.RESPONSE_EXCHANGE_NAME
+    )
+    return await client.send(payload=payload)
+
+
+@pytest.mark.asyncio
+async def test_worker_publishes_changes_in_sequence(sanic_server):
+    await GameServer.collection.delete_many({})
+    app = sanic_server.app
+    while app.pool_events.events is None:
+        await asyncio.sleep(0.01)
+    transport, protocol, changes = await bind_changes_queue(app)
+
+    response = await call(app, RegisterServerWorker, {
+        'host': '127.0.0.1',
+        'port': 9000,
+        'available-slots': 100,
+        'credentials': {'token': 'super_secret_token'},
+        'game-mode': '1v1'
+    })
+    server_id = response[Response.CONTENT_FIELD_NAME]['id']
+    await call(app, UpdateServerWorker, {'id': server_id, 'freed-slots': 10})
+    await call(app, UnregisterServerWorker, {'id': server_id})
+
+    received = [await asyncio.wait_for(changes.get(), 5) for _ in range(3)]
+    assert [change['op'] for change in received] == ['register', 'free', 'evict']
+    assert {change['id'] for change in received} == {server_id}
+    assert {change['game-mode'] for change in received} == {'1v1'}
+    assert received[0]['available-slots'] == 100
+    assert received[1]['available-slots'] == 110
+    assert received[1]['delta'] == 10
+    assert 'delta' not in received[0]
+
+    # Versions of the server grow with each change, including its removal
+    versions = [change['version'] for change in received]
+    assert versions == sorted(set(versions))
+
+    # Events of one process share the source and are numbered without gaps
+    assert {change['source'] for change in received} == {app.pool_events.source}
+    first_seq = received[0]['seq']
+    assert [change['seq'] for change in received] == [first_seq, first_seq + 1, first_seq + 2]
+    assert app.pool_events.last_sequence == first_seq + 2
+
+    await protocol.close()
+    transport.close()
+    await GameServer.collection.delete_many({})
+
+
+class FakeChangesStorage(object):
+
+    def __init__(self):
+        self.calls = []
+
+    async def get_operation_time(self):
+        self.calls.append('operation-time')
+        return 42
+
+    async def servers(self, filters=None, batch_size=1000):
+        self.calls.append('servers')
+        yield {'id': 'first', 'game_mode': '1v1', 'available_slots': 10}
+
+    async def changes(self, resume_token=None, start_at=None):
+        self.calls.append(('changes', resume_token, start_at))
+        # The server was changed while the pool was read
+        yield {
+            'token': 'token', 'operation': 'update', 'id': 'first',
+            'game_mode': '1v1', 'available_slots': 4
+        }
+        raise asyncio.CancelledError()
+
+
+def create_worker(storage=None, snapshot_path=None):
+    app = SimpleNamespace(storage=storage, config={
+        "CAPACITY_WATERMARKS": {'1v1': (10, 50)},
+        "CAPACITY_RESYNC_INTERVAL": 0,
+        "CAPACITY_SNAPSHOT_PATH": snapshot_path,
+        "CAPACITY_SNAPSHOT_INTERVAL": 0,
+        "CHANGE_STREAM_TOKEN_KEY": 'test',
+        "CHANGE_STREAM_TOKEN_SAVE_INTERVAL": 0,
+    })
+    return PoolEventsWorker(app)
+
+
+@pytest.mark.asyncio
+async def test_worker_starts_changes_from_the_time_before_reload():
+    storage = FakeChangesStorage()
+    worker = create_worker(storage)
+
+    with pytest.raises(asyncio.CancelledError):
+        await worker.watch_changes()
+
+    assert storage.calls == ['operation-time', 'servers', ('changes', None, 42)]
+    assert worker.capacity.free_slots == {'1v1': 4}
+
+
+def test_worker_publishes_only_changes_when_capacity_is_not_tracked():
+    worker = create_worker()
+    worker.source, worker.sequence, worker.events = 'source', count(1), asyncio.Queue()
+    worker.tracks_capacity = False
+
+    worker.server_changed('register', 'first', '1v1', 5)
+    worker.server_removed('first', '1v1')
+
+    routing_keys = [worker.events.get_nowait()[0] for _ in range(worker.events.qsize())]
+    assert routing_keys == [
+        'game-servers-pool.changes.register.1v1',
+        'game-servers-pool.changes.evict.1v1',
+    ]
+    assert worker.capacity.free_slots == {}
+
+
+@pytest.mark.asyncio
+async def test_worker_ignores_a_snapshot_that_cannot_be_read(tmpdir):
+    path = str(tmpdir.join('pool.snapshot'))
+    with open(path, 'wb') as snapshot:
+        snapshot.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 4) + b'{not')
+    worker = create_worker(snapshot_path=path)
+
+    await worker.load_snapshot()
+    assert worker.snapshot_state is None
+    assert not worker.capacity_loaded
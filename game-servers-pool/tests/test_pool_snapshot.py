@@ -0,0 +1,72 @@
+import os
+
+from bson import ObjectId, json_util
+
+from app.game_servers.pool_snapshot import (
+    HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, dump_snapshot, read_snapshot, write_snapshot
+)
+from app.game_servers.pool_store import PoolStore
+
+
+def test_snapshot_restores_the_pool_store(tmpdir):
+    path = str(tmpdir.join('pool.snapshot'))
+    store = PoolStore()
+    first, second, removed = ObjectId(), ObjectId(), ObjectId()
+    store.add(first, '1v1', 10, host='10.0.0.1', port=9000, region='eu-west', tags=['ranked'])
+    store.add(removed, '1v1', 5)
+    store.add('custom-server', 'battle-royale', 100, host='10.0.0.2', port=9001)
+    store.add(second, 'battle-royale', 20, host='10.0.0.1', port=9002)
+    store.remove(removed)
+    store.set_headroom(second, 0.75, 2000)
+    token = {'_data': 'token'}
+
+    write_snapshot(path, dump_snapshot(store, {'written_at': 1000, 'resume_token': token}))
+    loaded, state = read_snapshot(path)
+
+    assert state == {'written_at': 1000, 'resume_token': token}
+    assert len(loaded) == 3
+    for server_id in (first, second, 'custom-server'):
+        assert loaded.get(server_id) == store.get(server_id)
+    assert removed not in loaded
+    assert sorted(loaded.candidates('battle-royale', 1)) == sorted(['custom-server', str(second)])
+    assert loaded.tag_masks[loaded.get_row(first)] == store.tag_masks[store.get_row(first)]
+    assert loaded.headrooms[loaded.get_row(second)] == 0.75
+
+    # The loaded store keeps being updated in place
+    loaded.add(ObjectId(), '1v1', 3)
+    assert len(loaded.keys) == 4
+    loaded.remove(first)
+    assert len(list(loaded.candidates('1v1', 1))) == 1
+
+
+def test_snapshot_is_ignored_when_missing_or_invalid(tmpdir):
+    path = str(tmpdir.join('pool.snapshot'))
+    assert read_snapshot(path) == (None, None)
+
+    write_snapshot(path, b'not a snapshot')
+    assert read_snapshot(path) == (None, None)
+
+
+def test_snapshot_is_ignored_when_blocks_do_not_fit_the_file(tmpdir):
+    path = str(tmpdir.join('pool.snapshot'))
+    store = PoolStore()
+    store.add(ObjectId(), '1v1', 10)
+    store.add(ObjectId(), 'battle-royale', 20)
+    content = dump_snapshot(store, {'written_at': 1000})
+
+    write_snapshot(path, content[:-1])
+    assert read_snapshot(path) == (None, None)
+
+    # Metadata claiming more rows than the columns hold
+    _magic, _version, metadata_size = HEADER.unpack_from(content, 0)
+    metadata = json_util.loads(content[HEADER.size:HEADER.size + metadata_size].decode('utf-8'))
+    metadata['rows'] = 3
+    metadata = json_util.dumps(metadata).encode('utf-8')
+    header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(metadata))
+    write_snapshot(path, header + metadata + content[HEADER.size + metadata_size:])
+    assert read_snapshot(path) == (None, None)
+
+    write_snapshot(path, content)
+    loaded, _state = read_snapshot(path)
+    assert len(loaded) == 2
+    assert os.listdir(str(tmpdir)) == ['pool.snapshot']
@@ -0,0 +1,58 @@
+from bson import ObjectId
+
+from app.game_servers.pool_store import PoolStore
+
+
+def test_store_adds_updates_and_removes_servers():
+    store = PoolStore()
+    first, second = ObjectId(), ObjectId()
+    store.add(first, '1v1', 10, host='10.0.0.1', port=9000)
+    store.add(str(second), 'team-deathmatch', 5, host='10.0.0.1', port=9001)
+
+    assert len(store) == 2
+    assert str(first) in store
+    assert store.get(first) == {
+        'id': str(first),
+        'host': '10.0.0.1',
+        'port': 9000,
+        'game_mode': '1v1',
+        'region': None,
+        'available_slots': 10,
+    }
+    assert len(store.hosts) == 1
+
+    assert store.add_slots(str(first), -4) == 6
+    assert store.get_slots(first) == 6
+
+    store.add(first, 'team-deathmatch', 8, host='10.0.0.2', port=9000)
+    assert store.get_game_mode(first) == 'team-deathmatch'
+    assert sorted(store.candidates('team-deathmatch', 1)) == sorted([str(first), str(second)])
+    assert list(store.candidates('1v1', 1)) == []
+
+    assert store.remove(second) == ('team-deathmatch', 5)
+    assert store.remove(second) is None
+    assert store.get(second) is None
+    assert list(store.candidates('team-deathmatch', 1)) == [str(first)]
+
+
+def test_store_reuses_rows_of_removed_servers():
+    store = PoolStore()
+    server_ids = [ObjectId() for _ in range(3)]
+    for server_id in server_ids:
+        store.add(server_id, '1v1', 1)
+
+    store.remove(server_ids[0])
+    store.add('custom-server', '1v1', 3)
+
+    assert len(store.keys) == 3
+    assert sorted(store.candidates('1v1', 2)) == ['custom-server']
+    assert store.get('custom-server')['available_slots'] == 3
+
+
+def test_store_scans_only_candidates_with_enough_slots():
+    store = PoolStore()
+    for index in range(10):
+        store.add('server-{}'.format(index), '1v1' if index % 2 else 'battle-royale', index)
+
+    assert sorted(store.candidates('1v1', 5)) == ['server-5', 'server-7', 'server-9']
+    assert list(store.candidates('unknown', 0)) == []
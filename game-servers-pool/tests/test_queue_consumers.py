@@ -0,0 +1,184 @@
+import asyncio
+
+import pytest
+
+from app.workers.scaling import QueueConsumers
+
+
+class FakeChannel(object):
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.prefetch_count = None
+        self.consumer_tags = []
+        self.consumer_prefetch_counts = {}
+        self.is_open = True
+
+    async def basic_qos(self, prefetch_count, prefetch_size, connection_global):
+        self.prefetch_count = prefetch_count
+
+    async def basic_consume(self, callback, queue_name):
+        # The prefetch applies to consumers started after it was set
+        consumer_tag = '{}-{}'.format(queue_name, len(self.consumer_prefetch_counts))
+        self.consumer_tags.append(consumer_tag)
+        self.consumer_prefetch_counts[consumer_tag] = self.prefetch_count
+        return {'consumer_tag': consumer_tag}
+
+    async def basic_cancel(self, consumer_tag):
+        self.consumer_tags.remove(consumer_tag)
+
+    async def close(self):
+        self.is_open = False
+
+    async def queue_declare(self, queue_name, passive):
+        return {'queue': queue_name, 'message_count': self.queue['depth'], 'consumer_count': 1}
+
+
+class FakeProtocol(object):
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.channels = []
+
+    async def channel(self):
+        channel = FakeChannel(self.queue)
+        self.channels.append(channel)
+        return channel
+
+
+class FakeWorker(object):
+    QUEUE_NAME = 'game-servers-pool.server.retrieve'
+
+    def __init__(self):
+        self.consumed = []
+
+    async def consume_callback(self, channel, body, envelope, properties):
+        self.consumed.append(body)
+
+
+async def create_consumers(queue):
+    protocol = FakeProtocol(queue)
+    consumers = QueueConsumers(
+        FakeWorker(), protocol, min_prefetch_count=8, max_prefetch_count=32, max_channels=3
+    )
+    await consumers.add_consumer(await protocol.channel())
+    return consumers, protocol
+
+
+@pytest.mark.asyncio
+async def test_queue_consumers_scale_up_while_backlog_grows():
+    queue = {'depth': 500}
+    consumers, protocol = await create_consumers(queue)
+    for _ in range(100):
+        await consumers.consume_callback(None, b'{}', None, None)
+
+    await consumers.measure(elapsed=1.0)
+    assert consumers.rate == 100.0
+    assert consumers.get_target() == (2, 16)
+
+    consumers.depth, consumers.rate = 500, 100.0
+    await consumers.set_prefetch_count(32)
+    for _ in range(2):
+        await consumers.add_consumer()
+
+    assert consumers.get_target() == (3, 32)
+    assert [channel.prefetch_count for channel in protocol.channels] == [32, 32, 32]
+    assert [
+        channel.consumer_prefetch_counts[consumer_tag]
+        for channel, consumer_tag in consumers.consumers
+    ] == [32, 32, 32]
+    assert [len(channel.consumer_tags) for channel in protocol.channels] == [1, 1, 1]
+    assert consumers.get_stats()['channels'] == 3
+    assert len(consumers.worker.consumed) == 100
+
+
+@pytest.mark.asyncio
+async def test_queue_consumers_scale_down_when_queue_is_empty():
+    queue = {'depth': 0}
+    consumers, protocol = await create_consumers(queue)
+    await consumers.set_prefetch_count(32)
+    await consumers.add_consumer()
+
+    await consumers.measure(elapsed=1.0)
+    assert consumers.get_target() == (1, 16)
+
+    await consumers.remove_consumer()
+    assert consumers.idle_channels == [protocol.channels[1]]
+    assert protocol.channels[1].consumer_tags == []
+
+    # Idle channels are reused instead of opening new ones
+    await consumers.add_consumer()
+    assert len(protocol.channels) == 2
+    assert consumers.idle_channels == []
+
+
+@pytest.mark.asyncio
+async def test_queue_consumers_keep_size_while_backlog_is_cleared_in_time():
+    queue = {'depth': 50}
+    consumers, _protocol = await create_consumers(queue)
+    consumers.delivered = 200
+
+    await consumers.measure(elapsed=1.0)
+    assert consumers.get_target() == (1, 8)
+
+
+@pytest.mark.asyncio
+async def test_queue_consumers_cancel_before_closing_channels():
+    queue = {'depth': 0}
+    consumers, protocol = await create_consumers(queue)
+    await consumers.add_consumer()
+
+    await consumers.cancel()
+    assert consumers.stopped
+    assert consumers.consumers == []
+    assert [channel.consumer_tags for channel in protocol.channels] == [[], []]
+    assert all(channel.is_open for channel in protocol.channels)
+
+    await consumers.close()
+    assert not any(channel.is_open for channel in protocol.channels)
+
+
+@pytest.mark.asyncio
+async def test_queue_consumers_keep_scaling_after_errors():
+    queue = {'depth': 500}
+    consumers, protocol = await create_consumers(queue)
+    consumers.interval = 0
+    failures = []
+
+    async def open_channel():
+        # The first attempt to scale up fails, the next one succeeds
+        if not failures:
+            failures.append(True)
+            raise RuntimeError('channel error')
+        consumers.stopped = True
+        return await FakeProtocol.channel(protocol)
+
+    protocol.channel = open_channel
+    await consumers.scale()
+
+    assert failures == [True]
+    assert consumers.get_stats()['channels'] == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_consumers_are_started_again_when_none_are_left():
+    queue = {'depth': 0}
+    consumers, protocol = await create_consumers(queue)
+    consumers.interval = 0
+    await consumers.set_prefetch_count(16)
+
+    async def fail_to_consume(callback, queue_name):
+        raise RuntimeError('channel error')
+
+    async def open_channel():
+        consumers.stopped = True
+        return await FakeProtocol.channel(protocol)
+
+    # Restarting the consumer for the lower prefetch fails on its channel,
+    # so the next poll consumes the queue through a new one
+    protocol.channels[0].basic_consume = fail_to_consume
+    protocol.channel = open_channel
+    await asyncio.wait_for(consumers.scale(), 1)
+
+    assert consumers.get_stats()['channels'] == 1
+    assert protocol.channels[-1].consumer_tags
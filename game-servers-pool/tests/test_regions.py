@@ -0,0 +1,24 @@
+from app.game_servers.regions import ANY_REGION, get_regions_order
+
+
+def test_regions_order_without_hints_allows_any_region():
+    assert get_regions_order() == [ANY_REGION]
+    assert get_regions_order(fallback_to_any=False) == [ANY_REGION]
+
+
+def test_regions_order_prefers_lowest_ping():
+    order = get_regions_order(
+        regions=['eu-central'],
+        ping={'us-east': 110, 'eu-west': 35, 'eu-central': 40}
+    )
+    assert order == ['eu-west', 'eu-central', 'us-east', ANY_REGION]
+
+
+def test_regions_order_appends_fallbacks_after_requested_regions():
+    fallbacks = {'eu-west': ['eu-central', 'us-east'], 'eu-central': ['eu-west', 'eu-north']}
+    order = get_regions_order(
+        regions=['eu-west', 'eu-central'],
+        fallbacks=fallbacks,
+        fallback_to_any=False
+    )
+    assert order == ['eu-west', 'eu-central', 'us-east', 'eu-north']
@@ -5,6 +5,7 @@ from sage_utils.amqp.clients import RpcAmqpClient
 from sage_utils.constants import VALIDATION_ERROR
 from sage_utils.wrappers import Response
 
+from app.game_servers.allocation import get_party_key
 from app.game_servers.documents import GameServer
 from app.workers.register_server import RegisterServerWorker
 
@@ -73,8 +74,8 @@ async def test_worker_registers_a_new_server_successfully(sanic_server):
     assert Response.CONTENT_FIELD_NAME in response.keys()
     content = response[Response.CONTENT_FIELD_NAME]
 
-    assert len(content.keys()) == 1
-    assert 'id' in content.keys()
+    assert set(content.keys()) == {'id', 'party-key'}
+    assert content['party-key'] == get_party_key('party-secret', content['id'])
 
     servers_count = await GameServer.collection.count_documents({})
     assert servers_count == 1
@@ -118,8 +119,8 @@ async def test_worker_updates_a_new_server_successfully(sanic_server):
     assert Response.CONTENT_FIELD_NAME in response.keys()
     content = response[Response.CONTENT_FIELD_NAME]
 
-    assert len(content.keys()) == 1
-    assert 'id' in content.keys()
+    assert set(content.keys()) == {'id', 'party-key'}
+    assert content['party-key'] == get_party_key('party-secret', content['id'])
 
     servers_count = await GameServer.collection.count_documents({})
     assert servers_count == 1
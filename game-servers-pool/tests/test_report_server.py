@@ -0,0 +1,109 @@
+import pytest
+from sage_utils.amqp.clients import RpcAmqpClient
+from sage_utils.constants import VALIDATION_ERROR, NOT_FOUND_ERROR
+from sage_utils.wrappers import Response
+
+from app.game_servers.documents import GameServer
+from app.workers.get_server import GetServerWorker
+from app.workers.report_server import ReportServerWorker
+
+
+REQUEST_QUEUE = ReportServerWorker.QUEUE_NAME
+REQUEST_EXCHANGE = ReportServerWorker.REQUEST_EXCHANGE_NAME
+RESPONSE_EXCHANGE = ReportServerWorker.RESPONSE_EXCHANGE_NAME
+
+
+async def create_game_server(port):
+    game_server = GameServer(**{
+        'host': '127.0.0.1',
+        'port': port,
+        'available_slots': 100,
+        'credentials': {
+            'token': 'super_secret_token'
+        },
+        'game_mode': '1v1'
+    })
+    await game_server.commit()
+    return game_server
+
+
+@pytest.mark.asyncio
+async def test_worker_excludes_overloaded_game_server_from_allocations(sanic_server):
+    await GameServer.collection.delete_many({})
+    overloaded_server = await create_game_server(9000)
+    game_server = await create_game_server(9001)
+
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    response = await client.send(payload={
+        'id': str(overloaded_server.id),
+        'cpu': 0.98,
+        'memory': 0.5,
+        'tick-time': 10
+    })
+
+    assert Response.CONTENT_FIELD_NAME in response.keys()
+    content = response[Response.CONTENT_FIELD_NAME]
+    assert content['id'] == str(overloaded_server.id)
+    assert content['overloaded'] is True
+
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=GetServerWorker.QUEUE_NAME,
+        request_exchange=GetServerWorker.REQUEST_EXCHANGE_NAME,
+        response_queue='',
+        response_exchange=GetServerWorker.RESPONSE_EXCHANGE_NAME
+    )
+    for _ in range(3):
+        response = await client.send(payload={'required-slots': 1, 'game-mode': '1v1'})
+        content = response[Response.CONTENT_FIELD_NAME]
+        assert content['port'] == game_server.port
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_worker_returns_not_found_error_for_non_existing_game_server(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    response = await client.send(payload={
+        'id': '5b6a085123cf24aef53b4c78',
+        'cpu': 0.5,
+        'memory': 0.5,
+        'tick-time': 10
+    })
+
+    assert Response.ERROR_FIELD_NAME in response.keys()
+    error = response[Response.ERROR_FIELD_NAME]
+    assert error[Response.ERROR_TYPE_FIELD_NAME] == NOT_FOUND_ERROR
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_worker_returns_validation_error_for_missing_metrics(sanic_server):
+    client = RpcAmqpClient(
+        sanic_server.app,
+        routing_key=REQUEST_QUEUE,
+        request_exchange=REQUEST_EXCHANGE,
+        response_queue='',
+        response_exchange=RESPONSE_EXCHANGE
+    )
+    response = await client.send(payload={'id': '5b6a085123cf24aef53b4c78'})
+
+    assert Response.ERROR_FIELD_NAME in response.keys()
+    error = response[Response.ERROR_FIELD_NAME]
+    assert error[Response.ERROR_TYPE_FIELD_NAME] == VALIDATION_ERROR
+    assert set(error[Response.ERROR_DETAILS_FIELD_NAME].keys()) == {'cpu', 'memory', 'tick-time'}
@@ -0,0 +1,60 @@
+import pytest
+
+from app.game_servers.changes import ResumeTokenStore
+from helpers import FakeClock
+
+
+class FakeCollection(object):
+
+    def __init__(self):
+        self.documents = {}
+        self.writes = 0
+
+    async def find_one(self, query):
+        return self.documents.get(query['_id'], None)
+
+    async def replace_one(self, query, replacement, upsert=False):
+        self.writes += 1
+        self.documents[query['_id']] = replacement
+
+
+@pytest.mark.asyncio
+async def test_store_keeps_token_in_memory_without_collection():
+    store = ResumeTokenStore('game-servers-pool')
+
+    assert await store.load() is None
+    await store.save({'_data': 'first'})
+    assert await store.load() == {'_data': 'first'}
+
+
+@pytest.mark.asyncio
+async def test_store_throttles_writes_to_collection():
+    clock, collection = FakeClock(), FakeCollection()
+    store = ResumeTokenStore('game-servers-pool', collection, save_interval=1, clock=clock)
+
+    await store.save({'_data': 'first'})
+    await store.save({'_data': 'second'})
+    assert collection.writes == 1
+    assert store.token == {'_data': 'second'}
+
+    clock.now = 1
+    await store.save({'_data': 'third'})
+    assert collection.writes == 2
+
+    restarted_store = ResumeTokenStore('game-servers-pool', collection)
+    assert await restarted_store.load() == {'_data': 'third'}
+
+
+@pytest.mark.asyncio
+async def test_store_flushes_token_skipped_due_to_interval():
+    clock, collection = FakeClock(), FakeCollection()
+    store = ResumeTokenStore('game-servers-pool', collection, save_interval=1, clock=clock)
+
+    await store.save({'_data': 'first'})
+    await store.flush()
+    assert collection.writes == 1
+
+    await store.save({'_data': 'second'})
+    await store.flush()
+    assert collection.writes == 2
+    assert collection.documents['game-servers-pool']['token'] == {'_data': 'second'}
@@ -0,0 +1,92 @@
+import pytest
+from sage_utils.constants import AUTHORIZATION_ERROR, VALIDATION_ERROR
+from sage_utils.wrappers import Response
+
+from app.game_servers.documents import GameServer
+
+
+RETRIEVE_PATH = '/game-servers-pool/api/servers/retrieve'
+AUTHORIZATION_HEADERS = {'Authorization': 'Bearer retrieve-token'}
+
+
+@pytest.mark.asyncio
+async def test_view_returns_a_server_and_allocates_slots(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    game_server = GameServer(**{
+        'host': '127.0.0.1',
+        'port': 9000,
+        'available_slots': 100,
+        'credentials': {
+            'token': 'super_secret_token'
+        },
+        'game_mode': '1v1'
+    })
+    await game_server.commit()
+
+    response = await sanic_server.post(
+        RETRIEVE_PATH,
+        json={'required-slots': 20, 'game-mode': '1v1'},
+        headers=dict(AUTHORIZATION_HEADERS, **{'X-Correlation-Id': 'event-name'})
+    )
+    assert response.status == 200
+    data = await response.json()
+
+    assert data[Response.EVENT_FIELD_NAME] == 'event-name'
+    content = data[Response.CONTENT_FIELD_NAME]
+    assert content == {
+        'host': game_server.host,
+        'port': game_server.port,
+        'credentials': game_server.credentials,
+    }
+
+    game_server = await GameServer.find_one({"_id": game_server.id})
+    assert game_server.available_slots == 80
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_view_returns_none_for_an_empty_list_of_servers(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    response = await sanic_server.post(
+        RETRIEVE_PATH,
+        json={'required-slots': 20, 'game-mode': '1v1'},
+        headers=AUTHORIZATION_HEADERS
+    )
+    assert response.status == 200
+    data = await response.json()
+
+    assert data[Response.CONTENT_FIELD_NAME] is None
+
+
+@pytest.mark.asyncio
+async def test_view_returns_a_validation_error_for_missing_fields(sanic_server):
+    response = await sanic_server.post(RETRIEVE_PATH, json={}, headers=AUTHORIZATION_HEADERS)
+    assert response.status == 400
+    data = await response.json()
+
+    error = data[Response.ERROR_FIELD_NAME]
+    assert error[Response.ERROR_TYPE_FIELD_NAME] == VALIDATION_ERROR
+    assert set(error[Response.ERROR_DETAILS_FIELD_NAME].keys()) == {'required-slots', 'game-mode'}
+
+
+@pytest.mark.asyncio
+async def test_view_refuses_requests_without_a_valid_token(sanic_server):
+    invalid_headers = [
+        {},
+        {'Authorization': 'Bearer wrong-token'},
+        {'Authorization': 'retrieve-token'},
+    ]
+    for headers in invalid_headers:
+        response = await sanic_server.post(
+            RETRIEVE_PATH,
+            json={'required-slots': 20, 'game-mode': '1v1'},
+            headers=headers
+        )
+        assert response.status == 401
+        data = await response.json()
+
+        error = data[Response.ERROR_FIELD_NAME]
+        assert error[Response.ERROR_TYPE_FIELD_NAME] == AUTHORIZATION_ERROR
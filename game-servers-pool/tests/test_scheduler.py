@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from app.game_servers.scheduler import (
+    DEFAULT_FLOW, HIGH_PRIORITY, LOW_PRIORITY, WeightedScheduler, get_game_mode
+)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_concurrency():
+    scheduler = WeightedScheduler({HIGH_PRIORITY: 1, LOW_PRIORITY: 1}, concurrency=2)
+    running = []
+    peak = []
+
+    async def handle():
+        running.append(None)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    await asyncio.gather(*[scheduler.submit(HIGH_PRIORITY, handle) for _ in range(6)])
+
+    assert max(peak) == 2
+    assert scheduler.running == 0
+    assert scheduler.get_stats()['lanes'][HIGH_PRIORITY]['dispatched'] == 6
+    assert scheduler.get_stats()['lanes'][LOW_PRIORITY]['dispatched'] == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_prefers_high_priority_lane_without_starving_low_one():
+    scheduler = WeightedScheduler({HIGH_PRIORITY: 3, LOW_PRIORITY: 1}, concurrency=1)
+    started = []
+    release = asyncio.Event()
+
+    async def block():
+        await release.wait()
+
+    async def handle(lane):
+        started.append(lane)
+
+    blocker = asyncio.ensure_future(scheduler.submit(HIGH_PRIORITY, block))
+    await asyncio.sleep(0)
+
+    tasks = [asyncio.ensure_future(scheduler.submit(LOW_PRIORITY, handle, LOW_PRIORITY))
+             for _ in range(4)]
+    tasks += [asyncio.ensure_future(scheduler.submit(HIGH_PRIORITY, handle, HIGH_PRIORITY))
+              for _ in range(12)]
+    await asyncio.sleep(0)
+    assert scheduler.get_stats()['lanes'][HIGH_PRIORITY]['waiting'] == 12
+    assert scheduler.get_stats()['lanes'][LOW_PRIORITY]['waiting'] == 4
+
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert started[:8].count(HIGH_PRIORITY) == 6
+    assert started[:8].count(LOW_PRIORITY) == 2
+    assert started.count(LOW_PRIORITY) == 4
+
+
+@pytest.mark.asyncio
+async def test_scheduler_skips_cancelled_requests():
+    scheduler = WeightedScheduler({HIGH_PRIORITY: 1, LOW_PRIORITY: 1}, concurrency=1)
+    release = asyncio.Event()
+    started = []
+
+    async def block():
+        await release.wait()
+
+    async def handle(name):
+        started.append(name)
+
+    blocker = asyncio.ensure_future(scheduler.submit(HIGH_PRIORITY, block))
+    cancelled = asyncio.ensure_future(scheduler.submit(LOW_PRIORITY, handle, 'cancelled'))
+    waiting = asyncio.ensure_future(scheduler.submit(LOW_PRIORITY, handle, 'waiting'))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    release.set()
+    await asyncio.gather(blocker, waiting)
+
+    assert started == ['waiting']
+    assert scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_serves_game_modes_in_turns_by_weight():
+    scheduler = WeightedScheduler(
+        {HIGH_PRIORITY: 1, LOW_PRIORITY: 1}, concurrency=1, flow_weights={'duel': 2}
+    )
+    release = asyncio.Event()
+    started = []
+
+    async def block():
+        await release.wait()
+
+    async def handle(game_mode):
+        started.append(game_mode)
+
+    blocker = asyncio.ensure_future(scheduler.submit(HIGH_PRIORITY, block))
+    tasks = [
+        asyncio.ensure_future(scheduler.submit(HIGH_PRIORITY, handle, 'team', flow='team'))
+        for _ in range(10)
+    ]
+    tasks += [
+        asyncio.ensure_future(scheduler.submit(HIGH_PRIORITY, handle, 'duel', flow='duel'))
+        for _ in range(4)
+    ]
+    await asyncio.sleep(0)
+
+    flows = scheduler.get_stats()['lanes'][HIGH_PRIORITY]['flows']
+    assert flows['team']['waiting'] == 10
+    assert flows['duel']['waiting'] == 4
+
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+
+    assert started[:6] == ['team', 'duel', 'duel', 'team', 'duel', 'duel']
+    assert started[6:] == ['team'] * 8
+
+    flows = scheduler.get_stats()['lanes'][HIGH_PRIORITY]['flows']
+    assert flows['duel']['dispatched'] == 4
+    assert flows['duel']['average-wait-ms'] >= 0
+    assert flows[DEFAULT_FLOW]['dispatched'] == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_join_waits_for_submitted_requests():
+    scheduler = WeightedScheduler({HIGH_PRIORITY: 1, LOW_PRIORITY: 1}, concurrency=1)
+    release = asyncio.Event()
+    finished = []
+
+    async def handle(name):
+        await release.wait()
+        finished.append(name)
+
+    assert await scheduler.join(timeout=0.01)
+
+    tasks = [asyncio.ensure_future(scheduler.submit(LOW_PRIORITY, handle, name))
+             for name in ('first', 'second')]
+    assert not await scheduler.join(timeout=0.01)
+    assert scheduler.pending == 2
+
+    release.set()
+    assert await scheduler.join(timeout=1)
+    assert finished == ['first', 'second']
+    await asyncio.gather(*tasks)
+
+
+def test_get_game_mode():
+    assert get_game_mode(b'{"game-mode": "team", "required-slots": 5}') == 'team'
+    assert get_game_mode(b'{"required-slots": 5}') == DEFAULT_FLOW
+    assert get_game_mode(b'{"game-mode": 5}') == DEFAULT_FLOW
+    assert get_game_mode(b'[]') == DEFAULT_FLOW
+    assert get_game_mode(b'not json') == DEFAULT_FLOW
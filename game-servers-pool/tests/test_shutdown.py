@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.game_servers.coalescer import AllocationCoalescer
+from app.game_servers.scheduler import HIGH_PRIORITY, LOW_PRIORITY, WeightedScheduler
+from app.workers.shutdown import drain_workers
+
+
+class FakeConsumers(object):
+
+    def __init__(self, log):
+        self.log = log
+
+    async def cancel(self):
+        self.log.append('cancel')
+
+    async def close(self):
+        self.log.append('close')
+
+
+class FakeWorker(object):
+
+    def __init__(self, log):
+        self.consumers = FakeConsumers(log)
+
+
+class FakePoolEvents(object):
+
+    def __init__(self, log):
+        self.log = log
+
+    async def flush(self, timeout=None):
+        self.log.append('flush')
+        return True
+
+
+class FakeStorage(object):
+
+    async def allocate_many(self, game_mode, slots, region=None, tags=None):
+        return [{'id': 'first', 'available_slots': 10 - required} for required in slots]
+
+
+class FakeAmqp(object):
+
+    def __init__(self, workers):
+        self.workers = workers
+
+
+class FakeApp(object):
+
+    def __init__(self, log):
+        self.amqp = FakeAmqp([FakeWorker(log), object()])
+        self.allocation_coalescer = AllocationCoalescer(FakeStorage(), window=60)
+        self.request_scheduler = WeightedScheduler({HIGH_PRIORITY: 1, LOW_PRIORITY: 1})
+        self.pool_events = FakePoolEvents(log)
+
+
+@pytest.mark.asyncio
+async def test_drain_finishes_delivered_requests_before_closing_channels():
+    log = []
+    app = FakeApp(log)
+
+    async def handle():
+        # Waits for the batching window, which is flushed on shutdown
+        document = await app.allocation_coalescer.allocate('1v1', 2)
+        log.append('handled')
+        return document
+
+    task = asyncio.ensure_future(app.request_scheduler.submit(HIGH_PRIORITY, handle))
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(drain_workers(app, timeout=1), 2)
+
+    assert log == ['cancel', 'handled', 'flush', 'close']
+    assert (await task)['available_slots'] == 8
@@ -0,0 +1,73 @@
+import pytest
+from sage_utils.constants import AUTHORIZATION_ERROR
+
+from app.game_servers.documents import GameServer
+
+
+AUTHORIZATION_HEADERS = {'Authorization': 'Bearer admin-token'}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_returns_all_game_servers(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    for port, game_mode in [(9000, '1v1'), (9001, '1v1'), (9002, 'team-deathmatch')]:
+        game_server = GameServer(**{
+            'host': '127.0.0.1',
+            'port': port,
+            'available_slots': 100,
+            'credentials': {
+                'token': 'super_secret_token'
+            },
+            'game_mode': game_mode
+        })
+        await game_server.commit()
+
+    response = await sanic_server.get(
+        '/game-servers-pool/api/snapshot', headers=AUTHORIZATION_HEADERS
+    )
+    assert response.status == 200
+    content = await response.json()
+
+    assert set(content.keys()) == {'source', 'seq', 'servers'}
+    assert len(content['servers']) == 3
+    for server in content['servers']:
+        assert set(server.keys()) == {'id', 'game-mode', 'available-slots', 'version'}
+        assert server['available-slots'] == 100
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_snapshot_filters_game_servers_by_game_mode(sanic_server):
+    await GameServer.collection.delete_many({})
+
+    for port, game_mode in [(9000, '1v1'), (9001, 'team-deathmatch')]:
+        game_server = GameServer(**{
+            'host': '127.0.0.1',
+            'port': port,
+            'available_slots': 100,
+            'game_mode': game_mode
+        })
+        await game_server.commit()
+
+    response = await sanic_server.get(
+        '/game-servers-pool/api/snapshot?game-mode=1v1', headers=AUTHORIZATION_HEADERS
+    )
+    assert response.status == 200
+    content = await response.json()
+
+    assert len(content['servers']) == 1
+    assert content['servers'][0]['game-mode'] == '1v1'
+
+    await GameServer.collection.delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_snapshot_refuses_requests_without_a_valid_token(sanic_server):
+    for headers in [{}, {'Authorization': 'Bearer wrong-token'}]:
+        response = await sanic_server.get('/game-servers-pool/api/snapshot', headers=headers)
+        assert response.status == 401
+
+        content = await response.json()
+        assert content['error']['type'] == AUTHORIZATION_ERROR
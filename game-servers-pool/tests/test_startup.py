@@ -0,0 +1,155 @@
+import asyncio
+import multiprocessing
+from types import SimpleNamespace
+
+import pytest
+
+from app.workers import startup
+from app.workers.startup import (
+    claim_primary, create_primary_flag, format_timings, start_services, wait_for_consumers
+)
+
+
+class FakeAdminDatabase(object):
+
+    def __init__(self):
+        self.pinged = asyncio.Event()
+
+    async def command(self, name):
+        await asyncio.sleep(0.05)
+        self.pinged.set()
+        return {'ok': 1}
+
+
+class FakeStorage(object):
+
+    def __init__(self, admin):
+        self.admin = admin
+
+    async def init(self):
+        # Indexes are checked only while the connection is warmed up,
+        # so that running the steps one after another never finishes
+        await self.admin.pinged.wait()
+        await asyncio.sleep(0.05)
+
+
+class FakeMongoClient(object):
+
+    def __init__(self):
+        self.admin = FakeAdminDatabase()
+
+
+class FakeWorker(object):
+    QUEUE_NAME = 'game-servers-pool.server.retrieve'
+
+    def __init__(self):
+        self.consumers = None
+
+
+class FakeAmqp(object):
+
+    def __init__(self, workers):
+        self.workers = workers
+
+
+class FakeApp(object):
+
+    def __init__(self):
+        self.config = {
+            "STORAGE_BACKEND": 'mongodb',
+            "MICROSERVICE_REGISTRATION_ENABLED": False,
+        }
+        self.mongodb = FakeMongoClient()
+        self.storage = FakeStorage(self.mongodb.admin)
+        self.amqp = FakeAmqp([FakeWorker(), object()])
+        self.pool_events = SimpleNamespace(tracks_capacity=True)
+
+
+@pytest.mark.asyncio
+async def test_start_services_runs_steps_concurrently(capsys):
+    app = FakeApp()
+    app.amqp.workers[0].consumers = object()
+
+    timings = await asyncio.wait_for(start_services(app, asyncio.get_event_loop()), 1)
+
+    assert set(timings.keys()) == {'storage', 'mongodb'}
+    assert timings['mongodb'] >= 0.05
+    assert timings['storage'] > timings['mongodb']
+    output = capsys.readouterr().out
+    assert 'storage' in output
+    assert 'mongodb' in output
+
+
+@pytest.mark.asyncio
+async def test_start_services_tracks_capacity_only_in_the_primary_process():
+    app = FakeApp()
+    app.amqp.workers[0].consumers = object()
+    app.is_primary = False
+
+    await asyncio.wait_for(start_services(app, asyncio.get_event_loop()), 1)
+    assert app.pool_events.tracks_capacity is False
+
+
+class FakeRegisterWorker(object):
+    registered = []
+
+    def __init__(self, app):
+        self.app = app
+
+    async def run(self, loop=None):
+        self.registered.append(self.app)
+
+
+@pytest.mark.asyncio
+async def test_start_services_registers_only_in_the_primary_process(monkeypatch):
+    monkeypatch.setattr(startup, 'MicroserviceRegisterWorker', FakeRegisterWorker)
+    primary, secondary = FakeApp(), FakeApp()
+    for app in (primary, secondary):
+        app.config["MICROSERVICE_REGISTRATION_ENABLED"] = True
+        app.amqp.workers[0].consumers = object()
+    secondary.is_primary = False
+
+    timings = await asyncio.wait_for(start_services(primary, asyncio.get_event_loop()), 1)
+    assert 'registration' in timings
+    timings = await asyncio.wait_for(start_services(secondary, asyncio.get_event_loop()), 1)
+    assert 'registration' not in timings
+    assert FakeRegisterWorker.registered == [primary]
+
+
+def claim_in_child(app, claimed):
+    claimed.value = claim_primary(app)
+
+
+def test_claim_primary_is_won_by_one_of_forked_processes():
+    app = SimpleNamespace(primary_flag=create_primary_flag())
+    assert claim_primary(app) is True
+    # Claiming once more in the same process, e.g. on a restart of services, keeps it
+    assert claim_primary(app) is True
+
+    claimed = multiprocessing.Value('i', -1)
+    process = multiprocessing.Process(target=claim_in_child, args=(app, claimed))
+    process.start()
+    process.join(5)
+    assert claimed.value == 0
+
+
+def test_claim_primary_without_a_flag_uses_the_given_role():
+    assert claim_primary(SimpleNamespace()) is True
+    assert claim_primary(SimpleNamespace(is_primary=False)) is False
+
+
+@pytest.mark.asyncio
+async def test_wait_for_consumers_reports_when_all_workers_consume(capsys):
+    app = FakeApp()
+    task = asyncio.ensure_future(wait_for_consumers(app, timeout=1))
+    await asyncio.sleep(0.02)
+    assert not task.done()
+
+    app.amqp.workers[0].consumers = object()
+    await asyncio.wait_for(task, 1)
+    assert 'AMQP workers are ready' in capsys.readouterr().out
+
+
+def test_format_timings():
+    line = format_timings(0.5, {'storage': 0.25, 'mongodb': 0.125})
+    assert line == "Started in 0.500s: mongodb 0.125s, storage 0.250s."
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.game_servers import scoring
+from app.game_servers.storage import InMemoryGameServerStorage
+from app.game_servers.storage.extension import StorageExtension
+
+
+def create_app(**config):
+    settings = {
+        "STORAGE_BACKEND": 'memory',
+        "STORAGE_SNAPSHOT_PATH": None,
+        "STORAGE_SNAPSHOT_INTERVAL": None,
+        "CHANGE_STREAM_ENABLED": False,
+        "ALLOCATION_SCORING_ENABLED": False,
+        "TELEMETRY_HALF_LIFE": 30,
+        "TELEMETRY_TICK_BUDGET": 0.05,
+        "TELEMETRY_MIN_HEADROOM": 0.1,
+        "TELEMETRY_STALE_AFTER": 60,
+        "TELEMETRY_DEFAULT_HEADROOM": 0.5,
+        "TELEMETRY_SAMPLE_SIZE": 2,
+    }
+    settings.update(config)
+    return SimpleNamespace(config=settings)
+
+
+def test_extension_creates_the_memory_storage():
+    storage = StorageExtension().create_storage(create_app())
+    assert isinstance(storage, InMemoryGameServerStorage)
+
+
+def test_extension_refuses_change_streams_with_the_memory_storage():
+    with pytest.raises(ValueError):
+        StorageExtension().create_storage(create_app(CHANGE_STREAM_ENABLED=True))
+
+
+def test_extension_scores_allocations_with_or_without_numpy(capsys):
+    storage = StorageExtension().create_storage(create_app(
+        ALLOCATION_SCORING_ENABLED=True,
+        ALLOCATION_FIT_WEIGHT=1.0,
+        ALLOCATION_LOAD_WEIGHT=1.0,
+        ALLOCATION_REGION_PENALTIES={},
+        ALLOCATION_TAG_PREFERENCES={},
+    ))
+    assert storage.scorer.use_numpy == (scoring.numpy is not None)
+    assert 'Allocations are scored with' in capsys.readouterr().out
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from app.workers.supervisor import (
+    ConsumerSupervisor, get_process_plan, select_workers, set_max_pool_size
+)
+
+
+class FakeConsumer(object):
+
+    def __init__(self, queue_name):
+        self.QUEUE_NAME = queue_name
+
+
+class FakePublisher(object):
+    pass
+
+
+def exit_with_error(queue_names, cpu, primary):
+    os._exit(1)
+
+
+def test_select_workers_keeps_workers_without_queues():
+    publisher = FakePublisher()
+    retrieve = FakeConsumer('game-servers-pool.server.retrieve')
+    register = FakeConsumer('game-servers-pool.server.register')
+    workers = [publisher, retrieve, register]
+
+    assert select_workers(workers) == workers
+    assert select_workers(workers, ['game-servers-pool.server.retrieve']) == [publisher, retrieve]
+
+    with pytest.raises(ValueError):
+        select_workers(workers, ['game-servers-pool.server.unknown'])
+
+
+def test_get_process_plan_pins_processes_in_turns():
+    groups = [(['retrieve'], 3), (['register', 'update'], 1)]
+
+    assert get_process_plan(groups) == [
+        (['retrieve'], None), (['retrieve'], None), (['retrieve'], None),
+        (['register', 'update'], None),
+    ]
+    assert get_process_plan(groups, cpus=[2, 3]) == [
+        (['retrieve'], 2), (['retrieve'], 3), (['retrieve'], 2), (['register', 'update'], 3),
+    ]
+
+
+def test_set_max_pool_size():
+    uri = 'mongodb://mongodb:27017/pool?maxPoolSize=100&minPoolSize=0'
+    assert set_max_pool_size(uri, 20) == 'mongodb://mongodb:27017/pool?maxPoolSize=20&minPoolSize=0'
+
+    uri = 'mongodb://mongodb:27017/pool'
+    assert set_max_pool_size(uri, 20) == 'mongodb://mongodb:27017/pool?maxPoolSize=20'
+
+
+def test_supervisor_restarts_exited_processes_with_backoff():
+    supervisor = ConsumerSupervisor(
+        exit_with_error, [(['retrieve'], None)], restart_delay=0.01, max_restart_delay=0.04
+    )
+    supervisor.start(0)
+    supervisor.processes[0].join()
+
+    supervisor.check()
+    assert supervisor.processes == {}
+    assert supervisor.failures[0] == 1
+
+    supervisor.pending[0] = 0
+    supervisor.check()
+    supervisor.processes[0].join()
+    supervisor.check()
+    assert supervisor.failures[0] == 2
+    assert supervisor.pending[0] - supervisor.clock() <= 0.02
+
+    supervisor.pending[0] = 0
+    supervisor.check()
+    supervisor.terminate()